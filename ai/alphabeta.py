@@ -0,0 +1,234 @@
+import math
+import time
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+from core.board import coord_table
+from .resistance import evaluate
+from .transposition import TranspositionTable, position_key
+
+# 为Alpha-Beta搜索设置日志编码
+if not logging.getLogger().handlers:
+    logging.basicConfig(encoding='utf-8')  # 确保日志使用UTF-8编码
+
+# 终局分值（减去层数，使更快的胜利分值更高）
+WIN_SCORE = 1000.0
+
+# 置换表条目的界类型
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class _SearchTimeout(Exception):
+    """搜索时间用完或被取消"""
+
+
+class AlphaBeta:
+    """迭代加深 Alpha-Beta 搜索
+
+    叶节点用电阻估值（ai.resistance）：双方Shannon电路等效电阻之比的对数。
+    同一次电路求解得到的各格电流用于走法排序，每个节点只展开电流最大的 width 个走法，
+    置换表中记录的最佳走法排在最前。搜索过程不含随机性，相同局面总是给出相同的走法。
+    """
+
+    def __init__(self, hex, color, ai_color, max_depth: int = 6, width: int = 10, tt_size: int = 200000):
+        """
+        初始化Alpha-Beta搜索
+        Args:
+            hex: Hex棋盘状态
+            color: 当前玩家颜色
+            ai_color: AI的颜色
+            max_depth: 迭代加深的最大深度
+            width: 每个节点展开的走法数
+            tt_size: 置换表容量
+        """
+        self.hex = hex.copy()
+        self.color = color
+        self.ai_color = ai_color
+        self.max_depth = max_depth
+        self.width = width
+        self.tt = TranspositionTable(tt_size)
+        self.coords = coord_table(hex.size)
+        self.scores = {}  # 最近一次完成的迭代中根节点各走法的分值（行棋方视角）
+        self.nodes = 0
+        self.deadline = 0.0
+        self.stop_event = None
+        logging.info(f"Alpha-Beta初始化 - 当前颜色:{color}, AI颜色:{ai_color}, 最大深度:{max_depth}, 宽度:{width}")
+
+    def advance(self, action):
+        """
+        Alpha-Beta 不保留搜索树，无法复用
+        Returns:
+            None
+        """
+        return None
+
+    def root_stats(self):
+        """
+        获取根节点各走法的估计（每个走法记一次访问，奖励为AI视角下换算到[-1, 1]的分值）
+        Returns:
+            Dict[Tuple[int, int], Tuple[int, float]]: {动作: (访问次数, AI视角的累计奖励)}
+        """
+        sign = 1.0 if self.color == self.ai_color else -1.0
+        return {action: (1, sign * (2.0 * self.win_ratio(score) - 1.0)) for action, score in self.scores.items()}
+
+    @staticmethod
+    def win_ratio(score: float) -> float:
+        """把分值换算为胜率估计"""
+        if score >= WIN_SCORE / 2:
+            return 1.0
+        if score <= -WIN_SCORE / 2:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(-score))
+
+    def _ordered_moves(self, currents: np.ndarray, first: Optional[int]) -> List[int]:
+        """按电流从大到小排列空格，置换表走法排在最前，截取前 width 个"""
+        cells = np.frombuffer(bytes(self.hex.cells), dtype=np.uint8)
+        empty = np.flatnonzero(cells == 0)
+        # 稳定排序：电流相同时按格子编号，保证结果确定
+        order = empty[np.argsort(-currents[empty], kind='stable')]
+        moves = [int(idx) for idx in order[:self.width]]
+        if first is not None:
+            if first in moves:
+                moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _negamax(self, depth: int, alpha: float, beta: float, color: str, ply: int) -> float:
+        """
+        Negamax 形式的 Alpha-Beta
+        Returns:
+            float: color 视角的分值
+        """
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise _SearchTimeout()
+        if time.time() >= self.deadline:
+            raise _SearchTimeout()
+        self.nodes += 1
+        board = self.hex
+
+        winner = board.check_winner()
+        if winner is not None:
+            return WIN_SCORE - ply if winner == color else -(WIN_SCORE - ply)
+
+        key = position_key(board, color)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, value, flag, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        score, currents = evaluate(board, color)
+        if depth == 0:
+            return score
+
+        original_alpha = alpha
+        best_value = -math.inf
+        best_move = None
+        next_color = 'B' if color == 'R' else 'R'
+        for idx in self._ordered_moves(currents, tt_move):
+            row, col = self.coords[idx]
+            token = board.place_stone(row, col, color)
+            try:
+                value = -self._negamax(depth - 1, -beta, -alpha, next_color, ply + 1)
+            finally:
+                board.undo(token)
+            if value > best_value:
+                best_value = value
+                best_move = idx
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        flag = UPPER if best_value <= original_alpha else LOWER if best_value >= beta else EXACT
+        self.tt.put(key, (depth, best_value, flag, best_move))
+        return best_value
+
+    def _search_root(self, depth: int, order: List[int]) -> dict:
+        """依次搜索根节点的各走法，返回 {走法: 分值}（不如当前最佳的走法得到的是分值上界）"""
+        board = self.hex
+        next_color = 'B' if self.color == 'R' else 'R'
+        alpha = -math.inf
+        scores = {}
+        for idx in order:
+            row, col = self.coords[idx]
+            token = board.place_stone(row, col, self.color)
+            try:
+                value = -self._negamax(depth - 1, -math.inf, -alpha, next_color, 1)
+            finally:
+                board.undo(token)
+            scores[idx] = value
+            alpha = max(alpha, value)
+        return scores
+
+    def search(self, time_limit=5.0, stop_event=None, progress=None, early_stop=False):
+        """
+        迭代加深搜索，找到最佳动作
+        Args:
+            time_limit: 搜索时间限制（秒）
+            stop_event: 可选的 threading.Event，被置位时提前结束搜索
+            progress: 可选的回调函数，每完成一轮迭代及搜索结束时调用一次（参数格式同 MCTS.progress_info，另含 depth）
+            early_stop: 为与其他引擎的接口一致而接受；迭代加深在证明胜负时已提前结束
+        Returns:
+            Tuple: (最佳动作, 胜率, 搜索的节点数, 搜索时间)
+        """
+        start_time = time.time()
+        logging.info(f"开始Alpha-Beta搜索 - 时间限制:{time_limit}秒")
+
+        # 如果是首步，优先选择中心位置
+        size = self.hex.size
+        if len(self.hex.available) == size * size:
+            center = size // 2
+            logging.info(f"首步直接选择中心位置 ({center}, {center})")
+            return (center, center), 1.0, 1, 0.0
+        if not self.hex.available or self.hex.check_winner() is not None:
+            return None, 0.5, 0, 0.0
+
+        self.deadline = start_time + time_limit
+        self.stop_event = stop_event
+        self.nodes = 0
+        _, currents = evaluate(self.hex, self.color)
+        order = self._ordered_moves(currents, None)
+        best_idx, best_score, depth_done = order[0], 0.0, 0
+        scores = {}
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                result = self._search_root(depth, order)
+            except _SearchTimeout:
+                break
+            depth_done = depth
+            scores = result
+            # 下一轮先搜索本轮分值高的走法，提高剪枝效率
+            order = sorted(result, key=lambda idx: -result[idx])
+            best_idx = order[0]
+            best_score = result[best_idx]
+            logging.info(f"搜索深度 {depth} 完成 - 最佳动作:{self.coords[best_idx]}，分值:{best_score:.4f}，"
+                         f"节点数:{self.nodes}，用时:{time.time() - start_time:.2f}秒")
+            if progress is not None:
+                ratio = self.win_ratio(best_score)
+                progress({'simulations': self.nodes, 'elapsed': round(time.time() - start_time, 3),
+                          'best_move': self.coords[best_idx], 'depth': depth,
+                          'win_rate': round(ratio if self.color == self.ai_color else 1.0 - ratio, 4)})
+            if abs(best_score) >= WIN_SCORE / 2:
+                break
+
+        self.scores = {self.coords[idx]: score for idx, score in scores.items()}
+        search_time = time.time() - start_time
+        best_action = self.coords[best_idx]
+        ratio = self.win_ratio(best_score)
+        if self.color != self.ai_color:
+            ratio = 1.0 - ratio
+        if progress is not None:
+            progress({'simulations': self.nodes, 'elapsed': round(search_time, 3), 'best_move': best_action,
+                      'depth': depth_done, 'win_rate': round(ratio, 4)})
+        logging.info(f"Alpha-Beta搜索完成 - 用时:{search_time:.2f}秒，完成深度:{depth_done}，节点数:{self.nodes}，"
+                     f"置换表:{len(self.tt)}个局面\n选择最佳动作:{best_action}，胜率:{ratio:.4f}")
+        return best_action, ratio, self.nodes, search_time
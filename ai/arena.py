@@ -0,0 +1,276 @@
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Dict, Optional, Tuple
+
+from core.board import Board, should_swap
+from ai.engines import create_engine
+from ai.parallel import get_executor
+
+
+def parse_spec(spec: str, time_limit: float = 1.0) -> Tuple[str, float, Dict]:
+    """
+    解析引擎配置，格式为 "引擎名[:参数=值,...]"，例如 "pruned:time=0.5,c=1.2,policy=random"
+    Args:
+        spec: 配置字符串，time 为每步搜索时间，其余参数按 JSON 解析（失败时作为字符串）后
+              传给 ai.engines.create_engine，policy 可以是模拟策略名称
+        time_limit: 未指定 time 时的每步搜索时间
+    Returns:
+        Tuple[str, float, Dict]: (引擎名, 每步搜索时间, 覆盖的构造参数)
+    """
+    name, _, params = spec.partition(':')
+    overrides = {}
+    for item in filter(None, params.split(',')):
+        key, _, value = item.partition('=')
+        try:
+            overrides[key.strip()] = json.loads(value)
+        except ValueError:
+            overrides[key.strip()] = value.strip()
+    if 'time' in overrides:
+        time_limit = float(overrides.pop('time'))
+    return name.strip(), time_limit, overrides
+
+
+def play_game(first: str, second: str, size: int = 11, time_limit: float = 1.0,
+              opening: Optional[Tuple[int, int]] = None, seed: int = 0) -> str:
+    """
+    对弈一盘，先手执红，交换规则的处理与 Game.handle_opponent_first_move 相同：
+    第一步落在中央区域时后手交换（棋子换到对称位置并变为蓝子，先手继续执红走下一步），
+    否则后手走对称位置
+    Args:
+        first: 先手的引擎配置
+        second: 后手的引擎配置
+        size: 棋盘大小
+        time_limit: 未在配置中指定时的每步搜索时间
+        opening: 指定的第一步，None 表示由先手搜索
+        seed: 随机种子
+    Returns:
+        str: 'first' 或 'second'，获胜的一方
+    """
+    random.seed(seed)
+    players = {}
+    for color, spec in (('R', first), ('B', second)):
+        name, limit, overrides = parse_spec(spec, time_limit)
+        players[color] = (create_engine(name, **overrides), limit)
+
+    def search(board, color):
+        factory, limit = players[color]
+        return factory(board, color, color).search(time_limit=limit)[0]
+
+    board = Board(size)
+    move = opening or search(board, 'R')
+    board.place_stone(move[0], move[1], 'R')
+    mirror = (move[1], move[0])
+    if should_swap(move, size):
+        board = Board(size)
+        board.place_stone(mirror[0], mirror[1], 'B')
+        color = 'R'
+    elif board.is_valid_move(*mirror):
+        board.place_stone(mirror[0], mirror[1], 'B')
+        color = 'R'
+    else:
+        color = 'B'
+
+    while board.check_winner() is None:
+        action = search(board, color)
+        board.place_stone(action[0], action[1], color)
+        color = 'B' if color == 'R' else 'R'
+    return 'first' if board.check_winner() == 'R' else 'second'
+
+
+def submit_game(executor, engine_a: str, engine_b: str, index: int, size: int = 11, time_limit: float = 1.0,
+                seed: int = 0, random_opening: bool = True):
+    """
+    提交第 index 盘对局：偶数盘 A 先手、奇数盘 B 先手，随机开局时相邻两盘使用相同的第一步
+    Args:
+        executor: 进程池
+        engine_a: A 的引擎配置
+        engine_b: B 的引擎配置
+        index: 对局序号
+        size: 棋盘大小
+        time_limit: 未在配置中指定时的每步搜索时间
+        seed: 随机种子
+        random_opening: 是否随机选择第一步
+    Returns:
+        Tuple[Future, bool]: (对局结果，见 play_game; A 是否先手)
+    """
+    opening = None
+    if random_opening:
+        rng = random.Random(seed + index // 2)
+        opening = (rng.randrange(size), rng.randrange(size))
+    a_first = index % 2 == 0
+    first, second = (engine_a, engine_b) if a_first else (engine_b, engine_a)
+    return executor.submit(play_game, first, second, size, time_limit, opening, seed + index), a_first
+
+
+def expected_score(elo: float) -> float:
+    """Elo 差对应的期望得分"""
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def elo_from_score(score: float) -> float:
+    """得分率对应的 Elo 差（得分率为0或1时为无穷）"""
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def elo_interval(wins: int, games: int, z: float = 1.96) -> Tuple[float, float]:
+    """
+    Elo 差的置信区间（得分率的正态近似）
+    Args:
+        wins: 胜局数
+        games: 总局数
+        z: 正态分位数，1.96 对应 95%
+    Returns:
+        Tuple[float, float]: (下界, 上界)
+    """
+    score = wins / games
+    margin = z * math.sqrt(score * (1.0 - score) / games)
+    return elo_from_score(score - margin), elo_from_score(score + margin)
+
+
+def sprt_llr(wins: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    SPRT 的对数似然比（Hex 没有和棋，按伯努利分布计算）
+    Args:
+        wins: 胜局数
+        losses: 负局数
+        elo0: 原假设 H0 的 Elo 差
+        elo1: 备择假设 H1 的 Elo 差
+    Returns:
+        float: log(L(H1) / L(H0))，越大越支持 H1
+    """
+    p0, p1 = expected_score(elo0), expected_score(elo1)
+    return wins * math.log(p1 / p0) + losses * math.log((1.0 - p1) / (1.0 - p0))
+
+
+def _finite(value: float) -> Optional[float]:
+    """JSON 中用 null 表示无穷"""
+    return round(value, 1) if math.isfinite(value) else None
+
+
+def run_match(engine_a: str, engine_b: str, games: int = 100, workers: int = None, size: int = 11,
+              time_limit: float = 1.0, random_opening: bool = True, seed: int = None,
+              elo0: float = 0.0, elo1: float = 10.0, alpha: float = 0.05, beta: float = 0.05,
+              progress=None) -> Dict:
+    """
+    在进程池中对弈多盘，A、B 轮流先手；随机开局时每个开局各先手一次。
+    每完成一盘更新 SPRT，越过边界即停止
+    Args:
+        engine_a: A 的引擎配置（见 parse_spec）
+        engine_b: B 的引擎配置
+        games: 最多对弈的盘数
+        workers: 进程数，默认使用全部CPU核心
+        size: 棋盘大小
+        time_limit: 未在配置中指定时的每步搜索时间
+        random_opening: 是否随机选择第一步（否则由先手搜索，MCTS 总是走中心）
+        seed: 随机种子，默认随机
+        elo0: SPRT 原假设的 Elo 差（A 相对 B）
+        elo1: SPRT 备择假设的 Elo 差
+        alpha: 第一类错误率
+        beta: 第二类错误率
+        progress: 可选的回调函数，每完成一盘以 {'games', 'wins', 'llr', 'bounds'} 字典调用一次
+    Returns:
+        Dict: 对局统计摘要
+    """
+    workers = workers or os.cpu_count() or 1
+    seed = seed if seed is not None else random.randrange(1 << 30)
+    lower, upper = math.log(beta / (1.0 - alpha)), math.log((1.0 - beta) / alpha)
+    executor = get_executor(workers)
+    start_time = time.time()
+
+    wins = {'R': 0, 'B': 0}    # A 执红/执蓝时的胜局数
+    played = {'R': 0, 'B': 0}  # A 执红/执蓝的局数
+    llr, decision = 0.0, None
+    running = {}
+    submitted = 0
+    while (running or submitted < games) and decision is None:
+        while submitted < games and len(running) < workers * 2:
+            future, a_first = submit_game(executor, engine_a, engine_b, submitted, size, time_limit, seed,
+                                          random_opening)
+            running[future] = a_first
+            submitted += 1
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            a_first = running.pop(future)
+            a_color = 'R' if a_first else 'B'
+            played[a_color] += 1
+            if (future.result() == 'first') == a_first:
+                wins[a_color] += 1
+            total_wins, total = sum(wins.values()), sum(played.values())
+            llr = sprt_llr(total_wins, total - total_wins, elo0, elo1)
+            if llr >= upper:
+                decision = 'H1'
+            elif llr <= lower:
+                decision = 'H0'
+            if progress is not None:
+                progress({'games': total, 'wins': total_wins, 'llr': llr, 'bounds': (lower, upper)})
+    for future in running:
+        future.cancel()
+
+    total_wins, total = sum(wins.values()), sum(played.values())
+    elo_low, elo_high = elo_interval(total_wins, total)
+    return {
+        'a': engine_a,
+        'b': engine_b,
+        'size': size,
+        'games': total,
+        'wins': total_wins,
+        'losses': total - total_wins,
+        'score': round(total_wins / total, 4),
+        'elo': _finite(elo_from_score(total_wins / total)),
+        'elo_ci95': [_finite(elo_low), _finite(elo_high)],
+        'a_as_red': [wins['R'], played['R']],
+        'a_as_blue': [wins['B'], played['B']],
+        'sprt': {'elo0': elo0, 'elo1': elo1, 'alpha': alpha, 'beta': beta,
+                 'llr': round(llr, 3), 'bounds': [round(lower, 3), round(upper, 3)], 'result': decision},
+        'seed': seed,
+        'seconds': round(time.time() - start_time, 1),
+    }
+
+
+def _print_progress(info: Dict):
+    games, wins, (lower, upper) = info['games'], info['wins'], info['bounds']
+    print(f"第 {games} 盘  A {wins}:{games - wins} B  LLR={info['llr']:.2f} [{lower:.2f}, {upper:.2f}]",
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='两个引擎配置对弈，估计Elo差并做SPRT检验')
+    parser.add_argument('a', help='A 的引擎配置，例如 "pruned:time=0.5,c=1.2,policy=random"')
+    parser.add_argument('b', help='B 的引擎配置')
+    parser.add_argument('--games', type=int, default=100, help='最多对弈的盘数')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认使用全部CPU核心')
+    parser.add_argument('--size', type=int, default=11, help='棋盘大小')
+    parser.add_argument('--time', type=float, default=1.0, help='每步搜索时间（秒），可在配置中用 time= 覆盖')
+    parser.add_argument('--no-random-opening', action='store_true', help='第一步由先手搜索而非随机选择')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    parser.add_argument('--elo0', type=float, default=0.0, help='SPRT 原假设的 Elo 差')
+    parser.add_argument('--elo1', type=float, default=10.0, help='SPRT 备择假设的 Elo 差')
+    parser.add_argument('--alpha', type=float, default=0.05, help='第一类错误率')
+    parser.add_argument('--beta', type=float, default=0.05, help='第二类错误率')
+    parser.add_argument('--output', default=None, help='把摘要写入该 JSON 文件')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    summary = run_match(args.a, args.b, games=args.games, workers=args.workers, size=args.size,
+                        time_limit=args.time, random_opening=not args.no_random_opening, seed=args.seed,
+                        elo0=args.elo0, elo1=args.elo1, alpha=args.alpha, beta=args.beta, progress=_print_progress)
+    text = json.dumps(summary, ensure_ascii=False, separators=(',', ':'))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
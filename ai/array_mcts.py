@@ -0,0 +1,374 @@
+import random
+import time
+import math
+import logging
+from array import array
+from typing import Tuple, Optional
+
+from core.board import coord_table
+from .mcts import center_region, most_visited
+from .time_manager import EarlyStop, EARLY_STOP_INTERVAL
+
+# 为ArrayMCTS设置日志编码
+if not logging.getLogger().handlers:
+    logging.basicConfig(encoding='utf-8')  # 确保日志使用UTF-8编码
+
+
+class ArrayMCTS:
+    """结构数组（struct-of-arrays）形式的MCTS
+
+    树中每个节点只是一个整数编号，统计量保存在预分配的 array 中：
+    访问次数、累计奖励、父节点、到达动作（一维格子编号）、首个子节点与子节点数。
+    同一节点的子节点在数组中连续存放，节点不保存棋盘，局面由根棋盘沿动作路径
+    落子重建、迭代结束后撤销。每个节点约占24字节，远小于 MCTS 的对象节点。
+
+    累计奖励从“走到该节点的一方”的视角记录，选择时每一层都为当前行棋方取最大值。
+    """
+
+    def __init__(self, hex, color, ai_color, capacity: int = 65536, max_nodes: int = 4000000, c: float = 1.5):
+        """
+        初始化搜索树
+        Args:
+            hex: Hex棋盘状态
+            color: 根局面的行棋方
+            ai_color: AI的颜色
+            capacity: 初始预分配的节点数，用满后按倍数扩容
+            max_nodes: 节点数上限，达到后不再扩展新节点
+            c: UCT公式中的探索参数
+        """
+        self.hex = hex.copy()
+        self.color = color
+        self.ai_color = ai_color
+        self.capacity = capacity
+        self.max_nodes = max_nodes
+        self.c = c
+        self.coords = coord_table(self.hex.size)
+
+        self._allocate(capacity)
+        self.node_count = 1  # 0号节点为根
+
+        logging.info(f"ArrayMCTS初始化 - 当前颜色:{color}, AI颜色:{ai_color}, 可用动作数量:{len(self.hex.available)}, 节点容量:{capacity}")
+
+    def _allocate(self, capacity: int):
+        """预分配各节点数组"""
+        self.visits = array('i', [0]) * capacity
+        self.values = array('d', [0.0]) * capacity
+        self.parent = array('i', [-1]) * capacity
+        self.action = array('h', [-1]) * capacity
+        self.first_child = array('i', [-1]) * capacity
+        self.child_count = array('h', [0]) * capacity
+
+    def _grow(self, needed: int) -> bool:
+        """把各数组扩容到至少能容纳 needed 个节点
+        Returns:
+            bool: 是否有足够容量
+        """
+        if needed > self.max_nodes:
+            return False
+        extra = min(max(self.capacity, needed - self.capacity), self.max_nodes - self.capacity)
+        self.visits.extend(array('i', [0]) * extra)
+        self.values.extend(array('d', [0.0]) * extra)
+        self.parent.extend(array('i', [-1]) * extra)
+        self.action.extend(array('h', [-1]) * extra)
+        self.first_child.extend(array('i', [-1]) * extra)
+        self.child_count.extend(array('h', [0]) * extra)
+        self.capacity += extra
+        logging.info(f"ArrayMCTS扩容 - 节点容量:{self.capacity}")
+        return True
+
+    def _expand(self, node: int) -> bool:
+        """为节点一次性分配全部子节点（连续存放，中心区域优先，其余随机顺序）
+        Args:
+            node: 节点编号
+        Returns:
+            bool: 是否成功扩展（达到节点数上限时返回 False）
+        """
+        board = self.hex
+        count = len(board.available)
+        start = self.node_count
+        if count == 0:
+            return False
+        if start + count > self.capacity and not self._grow(start + count):
+            return False
+
+        size = board.size
+        center = [r * size + c for r, c in center_region(size) if (r, c) in board.available]
+        center_set = set(center)
+        others = [r * size + c for r, c in board.available if r * size + c not in center_set]
+        random.shuffle(center)
+        random.shuffle(others)
+
+        parent = self.parent
+        action = self.action
+        for i, cell in enumerate(center + others):
+            parent[start + i] = node
+            action[start + i] = cell
+        self.first_child[node] = start
+        self.child_count[node] = count
+        self.node_count = start + count
+        return True
+
+    def _select_child(self, node: int) -> int:
+        """按UCT为当前行棋方选择子节点，未访问过的子节点优先"""
+        visits = self.visits
+        values = self.values
+        first = self.first_child[node]
+        c = self.c
+        log_n = math.log(visits[node]) if visits[node] > 0 else 0.0
+
+        best_child = first
+        best_score = float('-inf')
+        for child in range(first, first + self.child_count[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            score = values[child] / n + c * math.sqrt(log_n / n)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def _simulate(self, color: str) -> Optional[str]:
+        """从当前局面随机模拟到终局（50%概率下在中心区域），结束后撤销
+        Args:
+            color: 当前行棋方
+        Returns:
+            Optional[str]: 获胜方颜色
+        """
+        state = self.hex
+        region = center_region(state.size)
+        first_token = 0
+
+        while state.check_winner() is None:
+            actions = state.available
+            if not actions:
+                break
+            prioritized_actions = [action for action in region if action in actions]
+            if prioritized_actions and random.random() < 0.5:
+                action = random.choice(prioritized_actions)
+            else:
+                action = random.choice(actions)
+            token = state.place_stone(action[0], action[1], color)
+            if not first_token:
+                first_token = token
+            color = 'B' if color == 'R' else 'R'
+
+        winner = state.check_winner()
+        if first_token:
+            state.undo(first_token)
+        return winner
+
+    def _backpropagate(self, node: int, winner: Optional[str], mover: str):
+        """沿父节点数组回传结果
+        Args:
+            node: 叶节点编号
+            winner: 获胜方颜色
+            mover: 走到叶节点的一方
+        """
+        visits = self.visits
+        values = self.values
+        parent = self.parent
+        reward = 1.0 if winner == mover else -1.0
+        while node >= 0:
+            visits[node] += 1
+            values[node] += reward
+            reward = -reward
+            node = parent[node]
+
+    def _iterate(self):
+        """执行一次 选择-扩展-模拟-回传"""
+        board = self.hex
+        coords = self.coords
+        root_token = board.move_count + 1
+        node = 0
+        color = self.color  # 当前节点的行棋方
+
+        while self.child_count[node] > 0 and board.check_winner() is None:
+            node = self._select_child(node)
+            row, col = coords[self.action[node]]
+            board.place_stone(row, col, color)
+            color = 'B' if color == 'R' else 'R'
+
+        # 已访问过的非终止叶节点扩展一层
+        if board.check_winner() is None and (node == 0 or self.visits[node] > 0) and self._expand(node):
+            node = self._select_child(node)
+            row, col = coords[self.action[node]]
+            board.place_stone(row, col, color)
+            color = 'B' if color == 'R' else 'R'
+
+        winner = self._simulate(color)
+        mover = 'B' if color == 'R' else 'R'
+        self._backpropagate(node, winner, mover)
+        board.undo(root_token)
+
+    def advance(self, action):
+        """
+        把对应动作的子节点提升为新的根节点：按广度优先把它的子树压缩到数组前部，
+        丢弃其余节点
+        Args:
+            action: 实际走出的动作
+        Returns:
+            Optional[ArrayMCTS]: 提升后的搜索树（即 self），子节点不存在或未被访问过时返回 None
+        """
+        cell = action[0] * self.hex.size + action[1]
+        first = self.first_child[0]
+        target = -1
+        for child in range(first, first + self.child_count[0]):
+            if self.action[child] == cell:
+                target = child
+                break
+        if target < 0 or self.visits[target] == 0:
+            return None
+
+        # 广度优先遍历子树，每个节点的子节点块保持连续
+        first_child = self.first_child
+        child_count = self.child_count
+        order = [target]
+        new_parent = [-1]
+        new_first = []
+        i = 0
+        while i < len(order):
+            node = order[i]
+            count = child_count[node]
+            if count > 0:
+                new_first.append(len(order))
+                start = first_child[node]
+                order.extend(range(start, start + count))
+                new_parent.extend([i] * count)
+            else:
+                new_first.append(-1)
+            i += 1
+
+        arrays = {
+            'visits': array('i', [self.visits[node] for node in order]),
+            'values': array('d', [self.values[node] for node in order]),
+            'parent': array('i', new_parent),
+            'action': array('h', [self.action[node] for node in order]),
+            'first_child': array('i', new_first),
+            'child_count': array('h', [child_count[node] for node in order]),
+        }
+        self._allocate(self.capacity)
+        for name, values in arrays.items():
+            getattr(self, name)[:len(order)] = values
+        self.node_count = len(order)
+
+        self.hex.place_stone(action[0], action[1], self.color)
+        self.color = 'B' if self.color == 'R' else 'R'
+        logging.info(f"复用子树 - 动作:{action}，继承访问次数:{self.visits[0]}，保留节点数:{len(order)}")
+        return self
+
+    def root_stats(self):
+        """
+        获取根节点各子节点的统计信息
+        Returns:
+            Dict[Tuple[int, int], Tuple[int, float]]: {动作: (访问次数, AI视角的累计奖励)}
+        """
+        stats = {}
+        first = self.first_child[0]
+        sign = 1.0 if self.color == self.ai_color else -1.0
+        for child in range(first, first + self.child_count[0]):
+            n = self.visits[child]
+            if n > 0:
+                stats[self.coords[self.action[child]]] = (n, sign * self.values[child])
+        return stats
+
+    def search(self, time_limit=5.0, stop_event=None, progress=None, early_stop=False):
+        """
+        执行MCTS搜索，找到最佳动作
+        Args:
+            time_limit: 搜索时间限制（秒）
+            stop_event: 可选的 threading.Event，被置位时提前结束搜索（用于后台思考的取消）
+            progress: 可选的回调函数，每500次模拟及搜索结束时以 progress_info() 的结果调用一次
+            early_stop: 最佳动作在剩余时间内无法被超过或访问占比已稳定时提前结束（见 ai.time_manager.EarlyStop）
+        Returns:
+            Tuple: (最佳动作, 胜率, 模拟次数, 搜索时间)
+        """
+        start_time = time.time()
+        simulation_count = 0
+
+        logging.info(f"开始ArrayMCTS搜索 - 时间限制:{time_limit}秒")
+
+        # 如果是首步，优先选择中心位置
+        size = self.hex.size
+        if len(self.hex.available) == size * size:
+            center = size // 2
+            logging.info(f"首步直接选择中心位置 ({center}, {center})")
+            return (center, center), 1.0, 1, 0.0
+
+        early = EarlyStop(time_limit) if early_stop else None
+        while time.time() - start_time < time_limit:
+            if stop_event is not None and stop_event.is_set():
+                logging.info(f"搜索被取消 - 已完成{simulation_count}次模拟")
+                break
+            self._iterate()
+            simulation_count += 1
+
+            # 最终选择访问次数最多的动作，无需另外指定 choice
+            if early is not None and simulation_count % EARLY_STOP_INTERVAL == 0:
+                elapsed = time.time() - start_time
+                reason = early.check(self.root_stats(), simulation_count, elapsed)
+                if reason:
+                    logging.info(f"提前结束搜索（{reason}）- 已完成{simulation_count}次模拟，用时:{elapsed:.2f}秒/{time_limit:.2f}秒")
+                    break
+
+            # 每500次模拟记录一次进度
+            if simulation_count % 500 == 0:
+                elapsed = time.time() - start_time
+                logging.info(f"搜索进度 - 已完成{simulation_count}次模拟，用时:{elapsed:.2f}秒，平均:{simulation_count/elapsed:.1f}次/秒，节点数:{self.node_count}")
+                if progress is not None:
+                    progress(self.progress_info(simulation_count, elapsed))
+
+        search_time = time.time() - start_time
+        if progress is not None:
+            progress(self.progress_info(simulation_count, search_time))
+        return self._report(simulation_count, search_time)
+
+    def progress_info(self, simulations, elapsed):
+        """
+        搜索进度的摘要（格式同 MCTS.progress_info）
+        Args:
+            simulations: 已完成的模拟次数
+            elapsed: 已用时间（秒）
+        Returns:
+            Dict: simulations、elapsed、best_move（访问次数最多的动作）与 win_rate（该动作的平均奖励，AI视角）
+        """
+        info = {'simulations': simulations, 'elapsed': round(elapsed, 3), 'best_move': None, 'win_rate': None}
+        best_action, ratio = most_visited(self.root_stats())
+        if best_action is not None:
+            info['best_move'] = best_action
+            info['win_rate'] = round(ratio, 4)
+        return info
+
+    def _report(self, simulation_count: int, search_time: float):
+        """
+        根据根节点统计选择最佳动作并记录日志
+        Args:
+            simulation_count: 模拟次数
+            search_time: 搜索用时（秒）
+        Returns:
+            Tuple: (最佳动作, 胜率, 模拟次数, 搜索时间)
+        """
+        # 选择访问次数最多的动作，胜率从AI视角给出
+        stats = self.root_stats()
+        best_action, best_ratio = most_visited(stats)
+        action_stats = sorted(((action, q / n, n) for action, (n, q) in stats.items()),
+                              key=lambda x: x[2], reverse=True)
+
+        if best_action is None and self.hex.available:
+            best_action = random.choice(self.hex.available)
+            logging.info(f"未能找到最佳动作，随机选择: {best_action}")
+
+        top_moves = action_stats[:min(5, len(action_stats))]
+        log_msg = f"{type(self).__name__}搜索完成 - 用时:{search_time:.2f}秒，模拟次数:{simulation_count}，节点数:{self.node_count}\n"
+        log_msg += f"前{len(top_moves)}个最佳动作:\n"
+        for i, (action, ratio, visits) in enumerate(top_moves):
+            row, col = action
+            log_msg += f"  {i+1}. 位置:({row},{col}) - 胜率:{ratio:.4f}, 访问次数:{visits}\n"
+        if best_action:
+            row, col = best_action
+            log_msg += f"选择最佳动作:({row},{col})，胜率:{best_ratio:.4f}"
+        else:
+            log_msg += "未找到有效动作"
+        logging.info(log_msg)
+
+        return best_action, best_ratio, simulation_count, search_time
@@ -0,0 +1,146 @@
+import json
+import os
+from typing import Optional
+
+import numpy as np
+
+# 索引文件名
+INDEX_FILE = 'index.json'
+
+
+def record_dtype(size: int) -> np.dtype:
+    """训练样本的定长记录格式
+    Args:
+        size: 棋盘大小
+    Returns:
+        np.dtype: 结构化类型：棋盘格子编码、行棋方编码、行棋方视角的终局结果（+1/-1）、根节点访问分布
+    """
+    return np.dtype([('cells', np.uint8, size * size),
+                     ('to_move', np.uint8),
+                     ('outcome', np.int8),
+                     ('policy', np.float32, size * size)])
+
+
+class ShardWriter:
+    """分片写入训练样本
+
+    每个分片是预先分配好容量的 .npy 文件（np.lib.format.open_memmap），样本按批写入内存映射，
+    写满后开启下一个分片；索引文件记录每个分片中有效样本的数量，每次写入后更新。
+    已存在的目录会在最后一个分片之后继续追加。
+    """
+
+    def __init__(self, directory: str, size: int = 11, shard_size: int = 65536):
+        """
+        Args:
+            directory: 输出目录
+            size: 棋盘大小
+            shard_size: 每个分片的样本容量
+        """
+        self.directory = directory
+        self.size = size
+        self.shard_size = shard_size
+        self.dtype = record_dtype(size)
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            if index['size'] != size:
+                raise ValueError(f"目录中的样本棋盘大小为 {index['size']}，与 {size} 不一致")
+            self.shards = index['shards']
+        else:
+            self.shards = []
+        self.current = None
+
+    def _open_shard(self):
+        """打开最后一个未写满的分片，或新建一个分片"""
+        if self.shards and self.shards[-1]['count'] < self.shards[-1]['capacity']:
+            shard = self.shards[-1]
+            self.current = np.load(os.path.join(self.directory, shard['file']), mmap_mode='r+')
+            return
+        name = f'shard_{len(self.shards):05d}.npy'
+        self.current = np.lib.format.open_memmap(os.path.join(self.directory, name), mode='w+',
+                                                 dtype=self.dtype, shape=(self.shard_size,))
+        self.shards.append({'file': name, 'count': 0, 'capacity': self.shard_size})
+
+    def append(self, records: np.ndarray):
+        """
+        批量追加样本
+        Args:
+            records: record_dtype(size) 类型的一维数组
+        """
+        offset = 0
+        while offset < len(records):
+            if self.current is None:
+                self._open_shard()
+            shard = self.shards[-1]
+            n = min(len(records) - offset, shard['capacity'] - shard['count'])
+            self.current[shard['count']:shard['count'] + n] = records[offset:offset + n]
+            shard['count'] += n
+            offset += n
+            if shard['count'] == shard['capacity']:
+                self.current.flush()
+                self.current = None
+        if self.current is not None:
+            self.current.flush()
+        self._write_index()
+
+    def _write_index(self):
+        """先写临时文件再替换，读取方不会读到写了一半的索引"""
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'size': self.size, 'shards': self.shards}, f, ensure_ascii=False, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def __len__(self) -> int:
+        return sum(shard['count'] for shard in self.shards)
+
+    def close(self):
+        """刷新并关闭当前分片"""
+        if self.current is not None:
+            self.current.flush()
+            self.current = None
+
+
+class ShardReader:
+    """按索引以内存映射方式读取分片，随机抽样时只读取被抽中的记录"""
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 样本目录（含 index.json）
+        """
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+            index = json.load(f)
+        self.size = index['size']
+        self.shards = [(np.load(os.path.join(directory, shard['file']), mmap_mode='r'), shard['count'])
+                       for shard in index['shards'] if shard['count']]
+        self.offsets = np.cumsum([0] + [count for _, count in self.shards])
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def __getitem__(self, i: int) -> np.void:
+        shard = int(np.searchsorted(self.offsets, i, side='right')) - 1
+        data, _ = self.shards[shard]
+        return data[i - self.offsets[shard]]
+
+    def sample(self, count: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        均匀随机抽取样本
+        Args:
+            count: 抽取数量
+            rng: NumPy 随机数生成器，默认新建
+        Returns:
+            np.ndarray: record_dtype 类型的一维数组
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        picks = np.sort(rng.integers(0, len(self), count))
+        shard_ids = np.searchsorted(self.offsets, picks, side='right') - 1
+        parts = []
+        for shard in np.unique(shard_ids):
+            data, _ = self.shards[shard]
+            parts.append(data[picks[shard_ids == shard] - self.offsets[shard]])
+        samples = np.concatenate(parts)
+        return samples[rng.permutation(len(samples))]
@@ -0,0 +1,85 @@
+import json
+import os
+from functools import partial
+from typing import Callable, Dict
+
+from .mcts import MCTS
+from .alphabeta import AlphaBeta
+from .policy import PATTERN_POLICY, POLICIES
+from .network import load_network
+from .array_mcts import ArrayMCTS
+from .parallel import RootParallelMCTS
+from .tree_parallel import SharedTreeMCTS
+
+# 策略/价值网络的权重文件（存在时启用 'puct' 引擎），可用环境变量 HEX_NETWORK_WEIGHTS 指定
+NETWORK_WEIGHTS = os.environ.get(
+    'HEX_NETWORK_WEIGHTS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights', 'hexnet.npz'))
+
+# 调参得到的引擎配置（存在时启用 'tuned' 引擎，见 ai.tune），可用环境变量 HEX_ENGINE_CONFIG 指定
+ENGINE_CONFIG = os.environ.get(
+    'HEX_ENGINE_CONFIG',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights', 'tuned.json'))
+
+# 引擎注册表：名称 -> 构造函数 (hex, color, ai_color) -> 搜索实例
+ENGINES = {
+    'mcts': MCTS,         # 每个节点一个对象的MCTS
+    'array': ArrayMCTS,   # 结构数组形式的MCTS，内存占用更小
+    'batch': partial(MCTS, playout_batch=128),  # 每个叶节点批量随机填满128盘
+    'dag': partial(MCTS, playout_batch=128, tt_size=200000),  # 批量模拟 + 置换表共用相同局面
+    'rave': partial(MCTS, rave_k=300),  # 逐步模拟 + RAVE/AMAF 加速早期统计
+    'pattern': partial(MCTS, policy=PATTERN_POLICY),  # 模拟中应对桥与边桥的侵入
+    'pruned': partial(MCTS, policy=PATTERN_POLICY, prune_inferior=True),  # 另剪掉死格与被吃住的格子
+    'solver': partial(MCTS, policy=PATTERN_POLICY, prune_inferior=True, vc_solve=True),  # 另用虚连接证明胜负
+    'prior': partial(MCTS, policy=PATTERN_POLICY, prune_inferior=True, prior_bias=1.0, widen=5),  # 电流先验 + 渐进偏置/展开
+    'parallel': RootParallelMCTS,  # 多进程根并行，每个CPU核心一棵树
+    'tree': SharedTreeMCTS,  # 多进程树并行，共享内存中的一棵树
+    'alphabeta': AlphaBeta  # 迭代加深Alpha-Beta + 电阻估值，不依赖随机模拟
+}
+
+
+def available_engines() -> Dict[str, Callable]:
+    """
+    获取当前可用的引擎（权重文件存在时加入 'puct'，调参配置存在时加入 'tuned'）
+    Returns:
+        Dict[str, Callable]: 注册表的副本，可以自由增删
+    """
+    engines = dict(ENGINES)
+    if os.path.exists(NETWORK_WEIGHTS):
+        # 网络评估的PUCT搜索，每批评估32个叶节点
+        engines['puct'] = partial(MCTS, network=load_network(NETWORK_WEIGHTS), puct_batch=32)
+    if os.path.exists(ENGINE_CONFIG):
+        engines['tuned'] = load_engine_config(ENGINE_CONFIG, engines)
+    return engines
+
+
+def create_engine(name: str, engines: Dict[str, Callable] = None, **overrides) -> Callable:
+    """
+    获取一个引擎的构造函数，可覆盖其参数
+    Args:
+        name: 引擎名称（见 available_engines()）
+        engines: 查找引擎的注册表，默认为 available_engines()
+        **overrides: 覆盖的构造参数，例如 c=1.2；policy 可以是策略名称（见 ai.policy.POLICIES）
+    Returns:
+        Callable: (hex, color, ai_color) -> 搜索实例
+    """
+    engines = engines if engines is not None else available_engines()
+    if name not in engines:
+        raise ValueError(f"未知的引擎: {name}，可选: {', '.join(engines)}")
+    if isinstance(overrides.get('policy'), str):
+        overrides['policy'] = POLICIES[overrides['policy']]
+    return partial(engines[name], **overrides) if overrides else engines[name]
+
+
+def load_engine_config(path: str, engines: Dict[str, Callable] = None) -> Callable:
+    """
+    加载引擎配置文件：{"engine": 基础引擎名称, "params": {构造参数}}
+    Args:
+        path: JSON 配置文件
+        engines: 查找基础引擎的注册表，默认为 available_engines()
+    Returns:
+        Callable: (hex, color, ai_color) -> 搜索实例
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    return create_engine(config['engine'], engines, **config.get('params', {}))
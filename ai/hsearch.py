@@ -0,0 +1,358 @@
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.board import EMPTY, COLOR_CODES, coord_table
+from .transposition import TranspositionTable, position_key
+
+
+def _make_room(known: List[int], carrier: int, limit: int) -> bool:
+    """连接数已达上限时，用更小的载体替换最大的一条（小载体更容易参与组合），返回能否加入"""
+    if len(known) < limit:
+        return True
+    largest = max(known, key=carrier_size)
+    if carrier_size(carrier) >= carrier_size(largest):
+        return False
+    known.remove(largest)
+    return True
+
+
+class HSearch:
+    """H-search 虚连接计算
+
+    以一方的棋子组（直接取自该颜色并查集的根，两条边界各为一组）和空格为节点，
+    用位掩码表示载体（连接所依赖的空格集合），按 Anshelevich 的规则推导：
+    - 相邻节点之间是载体为空的虚连接（VC）；
+    - AND：x-z 与 z-y 两条 VC 的载体不相交时，z 为棋子组得到 x-y 的 VC，
+      z 为空格得到以 z 为关键点的半连接（SC，己方先走即可连通）；
+    - OR：同一对节点的若干 SC 的载体交集为空时，合并为一条 VC。
+    新连接按先进先出的顺序处理（短的连接先被发现），并用 budget 限制组合次数。
+
+    给出父局面的结果与最后一步时增量计算（见 _inherit）：对方落子只删除经过该格的连接，
+    己方落子把相关节点合并为一个棋子组，只从与新棋子组相连的连接重新开始推导。
+    """
+
+    def __init__(self, board, color: str, max_vc: int = 4, max_sc: int = 8, budget: int = 200000,
+                 parent: Optional['HSearch'] = None, move: Optional[int] = None):
+        """
+        对棋盘上一方的连接做 H-search
+        Args:
+            board: 棋盘（core.board.Board）
+            color: 计算哪一方的连接
+            max_vc: 每对节点最多保留的 VC 数
+            max_sc: 每对节点最多保留的 SC 数
+            budget: AND/OR 组合次数上限，超出后提前结束（结果仍然正确，只是可能不完整）
+            parent: 父局面（撤销最后一步后的局面）同一方的结果，给出时增量计算
+            move: 父局面到当前局面的一步（一维编号），与 parent 一起给出
+        """
+        self.color = color
+        self.max_vc = max_vc
+        self.max_sc = max_sc
+        self.budget = budget
+        self.vcs = {}   # {节点: {节点: [载体, ...]}}，对称存储
+        self.scs = {}   # {(小节点, 大节点): [载体, ...]}，载体含关键点
+        self.queue = deque()
+        self.complete = True
+        if parent is None:
+            self._build(board)
+        else:
+            self._inherit(board, parent, move)
+        self._run()
+
+    def _build(self, board):
+        """从并查集得到棋子组及其相邻空格，写入基础连接"""
+        size = board.size
+        cells = board.cells
+        code = COLOR_CODES[self.color]
+        uf = board.uf_r if self.color == 'R' else board.uf_b
+        self.edge1 = uf.find(board.virtual1)
+        self.edge2 = uf.find(board.virtual2)
+        adjacent = {self.edge1: set(), self.edge2: set()}
+        empty_pairs = []
+        for idx, value in enumerate(cells):
+            if value == EMPTY:
+                empty_pairs.extend((idx, n) for n in board.neighbors[idx] if n > idx and cells[n] == EMPTY)
+            elif value == code:
+                group = adjacent.setdefault(uf.find(idx), set())
+                group.update(n for n in board.neighbors[idx] if cells[n] == EMPTY)
+        # 边界上的空格与对应的边界组相邻
+        for i in range(size):
+            first, last = (i, (size - 1) * size + i) if code == 1 else (i * size, i * size + size - 1)
+            if cells[first] == EMPTY:
+                adjacent[self.edge1].add(first)
+            if cells[last] == EMPTY:
+                adjacent[self.edge2].add(last)
+        self.groups = set(adjacent)
+        for group, empties in adjacent.items():
+            for idx in empties:
+                self._add_vc(group, idx, 0)
+        for x, y in empty_pairs:
+            self._add_vc(x, y, 0)
+
+    def _inherit(self, board, parent: 'HSearch', move: int):
+        """从父局面的结果增量构造基础连接
+
+        连接只依赖载体中的空格：对方落在 move 时，载体不含 move、端点也不是 move 的连接仍然成立，
+        而由被删除的连接推导出的连接载体必含 move，因此也一并被删除，无需重新推导。
+        己方落在 move 时所有连接仍然成立（载体去掉 move），与 move 相连的棋子组合并为新的棋子组；
+        只有经过新棋子组、或原来因载体在 move 处相交而不能组合的连接可能产生新连接，
+        因此只把与新棋子组相连或载体含 move 的 VC 放入队列。
+        """
+        cells = board.cells
+        uf = board.uf_r if self.color == 'R' else board.uf_b
+        self.edge1 = uf.find(board.virtual1)
+        self.edge2 = uf.find(board.virtual2)
+        own = cells[move] == COLOR_CODES[self.color]
+        merged = uf.find(move) if own else None
+        self.groups = {uf.find(group) for group in parent.groups}
+        if own:
+            self.groups.add(merged)
+        bit = 1 << move
+
+        def node(x: int) -> int:
+            return uf.find(x) if x in parent.groups or x == move else x
+
+        for x, links in parent.vcs.items():
+            for y, carriers in links.items():
+                if x > y:
+                    continue
+                if not own and (x == move or y == move):
+                    continue
+                nx, ny = node(x), node(y)
+                touches = merged in (nx, ny)
+                for carrier in carriers:
+                    if not own and carrier & bit:
+                        continue
+                    self._add_vc(nx, ny, carrier & ~bit, own and (touches or bool(carrier & bit)))
+        shrunk = []
+        for (x, y), carriers in parent.scs.items():
+            if not own and (x == move or y == move):
+                continue
+            nx, ny = node(x), node(y)
+            if nx == ny:
+                continue
+            key = (nx, ny) if nx < ny else (ny, nx)
+            known = self.scs.setdefault(key, [])
+            touches = merged in (nx, ny)
+            for carrier in carriers:
+                if carrier & bit or touches:
+                    if own:
+                        shrunk.append((nx, ny, carrier & ~bit))
+                    continue
+                if any(old & carrier == old for old in known) or not _make_room(known, carrier, self.max_sc):
+                    continue
+                known.append(carrier)
+        # 合并到新棋子组的 SC、以及载体去掉 move 后可能与其他 SC 不再相交的 SC，重新按 OR 规则加入
+        for x, y, carrier in shrunk:
+            self._add_sc(x, y, carrier)
+        # 父局面找到两边之间的 VC 后就停止了推导，未处理的连接在这里继续
+        for x, y, carrier in parent.queue:
+            if not own and (x == move or y == move or carrier & bit):
+                continue
+            nx, ny = node(x), node(y)
+            if nx != ny and (carrier & ~bit) in self.vcs.get(nx, {}).get(ny, ()):
+                self.queue.append((nx, ny, carrier & ~bit))
+        if own:
+            for n in board.neighbors[move]:
+                if cells[n] == EMPTY:
+                    self._add_vc(merged, n, 0)
+
+    def _add_vc(self, x: int, y: int, carrier: int, enqueue: bool = True) -> bool:
+        """加入一条 VC（已有子集载体时忽略，并删除被它包含的旧载体），enqueue 为 False 时不再参与组合"""
+        if x == y:
+            return False
+        known = self.vcs.setdefault(x, {}).get(y)
+        if known is None:
+            known = []
+            self.vcs[x][y] = known
+            self.vcs.setdefault(y, {})[x] = known
+        for old in known:
+            if old & carrier == old:
+                return False
+        known[:] = [old for old in known if old & carrier != carrier]
+        if not _make_room(known, carrier, self.max_vc):
+            return False
+        known.append(carrier)
+        if enqueue:
+            self.queue.append((x, y, carrier))
+        return True
+
+    def _add_sc(self, x: int, y: int, carrier: int):
+        """加入一条 SC，并尝试用 OR 规则与已有的 SC 合并为 VC"""
+        for old in self.vcs.get(x, {}).get(y, ()):
+            if old & carrier == old:
+                return
+        key = (x, y) if x < y else (y, x)
+        known = self.scs.setdefault(key, [])
+        for old in known:
+            if old & carrier == old:
+                return
+        if not _make_room(known, carrier, self.max_sc):
+            return
+        # OR：新 SC 与至多两条旧 SC 的载体交集为空时得到 VC
+        for i, first in enumerate(known):
+            self.budget -= 1
+            inter = carrier & first
+            if not inter:
+                self._add_vc(x, y, carrier | first)
+                continue
+            for second in known[i + 1:]:
+                if not inter & second:
+                    self._add_vc(x, y, carrier | first | second)
+        known.append(carrier)
+
+    def _run(self):
+        """处理新 VC 的队列，直到没有新连接或用完组合次数"""
+        groups = self.groups
+        edges = (self.edge1, self.edge2)
+        while self.queue:
+            if self.budget <= 0:
+                self.complete = False
+                break
+            if self.edge1 == self.edge2 or self.edge_vc() is not None:
+                break
+            x, y, carrier = self.queue.popleft()
+            for middle, end in ((y, x), (x, y)):
+                if middle in edges:
+                    continue
+                end_bit = 0 if end in groups else 1 << end
+                middle_bit = 0 if middle in groups else 1 << middle
+                links = [(other, c) for other, carriers in self.vcs[middle].items() for c in carriers]
+                for other, other_carrier in links:
+                    self.budget -= 1
+                    if other == end or carrier & other_carrier:
+                        continue
+                    other_bit = 0 if other in groups else 1 << other
+                    if other_bit & carrier or end_bit & other_carrier:
+                        continue
+                    if middle_bit:
+                        self._add_sc(end, other, carrier | other_carrier | middle_bit)
+                    else:
+                        self._add_vc(end, other, carrier | other_carrier)
+
+    def edge_vc(self) -> Optional[int]:
+        """两条边界之间的一条 VC 的载体，没有时返回 None"""
+        carriers = self.vcs.get(self.edge1, {}).get(self.edge2)
+        return carriers[0] if carriers else None
+
+    def edge_scs(self) -> List[int]:
+        """两条边界之间所有 SC 的载体"""
+        key = (self.edge1, self.edge2) if self.edge1 < self.edge2 else (self.edge2, self.edge1)
+        return self.scs.get(key, [])
+
+
+def carrier_size(carrier: int) -> int:
+    """载体中的格子数"""
+    return bin(carrier).count('1')
+
+
+def carrier_cells(carrier: int) -> List[int]:
+    """把载体位掩码展开为格子编号列表"""
+    cells = []
+    while carrier:
+        low = carrier & -carrier
+        cells.append(low.bit_length() - 1)
+        carrier ^= low
+    return cells
+
+
+class VCSolver:
+    """基于 H-search 的胜负证明与必应区域计算，按局面哈希缓存每一方的结果
+
+    缓存中有父局面（撤销最后一步）的结果时在其上增量计算，MCTS 沿树向下证明节点时通常都能命中父局面。
+    """
+
+    def __init__(self, capacity: int = 4096, budget: int = 200000):
+        """
+        Args:
+            capacity: 缓存的 H-search 结果数
+            budget: 每次 H-search 的组合次数上限
+        """
+        self.cache = TranspositionTable(capacity)
+        self.budget = budget
+
+    def hsearch(self, board, color: str) -> HSearch:
+        """获取（或计算并缓存）一方在当前局面的 H-search 结果"""
+        key = position_key(board, color)
+        result = self.cache.get(key)
+        if result is None:
+            parent = None
+            if board.moves:
+                last = board.moves[-1]
+                parent = self.cache.get(key ^ board.zobrist[last * 3 + board.cells[last]])
+            if parent is not None and parent.complete:
+                result = HSearch(board, color, budget=self.budget, parent=parent, move=last)
+            else:
+                result = HSearch(board, color, budget=self.budget)
+            self.cache.put(key, result)
+        return result
+
+    def winner(self, board, to_move: str) -> Optional[str]:
+        """
+        证明局面的胜负
+        Args:
+            board: 棋盘
+            to_move: 行棋方
+        Returns:
+            Optional[str]: 行棋方两边之间有 VC 或 SC、或对方两边之间有 VC 时返回获胜方，否则 None
+        """
+        winner = board.check_winner()
+        if winner is not None:
+            return winner
+        opponent = 'B' if to_move == 'R' else 'R'
+        mine = self.hsearch(board, to_move)
+        if mine.edge_vc() is not None or mine.edge_scs():
+            return to_move
+        if self.hsearch(board, opponent).edge_vc() is not None:
+            return opponent
+        return None
+
+    def winning_move(self, board, to_move: str) -> Optional[Tuple[int, int]]:
+        """
+        行棋方已被证明获胜时给出一步保持胜势的着法（SC 的关键点，或 VC 载体中的一格）
+        Returns:
+            Optional[Tuple[int, int]]: 着法，未被证明获胜时返回 None
+        """
+        mine = self.hsearch(board, to_move)
+        coords = coord_table(board.size)
+        carrier = mine.edge_vc()
+        if carrier is None:
+            scs = mine.edge_scs()
+            if not scs:
+                return None
+            # SC 的关键点在载体中，逐格试下找出落子后成为 VC 的一格
+            carrier = scs[0]
+        cells = carrier_cells(carrier)
+        if not cells:
+            return None
+        return coords[cells[0]] if len(cells) == 1 else self._key_cell(board, to_move, cells)
+
+    def _key_cell(self, board, to_move: str, cells: List[int]) -> Tuple[int, int]:
+        """在载体中找一格，落下后仍然保持两边之间的 VC"""
+        coords = coord_table(board.size)
+        for idx in cells:
+            row, col = coords[idx]
+            token = board.place_stone(row, col, to_move)
+            try:
+                if board.check_winner() == to_move or self.hsearch(board, to_move).edge_vc() is not None:
+                    return row, col
+            finally:
+                board.undo(token)
+        return coords[cells[0]]
+
+    def must_play(self, board, to_move: str) -> Optional[Set[int]]:
+        """
+        对方威胁连通时行棋方必须应对的区域：对方两边之间所有 SC（含 VC）载体的交集
+        Returns:
+            Optional[Set[int]]: 格子编号集合；对方没有威胁时返回 None，已被证明失败时返回空集合
+        """
+        opponent = 'B' if to_move == 'R' else 'R'
+        theirs = self.hsearch(board, opponent)
+        if theirs.edge_vc() is not None:
+            return set()
+        scs = theirs.edge_scs()
+        if not scs:
+            return None
+        region = scs[0]
+        for carrier in scs[1:]:
+            region &= carrier
+        return set(carrier_cells(region))
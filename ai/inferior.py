@@ -0,0 +1,159 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.board import EMPTY, RED, BLUE, coord_table
+from .policy import ring_table, neighbor_code, decode_pattern
+
+# 按棋盘大小缓存的半径2邻域表
+_REGION_TABLES = {}
+
+
+def region_table(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """获取每个格子距离不超过2的格子编号（含自身）。
+    劣势格的判定只依赖该格与其邻居的邻域，因此落子只影响这一范围内格子的结论"""
+    table = _REGION_TABLES.get(size)
+    if table is None:
+        ring = ring_table(size)
+        rows = []
+        for idx in range(size * size):
+            cells = {idx}
+            for nid in ring[idx]:
+                if nid >= 0:
+                    cells.add(nid)
+                    cells.update(n for n in ring[nid] if n >= 0)
+            rows.append(tuple(sorted(cells)))
+        table = tuple(rows)
+        _REGION_TABLES[size] = table
+    return table
+
+
+def _irrelevant_table(mover: int) -> bytes:
+    """生成“无关格”查找表：下标为格子的邻域编码，取值为1表示 mover 的任何最短连接都不需要经过该格。
+    判据：任意两个不相邻、且都不是对方棋子的邻居之间，总有一侧环上的格子全是 mover 的棋子（或边界），
+    经过该格的连接都可以绕行"""
+    opponent = BLUE if mover == RED else RED
+    table = bytearray(3 ** 6)
+    for code in range(3 ** 6):
+        values = decode_pattern(code)
+        irrelevant = True
+        for a in range(6):
+            for gap in (2, 3):
+                b = (a + gap) % 6
+                if values[a] == opponent or values[b] == opponent:
+                    continue
+                inner = [values[(a + k) % 6] for k in range(1, gap)]
+                outer = [values[(b + k) % 6] for k in range(1, 6 - gap)]
+                if not all(v == mover for v in inner) and not all(v == mover for v in outer):
+                    irrelevant = False
+                    break
+            if not irrelevant:
+                break
+        table[code] = irrelevant
+    return bytes(table)
+
+
+# 按颜色编码索引的无关格表；对双方都无关的格子是死格
+IRRELEVANT = {RED: _irrelevant_table(RED), BLUE: _irrelevant_table(BLUE)}
+DEAD = bytes(r & b for r, b in zip(IRRELEVANT[RED], IRRELEVANT[BLUE]))
+
+
+def _classify(cells, ring, idx: int, codes: Dict[int, int]) -> Optional[int]:
+    """判定单个空格：死格返回 EMPTY，被某方吃住返回吃住方的颜色编码，否则返回 None
+    Args:
+        cells: 棋盘的一维字节数组
+        ring: 环形邻接表
+        idx: 空格编号
+        codes: 邻域编码缓存（就地填充）
+    """
+    code = codes.get(idx)
+    if code is None:
+        code = codes[idx] = neighbor_code(cells, ring[idx])
+    if DEAD[code]:
+        return EMPTY
+    for captor, opponent in ((RED, BLUE), (BLUE, RED)):
+        # 对方永远用不到的格子可以直接由吃住方填上
+        if IRRELEVANT[opponent][code]:
+            return captor
+    # 相邻两个空格：对方下其中一个、吃住方应另一个后，对方的棋子变成无关子，则两格都被吃住
+    for k, nid in enumerate(ring[idx]):
+        if nid < 0 or cells[nid] != EMPTY:
+            continue
+        other = codes.get(nid)
+        if other is None:
+            other = codes[nid] = neighbor_code(cells, ring[nid])
+        back = (k + 3) % 6
+        for captor, opponent in ((RED, BLUE), (BLUE, RED)):
+            if (IRRELEVANT[opponent][code + captor * 3 ** k]
+                    and IRRELEVANT[opponent][other + captor * 3 ** back]):
+                return captor
+    return None
+
+
+def analyze(board, cells_to_check=None) -> Tuple[Set[int], Dict[int, int]]:
+    """劣势格分析
+    Args:
+        board: 当前棋盘（core.board.Board）
+        cells_to_check: 只判定这些格子（一维编号），默认判定全部空格
+    Returns:
+        Tuple[Set[int], Dict[int, int]]: (死格集合, {被吃住的格子: 吃住方的颜色编码})
+    """
+    cells = board.cells
+    ring = ring_table(board.size)
+    if cells_to_check is None:
+        cells_to_check = range(len(cells))
+    dead = set()
+    captured = {}
+    codes = {}
+    for idx in cells_to_check:
+        if cells[idx] != EMPTY:
+            continue
+        status = _classify(cells, ring, idx, codes)
+        if status == EMPTY:
+            dead.add(idx)
+        elif status is not None:
+            captured[idx] = status
+    return dead, captured
+
+
+def update(board, dead: Set[int], captured: Dict[int, int], last: int) -> Tuple[Set[int], Dict[int, int]]:
+    """在父局面的分析结果上增量更新：只重新判定最后一步周围半径2内的格子
+    Args:
+        board: 落子后的棋盘
+        dead: 父局面的死格集合
+        captured: 父局面的被吃住格子
+        last: 最后一步的一维编号
+    Returns:
+        Tuple[Set[int], Dict[int, int]]: 新局面的 (死格集合, 被吃住的格子)
+    """
+    region = region_table(board.size)[last]
+    local_dead, local_captured = analyze(board, region)
+    dead = {idx for idx in dead if idx not in region}
+    dead |= local_dead
+    captured = {idx: code for idx, code in captured.items() if idx not in region}
+    captured.update(local_captured)
+    return dead, captured
+
+
+def candidate_actions(board, dead: Set[int], captured: Dict[int, int]) -> List[Tuple[int, int]]:
+    """去掉死格与被吃住格子后的候选动作；全部被剪掉时返回所有空位
+    Returns:
+        List[Tuple[int, int]]: 候选动作列表
+    """
+    size = board.size
+    pruned = dead.union(captured)
+    actions = [action for action in board.available if action[0] * size + action[1] not in pruned]
+    return actions or list(board.available)
+
+
+def fill_captured(board, captured: Dict[int, int]) -> int:
+    """把被吃住的格子填上吃住方的棋子（不改变胜负），用于模拟前的预填
+    Returns:
+        int: 第一手预填的撤销令牌，没有预填时为 0
+    """
+    coords = coord_table(board.size)
+    first_token = 0
+    for idx, code in captured.items():
+        row, col = coords[idx]
+        token = board.place_stone(row, col, 'R' if code == RED else 'B')
+        if not first_token:
+            first_token = token
+    return first_token
@@ -1,17 +1,50 @@
 import random
 import time
 import math
-import copy
 import logging
 import sys
 from typing import Tuple, List, Optional
 
+import numpy as np
+
+from core.board import coord_table
+from .playout import fill_playouts
+from .hsearch import VCSolver
+from .inferior import analyze, update, candidate_actions, fill_captured
+from .network import encode
+from .policy import RANDOM_POLICY, center_region
+from .resistance import evaluate
+from .time_manager import EarlyStop, EARLY_STOP_INTERVAL
+from .transposition import TranspositionTable, position_key
+
 # 为MCTS类设置日志编码
 if not logging.getLogger().handlers:
     logging.basicConfig(encoding='utf-8')  # 确保日志使用UTF-8编码
 
+
+def most_visited(stats):
+    """
+    根节点统计中最终选择的动作：访问次数最多的动作，次数相同时取平均奖励较高者。
+    各引擎、进度回调与调度器合并的统计都按这一规则选择
+    Args:
+        stats: {动作: (访问次数, AI视角的累计奖励)}
+    Returns:
+        Tuple: (动作, 平均奖励)，没有被访问过的动作时为 (None, 0.5)
+    """
+    best = max(((action, n, q) for action, (n, q) in stats.items() if n > 0),
+               key=lambda item: (item[1], item[2] / item[1]), default=None)
+    if best is None:
+        return None, 0.5
+    action, n, q = best
+    return action, q / n
+
+
 class MCTS:
-    def __init__(self, hex, color, ai_color, parent=None, action=None):
+    def __init__(self, hex, color, ai_color, parent=None, action=None, playout_batch=0, tt_size=0,
+                 rave_k=0.0, rave_schedule='sqrt', policy=None, prune_inferior=False,
+                 vc_solve=False, solve_visits=32, prior_bias=0.0, widen=0,
+                 network=None, puct_batch=16, c_puct=1.5, c=1.5,
+                 center_bias=None, warm_up=5):
         """
         初始化MCTS节点
         Args:
@@ -20,8 +53,29 @@ class MCTS:
             ai_color: AI的颜色
             parent: 父节点
             action: 到达该节点的动作
+            playout_batch: 每个叶节点批量模拟的对局数，0表示逐步模拟单局（子节点继承根节点设置）
+            tt_size: 置换表容量，大于0时相同局面共用同一节点，搜索树变为有向无环图
+            rave_k: RAVE等价参数，大于0时在选择中混合AMAF统计（仅逐步模拟时收集）
+            rave_schedule: AMAF权重随访问次数衰减的方式，'sqrt' 为 sqrt(k/(3N+k))，
+                           'mse' 为 n'/(N+n'+N*n'/k)（n' 为AMAF次数）
+            policy: 逐步模拟的落子策略（见 ai.policy），默认为中心偏好的随机策略
+            prune_inferior: 是否剪掉死格与被吃住的格子（见 ai.inferior），模拟前预填被吃住的格子
+            vc_solve: 是否用虚连接（见 ai.hsearch）证明节点胜负并限制必应区域
+            solve_visits: 节点被访问多少次后做一次虚连接分析
+            prior_bias: 渐进偏置的权重，大于0时按电阻电路中流过各格的电流给走法先验，
+                        UCT分数加上 prior_bias * 先验 / (访问次数 + 1)
+            widen: 渐进展开的初始宽度，大于0时节点只展开先验最高的走法，
+                   允许的子节点数为 widen + floor(sqrt(迭代次数))
+            network: 策略/价值网络（ai.network.HexNet），设置后改用PUCT搜索，叶节点由网络批量评估
+            puct_batch: PUCT模式下每批评估的叶节点数
+            c_puct: PUCT公式中的探索参数
+            c: UCT公式中的探索参数
+            center_bias: 覆盖模拟策略在中心区域落子的概率，None 表示使用策略自身的设置（0.5）
+            warm_up: 主循环之前先扩展的靠近中心的走法数
         """
-        self.hex = copy.deepcopy(hex)  # 当前棋盘状态
+        # 根节点持有棋盘的独立副本；子节点与根节点共享同一块棋盘，
+        # 搜索时沿选择路径落子，每次迭代结束后撤销回根局面
+        self.hex = hex.copy() if parent is None else parent.hex
         self.color = color    # 当前节点的玩家颜色
         self.ai_color = ai_color  # AI的颜色
         self.parent = parent    # 父节点
@@ -29,41 +83,92 @@ class MCTS:
         self.children = {}      # 子节点字典 {动作: 子节点}
         self.N = 0  # 访问次数
         self.Q = 0  # 累计奖励
+        self.amaf = {}  # AMAF统计 {一维格子编号: [次数, AI视角的累计奖励]}
+        if parent is None:
+            self.playout_batch = playout_batch
+            self.rng = np.random.default_rng() if playout_batch else None
+            self.tt = TranspositionTable(tt_size) if tt_size else None
+            self.rave_k = rave_k if not playout_batch else 0.0
+            self.rave_schedule = rave_schedule
+            self.policy = policy or RANDOM_POLICY
+            if center_bias is not None:
+                self.policy = self.policy.with_center_bias(center_bias)
+            self.prune_inferior = prune_inferior
+            self.solver = VCSolver() if vc_solve else None
+            self.solve_visits = solve_visits
+            self.prior_bias = prior_bias
+            self.widen = widen
+            self.network = network
+            self.puct_batch = puct_batch
+            self.c_puct = c_puct
+            self.c = c
+            self.warm_up = warm_up
+        else:
+            self.playout_batch = parent.playout_batch
+            self.rng = parent.rng
+            self.tt = parent.tt
+            self.rave_k = parent.rave_k
+            self.rave_schedule = parent.rave_schedule
+            self.policy = parent.policy
+            self.prune_inferior = parent.prune_inferior
+            self.solver = parent.solver
+            self.solve_visits = parent.solve_visits
+            self.prior_bias = parent.prior_bias
+            self.widen = parent.widen
+            self.network = parent.network
+            self.puct_batch = parent.puct_batch
+            self.c_puct = parent.c_puct
+            self.c = parent.c
+            self.warm_up = parent.warm_up
+        self.prior = None  # 走法先验 {动作: 相对电流（最大为1）或网络的策略概率}，首次扩展/评估时计算
+        self.proven = None  # 被虚连接证明的获胜方
+        self.solved = False  # 是否已做过虚连接分析
+        if self.tt is not None:
+            self.tt.put(position_key(self.hex, color), self)
         
-        # 获取当前可用的动作
-        self.untried_actions = list(self.hex.available)
-        
-        # 如果棋盘中间位置可用，则增加权重
-        center = self.hex.size // 2
-        center_region = [(r, c) for r in range(center-1, center+2) for c in range(center-1, center+2)]
+        # 获取当前可用的动作，开启剪枝时去掉死格与被吃住的格子
+        if self.prune_inferior:
+            if parent is None:
+                self.dead, self.captured = analyze(self.hex)
+            else:
+                self.dead, self.captured = update(self.hex, parent.dead, parent.captured, self.hex.moves[-1])
+            self.untried_actions = candidate_actions(self.hex, self.dead, self.captured)
+        else:
+            self.dead, self.captured = set(), {}
+            self.untried_actions = list(self.hex.available)
         
-        self.prioritized_actions = []
         # 优先选择靠近中心的位置
-        for action in self.untried_actions:
-            if action in center_region:
-                self.prioritized_actions.append(action)
+        self.prioritized_actions = [action for action in center_region(self.hex.size)
+                                    if action in self.untried_actions]
         
         if parent is None:  # 根节点记录详细日志
             logging.info(f"MCTS初始化 - 当前颜色:{color}, AI颜色:{ai_color}, 可用动作数量:{len(self.untried_actions)}")
     
-    def select(self, c=1.5):
+    def select(self, c=1.5, path=None):
         """
-        选择一个子节点进行扩展
+        选择一个子节点进行扩展，沿途在共享棋盘上落子
         Args:
             c: UCT公式中的探索参数
+            path: 可选的列表，依次记录经过的节点（置换表使节点可能有多个父节点，回传需沿实际路径）
         Returns:
             MCTS: 选中的节点，以及是否需要扩展新节点
         """
         node = self
+        if path is not None:
+            path.append(node)
 
-        # 终止节点
-        if node.hex.check_winner() is not None:
+        # 访问次数达到 solve_visits 时做一次虚连接证明（需要共享棋盘处于本节点的局面）
+        node.try_solve(path)
+
+        # 终止节点（含已被证明胜负的节点）
+        if node.proven is not None or node.hex.check_winner() is not None:
             if self.parent is None:  # 只在根节点记录
                 logging.info(f"选择阶段 - 到达终止节点，赢家: {node.hex.check_winner()}")
             return node, False
         
-        # 存在未尝试的动作
-        if node.untried_actions:
+        # 存在未尝试的动作（渐进展开时子节点数还未达到上限，批量模拟时按迭代次数计算上限）
+        if node.untried_actions and (not node.widen or len(node.children) <
+                                     node.widen + math.isqrt(node.N // (node.playout_batch or 1))):
             if self.parent is None:  # 只在根节点记录
                 logging.info(f"选择阶段 - 节点有未尝试动作，数量: {len(node.untried_actions)}")
             return node, True
@@ -72,85 +177,193 @@ class MCTS:
         best_score = float('-inf')
         best_child = None
         
+        best_action = None
+        amaf = node.amaf if node.rave_k else None
+        prior = node.prior if node.prior_bias else None
+        size = node.hex.size
+        # Q 与 AMAF 均为AI视角，对手行棋的节点取反，使双方都选择对自己最有利的子节点
+        sign = 1.0 if node.color == node.ai_color else -1.0
+        
         for action, child in node.children.items():
             if child.N == 0:
+                node.hex.place_stone(action[0], action[1], node.color)
+                if path is not None:
+                    path.append(child)
                 return child, False
             
-            # 计算UCT分数（从AI视角）
+            # 计算UCT分数（从本节点行棋方的视角），开启RAVE时按权重混合AMAF均值
             exploit = child.Q / child.N
+            if amaf:
+                entry = amaf.get(action[0] * size + action[1])
+                if entry:
+                    beta = node.rave_beta(child.N, entry[0])
+                    exploit = (1 - beta) * exploit + beta * entry[1] / entry[0]
+            exploit *= sign
             explore = c * math.sqrt(math.log(node.N) / child.N)
             score = exploit + explore
+            if prior:
+                score += node.prior_bias * prior.get(action, 0.0) / (child.N + 1)
             
             if score > best_score:
                 best_score = score
                 best_child = child
+                best_action = action
         
         if best_child is None:
             return node, False
             
+        row, col = best_action
         if self.parent is None:  # 只在根节点记录
-            row, col = best_child.action
             logging.info(f"选择阶段 - 选择最佳子节点，动作:({row},{col})，UCT分数:{best_score:.4f}")
-            
-        return best_child.select(c)
+        
+        # 在共享棋盘上走到子节点的局面（共用节点的 action 属性未必是本节点到它的动作）
+        node.hex.place_stone(row, col, node.color)
+        return best_child.select(c, path)
+    
+    def try_solve(self, path=None):
+        """
+        访问次数首次达到 solve_visits 时调用 solve()（每个节点只做一次）
+        Args:
+            path: 从根到本节点经过的节点；本节点的行棋方获胜时同时证明了父节点（父节点的行棋方走这一步即可）
+        """
+        if self.solver is None or self.solved or self.proven is not None or self.N < self.solve_visits:
+            return
+        self.solved = True
+        if self.solve() is not None and path is not None and len(path) > 1 and path[-2].color == self.proven:
+            path[-2].proven = self.proven
+
+    def solve(self):
+        """
+        用虚连接证明本节点的胜负；未能证明但对方威胁连通时，把候选动作限制在必应区域内
+        Returns:
+            Optional[str]: 被证明的获胜方，未能证明时返回 None
+        """
+        winner = self.solver.winner(self.hex, self.color)
+        if winner is not None:
+            self.proven = winner
+            return winner
+        region = self.solver.must_play(self.hex, self.color)
+        if region:
+            size = self.hex.size
+            untried = [action for action in self.untried_actions if action[0] * size + action[1] in region]
+            children = {action: child for action, child in self.children.items()
+                        if action[0] * size + action[1] in region}
+            if untried or children:
+                self.untried_actions = untried
+                self.prioritized_actions = [action for action in self.prioritized_actions if action in untried]
+                self.children = children
+        return None
+    
+    def ensure_prior(self):
+        """
+        计算走法先验（需要共享棋盘处于本节点的局面）：一次向量化的电路求解得到双方电路中流过
+        每个空格的电流，未尝试的动作按电流从大到小排列
+        """
+        if self.prior is not None:
+            return
+        _, currents = evaluate(self.hex, self.color)
+        size = self.hex.size
+        top = float(currents.max()) or 1.0
+        self.prior = {action: float(currents[action[0] * size + action[1]]) / top
+                      for action in self.hex.available}
+        self.untried_actions.sort(key=lambda action: -self.prior[action])
+    
+    def rave_beta(self, n, amaf_n):
+        """
+        计算AMAF统计在选择中的权重
+        Args:
+            n: 子节点的真实访问次数
+            amaf_n: 对应动作的AMAF次数
+        Returns:
+            float: 介于0和1之间的权重
+        """
+        k = self.rave_k
+        if self.rave_schedule == 'mse':
+            return amaf_n / (n + amaf_n + n * amaf_n / k)
+        return math.sqrt(k / (3 * n + k))
+    
+    def best_amaf_action(self):
+        """
+        在未尝试的动作中选出AMAF均值最高的一个（没有AMAF统计的动作按0计）
+        Returns:
+            Tuple[int, int]: 动作
+        """
+        size = self.hex.size
+        best_action = None
+        best_value = float('-inf')
+        for action in self.untried_actions:
+            entry = self.amaf.get(action[0] * size + action[1])
+            value = entry[1] / entry[0] if entry else 0.0
+            if value > best_value:
+                best_value = value
+                best_action = action
+        return best_action
     
     def expand(self, action):
         """
-        扩展当前节点
+        扩展当前节点（在共享棋盘上落子，由 search 在迭代结束时撤销）
         Args:
             action: 选择的动作
         Returns:
-            MCTS: 新创建的子节点
+            MCTS: 新创建的子节点（置换表中已有相同局面时为该局面的节点）
         """
         # 创建新的棋盘状态
         next_color = 'B' if self.color == 'R' else 'R'
         row, col = action
         self.hex.place_stone(row, col, self.color)
         
-        # 创建子节点
-        child = MCTS(copy.deepcopy(self.hex), next_color, self.ai_color, self, action)
+        # 创建子节点，相同局面已在置换表中时直接共用
+        child = None
+        if self.tt is not None:
+            child = self.tt.get(position_key(self.hex, next_color))
+        if child is None:
+            child = MCTS(self.hex, next_color, self.ai_color, self, action)
         self.children[action] = child
         
         if action in self.untried_actions:
             self.untried_actions.remove(action)
+        if action in self.prioritized_actions:
+            self.prioritized_actions.remove(action)
         
         if self.parent is None:  # 只在根节点记录
             logging.info(f"扩展阶段 - 在位置({row},{col})扩展新节点，当前颜色:{self.color}，下一颜色:{next_color}")
             
         return child
     
-    def simulate(self):
+    def simulate(self, moves=None):
         """
-        模拟游戏直到终局
+        模拟游戏直到终局（在共享棋盘上落子，结束后撤销）
+        Args:
+            moves: 可选的列表，按顺序追加模拟中落子的一维格子编号（供AMAF统计）
         Returns:
             float: 模拟结果的奖励值
         """
-        state = copy.deepcopy(self.hex)
+        state = self.hex
+        choose = self.policy.choose
         cur_color = self.color
+        last = state.moves[-1] if state.moves else None
         moves_count = 0
+        # 被吃住的格子先填上吃住方的棋子，不计入AMAF序列
+        first_token = fill_captured(state, self.captured) if self.captured else 0
+        play_from = state.move_count
         
         while state.check_winner() is None:
-            actions = list(state.available)
-            if not actions:
+            if not state.available:
                 break
-                
-            # 使用启发式选择：优先选择靠近中心的位置
-            center = state.size // 2
-            center_region = [(r, c) for r in range(center-1, center+2) for c in range(center-1, center+2)]
-            
-            prioritized_actions = [action for action in actions if action in center_region]
-            
-            if prioritized_actions and random.random() < 0.5:  # 50%的概率选择中心区域
-                action = random.choice(prioritized_actions)
-            else:
-                action = random.choice(actions)
-                
-            state.place_stone(action[0], action[1], cur_color)
+            action = choose(state, cur_color, last)
+            token = state.place_stone(action[0], action[1], cur_color)
+            if not first_token:
+                first_token = token
+            last = state.moves[-1]
             cur_color = 'B' if cur_color == 'R' else 'R'
             moves_count += 1
         
         # 从AI视角计算奖励
         winner = state.check_winner()
+        if first_token:
+            if moves is not None:
+                moves.extend(state.moves[play_from:])
+            state.undo(first_token)
         reward = 0.0
         
         if winner == self.ai_color:
@@ -163,35 +376,290 @@ class MCTS:
             
         return reward
     
-    def backpropagate(self, reward):
+    def simulate_batch(self):
+        """
+        批量模拟：一次随机填满 playout_batch 盘终局并向量化判定胜负
+        Returns:
+            Tuple[float, int]: (累计奖励, 模拟次数)
+        """
+        state = self.hex
+        count = self.playout_batch
+        token = fill_captured(state, self.captured) if self.captured else 0
+        winner = state.check_winner()
+        if winner is None:
+            red_wins = int(np.count_nonzero(fill_playouts(state, self.color, count, self.rng)))
+        else:
+            red_wins = count if winner == 'R' else 0
+        if token:
+            state.undo(token)
+        ai_wins = red_wins if self.ai_color == 'R' else count - red_wins
+        return float(2 * ai_wins - count), count
+    
+    def backpropagate(self, reward, visits=1, path=None):
         """
         反向传播更新节点统计信息
         Args:
-            reward: 模拟获得的奖励
+            reward: 模拟获得的奖励（批量模拟时为奖励之和）
+            visits: 本次回传的模拟次数
+            path: 从根到本节点经过的节点；为 None 时沿父节点回传
         """
-        node = self
+        nodes = reversed(path) if path is not None else None
+        node = next(nodes) if nodes is not None else self
         while node:
             old_n = node.N
             old_q = node.Q
-            node.N += 1
+            node.N += visits
             node.Q += reward
             
             if node.parent is None:  # 只在根节点记录，每100次更新记录一次
-                if node.N % 100 == 0:
+                if node.N // 100 != old_n // 100:
                     logging.info(f"反向传播 - 根节点更新: N:{old_n}->{node.N}, Q:{old_q:.2f}->{node.Q:.2f}, 平均值:{node.Q/node.N:.4f}")
             
-            node = node.parent
+            node = next(nodes, None) if nodes is not None else node.parent
+
+    def _playout(self, node, path):
+        """
+        对节点执行模拟并沿路径回传结果
+        Args:
+            node: 待模拟的节点
+            path: 从根到该节点经过的节点
+        Returns:
+            int: 本次执行的模拟次数
+        """
+        node.try_solve(path)
+        if node.proven is not None:
+            count = self.playout_batch or 1
+            reward = (1.0 if node.proven == self.ai_color else -1.0) * count
+        elif self.playout_batch:
+            reward, count = node.simulate_batch()
+        elif self.rave_k:
+            # 从根到叶的路径落子与模拟落子合成一条序列，按层交替属于双方
+            moves = self.hex.moves[len(self.hex.moves) - (len(path) - 1):]
+            reward, count = node.simulate(moves), 1
+            self._update_amaf(path, moves, reward)
+        else:
+            reward, count = node.simulate(), 1
+        node.backpropagate(reward, count, path)
+        return count
 
-    def search(self, time_limit=5.0):
+    def _update_amaf(self, path, moves, reward):
+        """
+        更新路径上各节点的AMAF统计：节点的行棋方在此后任意时刻下过的格子都计入
+        Args:
+            path: 从根到叶经过的节点
+            moves: 从根局面开始依次落子的一维格子编号
+            reward: 本次模拟的奖励（AI视角）
+        """
+        for depth, node in enumerate(path):
+            amaf = node.amaf
+            for cell in moves[depth::2]:
+                entry = amaf.get(cell)
+                if entry is None:
+                    amaf[cell] = [1, reward]
+                else:
+                    entry[0] += 1
+                    entry[1] += reward
+
+    def _puct_action(self):
+        """
+        按PUCT分数选择动作（从本节点行棋方的视角）：Q + c_puct * P * sqrt(N) / (1 + n)
+        Returns:
+            Optional[Tuple[int, int]]: 动作，没有合法动作时返回 None
+        """
+        sign = 1.0 if self.color == self.ai_color else -1.0
+        scale = self.c_puct * math.sqrt(max(self.N, 1))
+        best_action = None
+        best_score = float('-inf')
+        for action, p in self.prior.items():
+            child = self.children.get(action)
+            if child is not None and child.N:
+                score = sign * child.Q / child.N + scale * p / (1 + child.N)
+            else:
+                score = scale * p
+            if score > best_score:
+                best_score = score
+                best_action = action
+        return best_action
+
+    def _select_puct(self, path):
+        """
+        沿PUCT分数下降到未评估的叶节点，沿途在共享棋盘上落子，并对经过的子节点施加虚拟损失
+        （记一次访问和一次对选择它的一方的失败），使同一批次中的下降分散到不同的变化上
+        Args:
+            path: 列表，依次记录经过的节点
+        Returns:
+            MCTS: 未评估的叶节点或终止节点
+        """
+        node = self
+        path.append(node)
+        while node.prior is not None and node.proven is None and node.hex.check_winner() is None:
+            action = node._puct_action()
+            if action is None:
+                break
+            child = node.children.get(action)
+            if child is None:
+                child = node.expand(action)
+            else:
+                node.hex.place_stone(action[0], action[1], node.color)
+            child.N += 1
+            child.Q += -1.0 if node.color == self.ai_color else 1.0
+            path.append(child)
+            node = child
+        return node
+
+    def _revert_virtual_loss(self, path):
+        """撤销 _select_puct 在路径上施加的虚拟损失"""
+        for parent, child in zip(path, path[1:]):
+            child.N -= 1
+            child.Q -= -1.0 if parent.color == self.ai_color else 1.0
+
+    def _search_puct(self, start_time, time_limit, stop_event, root_token, max_simulations=None, progress=None,
+                     early_stop=None):
+        """
+        PUCT搜索：每批选出 puct_batch 个不同的叶节点，一次矩阵运算评估后回传网络给出的价值。
+        根节点尚未评估时先单独评估一次；同一批次中再次选到已在批次中的叶节点时撤销这次下降，
+        不重复评估（虚拟损失通常会让下降分散开，重复只在候选很少时出现）
+        Returns:
+            int: 评估的叶节点数
+        """
+        count = 0
+        if self.prior is None and self.proven is None and self.hex.check_winner() is None:
+            self._evaluate_puct([self._puct_input([self])])
+            count += 1
+        while time.time() - start_time < time_limit:
+            if stop_event is not None and stop_event.is_set():
+                logging.info(f"搜索被取消 - 已评估{count}个叶节点")
+                break
+            if max_simulations is not None and count >= max_simulations:
+                break
+            batch = []
+            pending = set()
+            for _ in range(self.puct_batch):
+                path = []
+                leaf = self._select_puct(path)
+                winner = leaf.proven or leaf.hex.check_winner()
+                if winner is not None:
+                    # 终止节点直接回传真实结果
+                    self._revert_virtual_loss(path)
+                    leaf.backpropagate(1.0 if winner == self.ai_color else -1.0, 1, path)
+                    count += 1
+                elif id(leaf) in pending:
+                    self._revert_virtual_loss(path)
+                else:
+                    pending.add(id(leaf))
+                    batch.append(self._puct_input(path))
+                self.hex.undo(root_token)
+            if not batch:
+                continue
+            self._evaluate_puct(batch)
+            count += len(batch)
+            if early_stop is not None and count // EARLY_STOP_INTERVAL != (count - len(batch)) // EARLY_STOP_INTERVAL:
+                if self._check_early_stop(early_stop, count, time.time() - start_time):
+                    break
+            # 每500次评估记录一次进度
+            if count // 500 != (count - len(batch)) // 500:
+                elapsed = time.time() - start_time
+                logging.info(f"搜索进度 - 已评估{count}个叶节点，用时:{elapsed:.2f}秒，平均:{count/elapsed:.1f}个/秒")
+                if progress is not None:
+                    progress(self.progress_info(count, elapsed))
+        return count
+
+    def _puct_input(self, path):
+        """
+        网络的输入（需要共享棋盘处于叶节点的局面）
+        Args:
+            path: 从根到叶节点经过的节点
+        Returns:
+            Tuple: (路径, 编码后的局面, 合法动作掩码)
+        """
+        leaf = path[-1]
+        size = self.hex.size
+        legal = np.zeros(size * size, dtype=bool)
+        for row, col in list(leaf.untried_actions) + list(leaf.children):
+            legal[row * size + col] = True
+        return path, encode(leaf.hex, leaf.color), legal
+
+    def _evaluate_puct(self, batch):
+        """一次评估一批叶节点：写入策略先验，撤销虚拟损失并回传价值"""
+        probs, values = self.network.evaluate(np.stack([item[1] for item in batch]),
+                                              np.stack([item[2] for item in batch]))
+        coords = coord_table(self.hex.size)
+        for (path, _, legal), p, v in zip(batch, probs, values):
+            leaf = path[-1]
+            leaf.prior = {coords[idx]: float(p[idx]) for idx in np.flatnonzero(legal)}
+            self._revert_virtual_loss(path)
+            reward = float(v) if leaf.color == self.ai_color else -float(v)
+            leaf.backpropagate(reward, 1, path)
+
+    def _check_early_stop(self, early_stop, simulations, elapsed):
+        """
+        检查是否可以提前结束搜索（见 ai.time_manager.EarlyStop）
+        Returns:
+            bool: 是否结束
+        """
+        reason = early_stop.check(self.root_stats(), simulations, elapsed)
+        if reason:
+            logging.info(f"提前结束搜索（{reason}）- 已完成{simulations}次模拟，用时:{elapsed:.2f}秒/{early_stop.time_limit:.2f}秒")
+        return reason is not None
+
+    def progress_info(self, simulations, elapsed):
+        """
+        搜索进度的摘要（供进度回调使用）
+        Args:
+            simulations: 已完成的模拟次数
+            elapsed: 已用时间（秒）
+        Returns:
+            Dict: simulations、elapsed、best_move（访问次数最多的动作）与 win_rate（该动作的平均奖励，AI视角）
+        """
+        info = {'simulations': simulations, 'elapsed': round(elapsed, 3), 'best_move': None, 'win_rate': None}
+        best_action, ratio = most_visited(self.root_stats())
+        if best_action is not None:
+            info['best_move'] = best_action
+            info['win_rate'] = round(ratio, 4)
+        return info
+
+    def advance(self, action):
+        """
+        把对应动作的子节点提升为新的根节点，丢弃树的其余部分
+        Args:
+            action: 实际走出的动作
+        Returns:
+            Optional[MCTS]: 新的根节点，子节点不存在或未被访问过时返回 None
+        """
+        child = self.children.get(action)
+        if child is None or child.N == 0:
+            return None
+        # 子树与根共享同一块棋盘，在其上落子即得到新根的局面
+        self.hex.place_stone(action[0], action[1], self.color)
+        child.parent = None
+        self.children = {}
+        logging.info(f"复用子树 - 动作:{action}，继承访问次数:{child.N}")
+        return child
+
+    def root_stats(self):
+        """
+        获取根节点各子节点的统计信息
+        Returns:
+            Dict[Tuple[int, int], Tuple[int, float]]: {动作: (访问次数, AI视角的累计奖励)}
+        """
+        return {action: (child.N, child.Q) for action, child in self.children.items() if child.N > 0}
+
+    def search(self, time_limit=5.0, stop_event=None, max_simulations=None, progress=None, early_stop=False):
         """
         执行MCTS搜索，找到最佳动作
         Args:
             time_limit: 搜索时间限制（秒）
+            stop_event: 可选的 threading.Event，被置位时提前结束搜索（用于后台思考的取消）
+            max_simulations: 可选的模拟次数上限，达到后提前结束搜索（用于固定计算量的测量）
+            progress: 可选的回调函数，每500次模拟及搜索结束时以 progress_info() 的结果调用一次
+            early_stop: 最佳动作在剩余时间内无法被超过或访问占比已稳定时提前结束（见 ai.time_manager.EarlyStop）
         Returns:
             Tuple: (最佳动作, 胜率, 模拟次数, 搜索时间)
         """
         start_time = time.time()
         simulation_count = 0
+        # 根局面的撤销令牌：每次迭代后回滚到这里
+        root_token = self.hex.move_count + 1
         
         logging.info(f"开始MCTS搜索 - 时间限制:{time_limit}秒")
         
@@ -203,53 +671,91 @@ class MCTS:
                 logging.info(f"首步直接选择中心位置 ({center}, {center})")
                 return center_move, 1.0, 1, 0.0
                 
+        # 根局面已被虚连接证明获胜时直接走出保持胜势的一步
+        if self.solver is not None and self.solve() == self.color:
+            move = self.solver.winning_move(self.hex, self.color)
+            if move is not None:
+                logging.info(f"虚连接证明必胜，选择 {move}")
+                return move, 1.0, 0, time.time() - start_time
+        
+        early = EarlyStop(time_limit) if early_stop else None
+        
         # 为加快计算，首先限制在时间允许的情况下扩展主要的动作
         expand_limit = min(20, len(self.untried_actions))  # 最多扩展20个动作
         
-        # 优先扩展靠近中心的位置
-        if self.prioritized_actions:
-            for action in self.prioritized_actions[:min(5, len(self.prioritized_actions))]:
-                if time.time() - start_time >= time_limit:
+        if self.network is not None:
+            simulation_count = self._search_puct(start_time, time_limit, stop_event, root_token, max_simulations,
+                                                 progress, early)
+        else:
+            # 有先验时先扩展先验最高的走法（渐进展开时为初始宽度个），否则优先扩展靠近中心的位置
+            if self.prior_bias or self.widen:
+                self.ensure_prior()
+                warm_up = self.untried_actions[:min(expand_limit, self.widen or self.warm_up)]
+            else:
+                warm_up = self.prioritized_actions[:self.warm_up]
+            for action in warm_up:
+                if time.time() - start_time >= time_limit or (stop_event is not None and stop_event.is_set()):
                     break
                 node = self.expand(action)
-                reward = node.simulate()
-                node.backpropagate(reward)
-                simulation_count += 1
+                simulation_count += self._playout(node, [self, node])
+                self.hex.undo(root_token)
         
-        while time.time() - start_time < time_limit:
-            node, need_expand = self.select()
+            while time.time() - start_time < time_limit:
+                if stop_event is not None and stop_event.is_set():
+                    logging.info(f"搜索被取消 - 已完成{simulation_count}次模拟")
+                    break
+                if self.proven is not None:
+                    logging.info(f"根局面已被证明，获胜方: {self.proven}")
+                    break
+                if max_simulations is not None and simulation_count >= max_simulations:
+                    break
+                path = []
+                node, need_expand = self.select(self.c, path=path)
             
-            if need_expand and node.untried_actions:
-                if node.prioritized_actions:
-                    action = random.choice(node.prioritized_actions)
-                    node.prioritized_actions.remove(action)
-                else:
-                    action = random.choice(node.untried_actions)
-                node = node.expand(action)
+                if need_expand and node.untried_actions:
+                    if node.prior_bias or node.widen:
+                        node.ensure_prior()
+                        action = node.untried_actions[0]
+                    elif node.rave_k and node.amaf:
+                        action = node.best_amaf_action()
+                    elif node.prioritized_actions:
+                        action = random.choice(node.prioritized_actions)
+                        node.prioritized_actions.remove(action)
+                    else:
+                        action = random.choice(node.untried_actions)
+                    node = node.expand(action)
+                    path.append(node)
             
-            reward = node.simulate()
-            node.backpropagate(reward)
-            simulation_count += 1
+                count = self._playout(node, path)
+                self.hex.undo(root_token)
+                simulation_count += count
+                
+                if early is not None and simulation_count // EARLY_STOP_INTERVAL != (simulation_count - count) // EARLY_STOP_INTERVAL:
+                    if self._check_early_stop(early, simulation_count, time.time() - start_time):
+                        break
             
-            # 每500次模拟记录一次进度
-            if simulation_count % 500 == 0:
-                elapsed = time.time() - start_time
-                logging.info(f"搜索进度 - 已完成{simulation_count}次模拟，用时:{elapsed:.2f}秒，平均:{simulation_count/elapsed:.1f}次/秒")
+                # 每500次模拟记录一次进度
+                if simulation_count // 500 != (simulation_count - count) // 500:
+                    elapsed = time.time() - start_time
+                    logging.info(f"搜索进度 - 已完成{simulation_count}次模拟，用时:{elapsed:.2f}秒，平均:{simulation_count/elapsed:.1f}次/秒")
+                    if progress is not None:
+                        progress(self.progress_info(simulation_count, elapsed))
         
-        # 选择胜率最高的动作
-        best_ratio = float('-inf')
-        best_action = None
+        if progress is not None:
+            progress(self.progress_info(simulation_count, time.time() - start_time))
+        
+        # 选择访问次数最多的动作（与调度器合并统计后的选择一致）
+        stats = self.root_stats()
+        best_action, best_ratio = most_visited(stats)
         
         # 记录所有动作的统计信息
-        action_stats = []
+        action_stats = [(action, q / n, n) for action, (n, q) in stats.items()]
         
+        # 搜索中证明了某个子节点获胜时直接选它
         for action, child in self.children.items():
-            if child.N > 0:
-                win_ratio = child.Q / child.N
-                action_stats.append((action, win_ratio, child.N))
-                if win_ratio > best_ratio:
-                    best_ratio = win_ratio
-                    best_action = action
+            if child.proven == self.color:
+                best_action, best_ratio = action, 1.0
+                break
         
         search_time = time.time() - start_time
         
@@ -269,10 +775,12 @@ class MCTS:
             logging.info(f"未能找到最佳动作，随机选择: {best_action}")
         
         # 记录前5个最佳动作
-        action_stats.sort(key=lambda x: x[1], reverse=True)
+        action_stats.sort(key=lambda x: x[2], reverse=True)
         top_moves = action_stats[:min(5, len(action_stats))]
         
         log_msg = f"MCTS搜索完成 - 用时:{search_time:.2f}秒，模拟次数:{simulation_count}\n"
+        if self.tt is not None:
+            log_msg += f"置换表: {len(self.tt)}个局面，命中{self.tt.hits}次，未命中{self.tt.misses}次\n"
         log_msg += f"前{len(top_moves)}个最佳动作:\n"
         
         for i, (action, ratio, visits) in enumerate(top_moves):
@@ -0,0 +1,164 @@
+import argparse
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+
+from core.board import RED, BLUE, EMPTY, COLOR_CODES, DIRECTIONS
+
+# 六边形卷积的7个抽头：中心格与六个相邻方向
+HEX_TAPS = ((0, 0),) + DIRECTIONS
+
+# 输入平面：红子、蓝子、空格、行棋方（红方行棋时全为1）
+INPUT_PLANES = 4
+
+# 按路径缓存已加载的网络
+_NETWORKS = {}
+
+
+def encode(board, color: str) -> np.ndarray:
+    """把棋盘编码为网络输入
+    Args:
+        board: 棋盘（core.board.Board）
+        color: 行棋方
+    Returns:
+        np.ndarray: 形状为 (INPUT_PLANES, size, size) 的 float32 数组
+    """
+    size = board.size
+    cells = np.frombuffer(bytes(board.cells), dtype=np.uint8).reshape(size, size)
+    planes = np.empty((INPUT_PLANES, size, size), dtype=np.float32)
+    planes[0] = cells == RED
+    planes[1] = cells == BLUE
+    planes[2] = cells == EMPTY
+    planes[3] = COLOR_CODES[color] == RED
+    return planes
+
+
+class HexNet:
+    """纯NumPy实现的策略/价值网络
+
+    若干层六边形卷积（每个输出只看中心格与六个邻居，im2col 后一次矩阵乘法），
+    第一层之后为残差连接；策略头是逐格的1x1卷积，价值头是全局平均池化后的线性层加 tanh。
+    输入的边界外填充：红方边界（上下）外视为红子，蓝方边界（左右）外视为蓝子。
+    """
+
+    def __init__(self, weights: Dict[str, np.ndarray]):
+        """
+        Args:
+            weights: 参数字典，键为 conv{i}_w/conv{i}_b、policy_w/policy_b、value_w/value_b
+        """
+        self.weights = {name: np.asarray(value, dtype=np.float32) for name, value in weights.items()}
+        self.layers = sum(1 for name in self.weights if name.startswith('conv') and name.endswith('_w'))
+        self.channels = self.weights['conv0_w'].shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> 'HexNet':
+        """从 .npz 权重文件加载网络"""
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    @classmethod
+    def random(cls, channels: int = 32, layers: int = 4, seed: int = 0) -> 'HexNet':
+        """生成随机初始化（He 初始化）的网络，用于训练的起点或测试"""
+        rng = np.random.default_rng(seed)
+        weights = {}
+        fan_in = INPUT_PLANES
+        for i in range(layers):
+            weights[f'conv{i}_w'] = rng.normal(0, np.sqrt(2.0 / (fan_in * len(HEX_TAPS))),
+                                               (channels, fan_in * len(HEX_TAPS)))
+            weights[f'conv{i}_b'] = np.zeros(channels)
+            fan_in = channels
+        weights['policy_w'] = rng.normal(0, np.sqrt(1.0 / channels), channels)
+        weights['policy_b'] = np.zeros(())
+        weights['value_w'] = rng.normal(0, np.sqrt(1.0 / channels), channels)
+        weights['value_b'] = np.zeros(())
+        return cls(weights)
+
+    def save(self, path: str):
+        """保存权重到 .npz 文件"""
+        np.savez(path, **self.weights)
+
+    @staticmethod
+    def _hexconv(x: np.ndarray, w: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """六边形卷积
+        Args:
+            x: 已在四周各填充一格的输入，形状 (B, C, size+2, size+2)
+            w: 权重，形状 (O, C*7)
+            b: 偏置，形状 (O,)
+        Returns:
+            np.ndarray: 形状 (B, O, size, size)
+        """
+        batch, channels = x.shape[:2]
+        size = x.shape[2] - 2
+        cols = np.stack([x[:, :, 1 + dr:1 + dr + size, 1 + dc:1 + dc + size] for dr, dc in HEX_TAPS], axis=2)
+        cols = cols.reshape(batch, channels * len(HEX_TAPS), size * size)
+        out = np.matmul(w, cols) + b[:, None]
+        return out.reshape(batch, -1, size, size)
+
+    @staticmethod
+    def _pad_input(x: np.ndarray) -> np.ndarray:
+        """输入平面的边界填充：上下边界外为红子，左右边界外为蓝子"""
+        padded = np.pad(x, ((0, 0), (0, 0), (1, 1), (1, 1)))
+        padded[:, 0, [0, -1], :] = 1.0
+        padded[:, 1, 1:-1, [0, -1]] = 1.0
+        padded[:, 3] = x[:, 3, :1, :1]
+        return padded
+
+    def forward(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        前向计算
+        Args:
+            x: 输入平面，形状 (B, INPUT_PLANES, size, size)
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (策略logits，形状 (B, size*size); 价值，形状 (B,)，行棋方视角)
+        """
+        w = self.weights
+        h = np.maximum(self._hexconv(self._pad_input(x), w['conv0_w'], w['conv0_b']), 0.0)
+        for i in range(1, self.layers):
+            padded = np.pad(h, ((0, 0), (0, 0), (1, 1), (1, 1)))
+            h = np.maximum(self._hexconv(padded, w[f'conv{i}_w'], w[f'conv{i}_b']), 0.0) + h
+        flat = h.reshape(h.shape[0], h.shape[1], -1)
+        logits = np.einsum('c,bcn->bn', w['policy_w'], flat) + w['policy_b']
+        value = np.tanh(flat.mean(axis=2) @ w['value_w'] + w['value_b'])
+        return logits, value
+
+    def evaluate(self, planes: np.ndarray, legal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量评估
+        Args:
+            planes: 输入平面，形状 (B, INPUT_PLANES, size, size)
+            legal: 合法走法掩码，形状 (B, size*size)
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (合法走法上归一化的策略概率, 行棋方视角的价值)
+        """
+        logits, value = self.forward(planes)
+        logits = np.where(legal, logits, -np.inf)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return probs, value
+
+
+def load_network(path: str) -> HexNet:
+    """加载网络（按路径缓存，同一权重文件只读取一次）"""
+    path = os.path.abspath(path)
+    network = _NETWORKS.get(path)
+    if network is None:
+        network = HexNet.load(path)
+        _NETWORKS[path] = network
+    return network
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成随机初始化的策略/价值网络权重')
+    parser.add_argument('path', help='输出的 .npz 权重文件')
+    parser.add_argument('--channels', type=int, default=32, help='每层通道数')
+    parser.add_argument('--layers', type=int, default=4, help='六边形卷积层数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+    HexNet.random(args.channels, args.layers, args.seed).save(args.path)
+    print(f"已写入 {args.path}")
+
+
+if __name__ == '__main__':
+    main()
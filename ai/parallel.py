@@ -0,0 +1,206 @@
+import os
+import random
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .mcts import MCTS, most_visited
+
+# 为并行搜索设置日志编码
+if not logging.getLogger().handlers:
+    logging.basicConfig(encoding='utf-8')  # 确保日志使用UTF-8编码
+
+# 按进程数缓存的常驻进程池，避免每步都重新创建进程
+_EXECUTORS = {}
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """获取常驻进程池
+    Args:
+        workers: 进程数
+    Returns:
+        ProcessPoolExecutor: 进程池
+    """
+    executor = _EXECUTORS.get(workers)
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        _EXECUTORS[workers] = executor
+    return executor
+
+
+def shutdown_executors():
+    """关闭所有常驻进程池"""
+    for executor in _EXECUTORS.values():
+        executor.shutdown(cancel_futures=True)
+    _EXECUTORS.clear()
+
+
+def _search_worker(engine, board, color, ai_color, time_limit, seed):
+    """在子进程中运行一棵独立的搜索树
+    Returns:
+        Tuple[Dict, int]: (根节点子节点统计, 模拟次数)
+    """
+    random.seed(seed)
+    searcher = engine(board, color, ai_color)
+    if getattr(searcher, 'rng', None) is not None:
+        searcher.rng = np.random.default_rng(seed)
+    _, _, count, _ = searcher.search(time_limit=time_limit)
+    return searcher.root_stats(), count
+
+
+# 调度器在子进程中保留的搜索树：请求编号 -> 搜索实例，时间片之间继续搜索同一棵树
+_TREES = {}
+
+
+def _resume_search_worker(key, engine, board, color, ai_color, time_limit, seed):
+    """在子进程中继续搜索一个请求的搜索树（该进程上的第一个时间片创建它），树保留到 _release_search_tree
+    Returns:
+        Tuple[Dict, int]: (这棵树累计的根节点子节点统计, 本时间片的模拟次数)
+    """
+    searcher = _TREES.get(key)
+    if searcher is None:
+        random.seed(seed)
+        searcher = engine(board, color, ai_color)
+        if getattr(searcher, 'rng', None) is not None:
+            searcher.rng = np.random.default_rng(seed)
+        _TREES[key] = searcher
+    _, _, count, _ = searcher.search(time_limit=time_limit)
+    return searcher.root_stats(), count
+
+
+def _release_search_tree(key):
+    """丢弃子进程中保留的搜索树"""
+    _TREES.pop(key, None)
+
+
+def _engine_search_worker(engine, board, color, ai_color, time_limit, seed):
+    """在子进程中运行引擎自己的完整搜索（用于不能按根节点统计合并的引擎，如 alpha-beta）
+    Returns:
+        Tuple: 引擎 search 的返回值 (最佳动作, 胜率, 模拟次数, 用时)
+    """
+    random.seed(seed)
+    return engine(board, color, ai_color).search(time_limit=time_limit)
+
+
+def merge_root_stats(results) -> Dict[Tuple[int, int], Tuple[int, float]]:
+    """合并多棵搜索树的根节点统计
+    Args:
+        results: 每棵树的 {动作: (访问次数, 累计奖励)}
+    Returns:
+        Dict[Tuple[int, int], Tuple[int, float]]: 按动作求和后的统计
+    """
+    merged = {}
+    for stats in results:
+        for action, (n, q) in stats.items():
+            old_n, old_q = merged.get(action, (0, 0.0))
+            merged[action] = (old_n + n, old_q + q)
+    return merged
+
+
+class RootParallelMCTS:
+    """根并行MCTS
+
+    在进程池中对同一局面各自独立地搜索多棵树（每个进程使用不同的随机种子），
+    搜索结束后把根节点各子节点的访问次数与奖励相加，选择合并后访问次数最多的动作。
+    """
+
+    def __init__(self, hex, color, ai_color, workers: int = None, engine=MCTS):
+        """
+        初始化根并行搜索
+        Args:
+            hex: Hex棋盘状态
+            color: 当前玩家颜色
+            ai_color: AI的颜色
+            workers: 进程数，默认使用全部CPU核心
+            engine: 每个进程中使用的搜索引擎（可被pickle的类或 functools.partial）
+        """
+        self.hex = hex.copy()
+        self.color = color
+        self.ai_color = ai_color
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.stats = {}
+        logging.info(f"根并行MCTS初始化 - 当前颜色:{color}, AI颜色:{ai_color}, 进程数:{self.workers}")
+
+    def advance(self, action):
+        """
+        根并行搜索不保留搜索树，无法复用
+        Returns:
+            None
+        """
+        return None
+
+    def root_stats(self):
+        """
+        获取最近一次搜索合并后的根节点统计
+        Returns:
+            Dict[Tuple[int, int], Tuple[int, float]]: {动作: (访问次数, AI视角的累计奖励)}
+        """
+        return dict(self.stats)
+
+    def search(self, time_limit=5.0, stop_event=None, progress=None, early_stop=False):
+        """
+        执行并行搜索，找到最佳动作
+        Args:
+            time_limit: 每个进程的搜索时间限制（秒）
+            stop_event: 可选的 threading.Event；子进程无法中途停止，仅在提交任务前检查
+            progress: 可选的回调函数，合并各进程的结果后调用一次（参数格式同 MCTS.progress_info）
+            early_stop: 为与其他引擎的接口一致而接受，子进程总是搜索到截止时间
+        Returns:
+            Tuple: (最佳动作, 胜率, 所有进程的模拟次数之和, 搜索时间)
+        """
+        start_time = time.time()
+        logging.info(f"开始根并行MCTS搜索 - 时间限制:{time_limit}秒, 进程数:{self.workers}")
+
+        # 如果是首步，优先选择中心位置
+        size = self.hex.size
+        if len(self.hex.available) == size * size:
+            center = size // 2
+            logging.info(f"首步直接选择中心位置 ({center}, {center})")
+            return (center, center), 1.0, 1, 0.0
+
+        if stop_event is not None and stop_event.is_set():
+            logging.info("搜索被取消")
+            return None, 0.5, 0, 0.0
+
+        executor = get_executor(self.workers)
+        base_seed = random.randrange(1 << 30)
+        futures = [executor.submit(_search_worker, self.engine, self.hex, self.color,
+                                   self.ai_color, time_limit, base_seed + i)
+                   for i in range(self.workers)]
+        results = []
+        simulation_count = 0
+        for future in futures:
+            stats, count = future.result()
+            results.append(stats)
+            simulation_count += count
+        self.stats = merge_root_stats(results)
+
+        search_time = time.time() - start_time
+        action_stats = sorted(((action, q / n, n) for action, (n, q) in self.stats.items()),
+                              key=lambda x: x[2], reverse=True)
+        best_action, best_ratio = most_visited(self.stats)
+        if progress is not None:
+            progress({'simulations': simulation_count, 'elapsed': round(search_time, 3), 'best_move': best_action,
+                      'win_rate': None if best_action is None else round(best_ratio, 4)})
+        if best_action is None and self.hex.available:
+            best_action = random.choice(self.hex.available)
+            logging.info(f"未能找到最佳动作，随机选择: {best_action}")
+
+        top_moves = action_stats[:min(5, len(action_stats))]
+        log_msg = f"根并行MCTS搜索完成 - 用时:{search_time:.2f}秒，进程数:{self.workers}，总模拟次数:{simulation_count}\n"
+        log_msg += f"前{len(top_moves)}个最佳动作:\n"
+        for i, (action, ratio, visits) in enumerate(top_moves):
+            row, col = action
+            log_msg += f"  {i+1}. 位置:({row},{col}) - 胜率:{ratio:.4f}, 访问次数:{visits}\n"
+        if best_action:
+            row, col = best_action
+            log_msg += f"选择最佳动作:({row},{col})，胜率:{best_ratio:.4f}"
+        else:
+            log_msg += "未找到有效动作"
+        logging.info(log_msg)
+
+        return best_action, best_ratio, simulation_count, search_time
@@ -0,0 +1,73 @@
+import numpy as np
+from typing import Optional
+
+from core.board import RED, BLUE, COLOR_CODES
+
+
+def fill_boards(board, color: str, count: int, rng: np.random.Generator) -> np.ndarray:
+    """随机填满棋盘，批量生成终局
+    Hex 不会出现平局，随机对弈到底与把所有空位按随机顺序、双方交替填满后再判定
+    胜负是等价的，因此一次生成 count 个随机排列即可得到 count 盘随机对局的终局。
+    Args:
+        board: 当前棋盘（core.board.Board）
+        color: 下一步的行棋方
+        count: 生成的对局数
+        rng: NumPy 随机数生成器
+    Returns:
+        np.ndarray: 形状为 (count, size, size) 的 uint8 数组，取值为 RED/BLUE
+    """
+    size = board.size
+    cells = np.frombuffer(bytes(board.cells), dtype=np.uint8)
+    empty = np.flatnonzero(cells == 0)
+    boards = np.repeat(cells[None, :], count, axis=0)
+    if len(empty):
+        # 每行一个随机排列：排在前一半（向上取整）的空位属于下一步的行棋方
+        order = np.argsort(rng.random((count, len(empty))), axis=1)
+        first = (len(empty) + 1) // 2
+        rows = np.arange(count)[:, None]
+        mover = COLOR_CODES[color]
+        boards[rows, empty[order[:, :first]]] = mover
+        boards[rows, empty[order[:, first:]]] = BLUE if mover == RED else RED
+    return boards.reshape(count, size, size)
+
+
+def red_connected(stones: np.ndarray) -> np.ndarray:
+    """批量判断红方是否连通上下两边
+    从第一行的红子出发，按六边形邻接关系反复膨胀并与红子取交集，
+    直到所有棋盘都不再变化（向量化的洪水填充）。
+    Args:
+        stones: 形状为 (count, size, size) 的布尔数组，True 表示红子
+    Returns:
+        np.ndarray: 形状为 (count,) 的布尔数组
+    """
+    reach = np.zeros_like(stones)
+    reach[:, 0, :] = stones[:, 0, :]
+    while True:
+        grown = reach.copy()
+        grown[:, 1:, :] |= reach[:, :-1, :]     # 来自 (r-1, c)
+        grown[:, :-1, :] |= reach[:, 1:, :]     # 来自 (r+1, c)
+        grown[:, :, 1:] |= reach[:, :, :-1]     # 来自 (r, c-1)
+        grown[:, :, :-1] |= reach[:, :, 1:]     # 来自 (r, c+1)
+        grown[:, 1:, :-1] |= reach[:, :-1, 1:]  # 来自 (r-1, c+1)
+        grown[:, :-1, 1:] |= reach[:, 1:, :-1]  # 来自 (r+1, c-1)
+        grown &= stones
+        if np.array_equal(grown, reach):
+            break
+        reach = grown
+    return reach[:, -1, :].any(axis=1)
+
+
+def fill_playouts(board, color: str, count: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """批量随机模拟
+    Args:
+        board: 当前棋盘（不能已有获胜方）
+        color: 下一步的行棋方
+        count: 模拟次数
+        rng: NumPy 随机数生成器，默认新建
+    Returns:
+        np.ndarray: 形状为 (count,) 的布尔数组，True 表示红方获胜、False 表示蓝方获胜
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    boards = fill_boards(board, color, count, rng)
+    return red_connected(boards == RED)
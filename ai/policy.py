@@ -0,0 +1,156 @@
+import random
+from typing import List, Optional, Tuple
+
+from core.board import EMPTY, RED, BLUE, COLOR_CODES
+
+# 按棋盘大小缓存的中心3x3区域与环形邻接表
+_CENTER_REGIONS = {}
+_RING_TABLES = {}
+
+# 六个相邻方向按环形顺序排列：相邻两项互为邻居，相隔一项的两格构成一座“桥”
+RING_DIRECTIONS = ((-1, 0), (-1, 1), (0, 1), (1, 0), (1, -1), (0, -1))
+
+# 棋盘外的虚拟格：上下边界外视为红子，左右边界外视为蓝子（角上按上下边界处理）
+OFF_RED = -1
+OFF_BLUE = -2
+
+
+def center_region(size: int) -> List[Tuple[int, int]]:
+    """获取棋盘中心3x3区域的坐标列表"""
+    region = _CENTER_REGIONS.get(size)
+    if region is None:
+        center = size // 2
+        region = [(r, c) for r in range(center-1, center+2) for c in range(center-1, center+2)]
+        _CENTER_REGIONS[size] = region
+    return region
+
+
+def ring_table(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """获取环形邻接表：每个格子按 RING_DIRECTIONS 顺序的6个邻居编号，
+    棋盘外的邻居记为 OFF_RED 或 OFF_BLUE"""
+    table = _RING_TABLES.get(size)
+    if table is None:
+        rows = []
+        for r in range(size):
+            for c in range(size):
+                ring = []
+                for dr, dc in RING_DIRECTIONS:
+                    nr, nc = r + dr, c + dc
+                    if not 0 <= nr < size:
+                        ring.append(OFF_RED)
+                    elif not 0 <= nc < size:
+                        ring.append(OFF_BLUE)
+                    else:
+                        ring.append(nr * size + nc)
+                rows.append(tuple(ring))
+        table = tuple(rows)
+        _RING_TABLES[size] = table
+    return table
+
+
+def neighbor_code(cells, ring) -> int:
+    """计算格子的邻域编码：6个邻居的颜色编码按环形顺序组成的三进制数（0~728）
+    Args:
+        cells: 棋盘的一维字节数组
+        ring: 该格子在 ring_table 中的一行
+    Returns:
+        int: 邻域编码
+    """
+    code = 0
+    for nid in reversed(ring):
+        if nid >= 0:
+            value = cells[nid]
+        else:
+            value = RED if nid == OFF_RED else BLUE
+        code = code * 3 + value
+    return code
+
+
+def decode_pattern(code: int) -> Tuple[int, ...]:
+    """把邻域编码还原为按环形顺序的6个颜色编码"""
+    values = []
+    for _ in range(6):
+        values.append(code % 3)
+        code //= 3
+    return tuple(values)
+
+
+def _bridge_save_table(mover: int) -> bytes:
+    """生成“救桥”查找表：下标为空格的邻域编码，取值为1表示在此落子可以挽救被对方侵入的桥
+    （环形相邻的三个邻居依次为 己方、对方、己方；己方可以是己方边界，即二线的边桥模板）"""
+    opponent = BLUE if mover == RED else RED
+    table = bytearray(3 ** 6)
+    for code in range(3 ** 6):
+        values = decode_pattern(code)
+        for k in range(6):
+            if (values[k] == mover and values[(k + 1) % 6] == opponent
+                    and values[(k + 2) % 6] == mover):
+                table[code] = 1
+                break
+    return bytes(table)
+
+
+# 按行棋方颜色编码索引的救桥表
+BRIDGE_SAVE = {RED: _bridge_save_table(RED), BLUE: _bridge_save_table(BLUE)}
+
+
+class RandomPolicy:
+    """随机模拟策略：以 center_bias 的概率（默认50%）在中心3x3区域的空位中随机落子，否则在全部空位中随机落子"""
+
+    def __init__(self, center_bias: float = 0.5):
+        """
+        Args:
+            center_bias: 在中心区域落子的概率
+        """
+        self.center_bias = center_bias
+
+    def with_center_bias(self, center_bias: float) -> 'RandomPolicy':
+        """返回中心偏好为 center_bias 的同类策略（相同时返回自身）"""
+        if center_bias == self.center_bias:
+            return self
+        return type(self)(center_bias)
+
+    def choose(self, state, color: str, last: Optional[int]) -> Tuple[int, int]:
+        """
+        为模拟中的行棋方选择一步
+        Args:
+            state: 当前棋盘（至少有一个空位）
+            color: 行棋方颜色
+            last: 上一步的一维格子编号，没有时为 None
+        Returns:
+            Tuple[int, int]: 动作 (row, col)
+        """
+        actions = state.available
+        prioritized_actions = [action for action in center_region(state.size) if action in actions]
+        if prioritized_actions and random.random() < self.center_bias:  # 按一定概率选择中心区域
+            return random.choice(prioritized_actions)
+        return random.choice(actions)
+
+
+class PatternPolicy(RandomPolicy):
+    """模式模拟策略
+
+    对方刚侵入己方的桥（包括二线棋子与边界之间的边桥模板）时，立即在桥的另一个
+    公共格落子挽救；判断只需计算上一步周围空格的邻域编码并查表，每步为常数时间。
+    没有需要应对的侵入时退回随机策略。
+    """
+
+    def choose(self, state, color: str, last: Optional[int]) -> Tuple[int, int]:
+        if last is not None:
+            cells = state.cells
+            ring = ring_table(state.size)
+            table = BRIDGE_SAVE[COLOR_CODES[color]]
+            responses = [nid for nid in ring[last]
+                         if nid >= 0 and cells[nid] == EMPTY and table[neighbor_code(cells, ring[nid])]]
+            if responses:
+                nid = random.choice(responses)
+                return divmod(nid, state.size)
+        return super().choose(state, color, last)
+
+
+# 默认策略实例（无状态，可在节点间共享）
+RANDOM_POLICY = RandomPolicy()
+PATTERN_POLICY = PatternPolicy()
+
+# 按名称查找模拟策略（命令行与配置中使用）
+POLICIES = {'random': RANDOM_POLICY, 'pattern': PATTERN_POLICY}
@@ -0,0 +1,86 @@
+from typing import Tuple
+
+import numpy as np
+
+from core.board import EMPTY, COLOR_CODES, neighbor_table
+
+# 己方棋子的电阻（近似为0，避免矩阵奇异）与每个节点对地的泄漏电导（保证被隔断的格子不使矩阵奇异）
+STONE_RESISTANCE = 1e-4
+LEAK = 1e-9
+
+# 按棋盘大小缓存的电路结构
+_CIRCUITS = {}
+
+
+def _circuit(size: int):
+    """获取电路结构：相邻格子对（每对一次）与四条边界上的格子编号"""
+    circuit = _CIRCUITS.get(size)
+    if circuit is None:
+        table = neighbor_table(size)
+        pairs = [(a, b) for a in range(size * size) for b in table[a] if a < b]
+        a = np.array([p[0] for p in pairs], dtype=np.intp)
+        b = np.array([p[1] for p in pairs], dtype=np.intp)
+        index = np.arange(size * size).reshape(size, size)
+        edges = {'R': (index[0, :], index[-1, :]), 'B': (index[:, 0], index[:, -1])}
+        circuit = (a, b, edges)
+        _CIRCUITS[size] = circuit
+    return circuit
+
+
+def solve_circuit(board, color: str) -> Tuple[float, np.ndarray]:
+    """求解一方的Shannon电路
+    每个格子是一个电阻：己方棋子约为0，空格为1，对方棋子断开；相邻格子之间的电阻为两格之和，
+    一方的两条边界分别接电源两极。注入单位电流后，电源两端的电压即等效电阻。
+    Args:
+        board: 棋盘（core.board.Board）
+        color: 计算哪一方的电路
+    Returns:
+        Tuple[float, np.ndarray]: (两条边界之间的等效电阻, 流过每个格子的电流，形状为 (size*size,))
+    """
+    size = board.size
+    n = size * size
+    a, b, edges = _circuit(size)
+    cells = np.frombuffer(bytes(board.cells), dtype=np.uint8)
+    code = COLOR_CODES[color]
+    blocked = (cells != EMPTY) & (cells != code)
+    res = np.where(cells == code, STONE_RESISTANCE, 1.0)
+
+    conductance = 1.0 / (res[a] + res[b])
+    conductance[blocked[a] | blocked[b]] = 0.0
+    source_cells, sink_cells = edges[color]
+    source_g = np.where(blocked[source_cells], 0.0, 1.0 / res[source_cells])
+    sink_g = np.where(blocked[sink_cells], 0.0, 1.0 / res[sink_cells])
+
+    # 节点 n 为电源正极；负极接地，不出现在方程中
+    laplacian = np.zeros((n + 1, n + 1))
+    laplacian[a, b] = -conductance
+    laplacian[b, a] = -conductance
+    laplacian[source_cells, n] = -source_g
+    laplacian[n, source_cells] = -source_g
+    diagonal = -laplacian.sum(axis=1)
+    diagonal[sink_cells] += sink_g
+    laplacian[np.arange(n + 1), np.arange(n + 1)] = diagonal + LEAK
+    rhs = np.zeros(n + 1)
+    rhs[n] = 1.0
+    voltage = np.linalg.solve(laplacian, rhs)
+
+    # 每个格子的电流取流经其所有连接的电流之和的一半（流入等于流出）
+    flow = conductance * np.abs(voltage[a] - voltage[b])
+    current = np.bincount(a, flow, minlength=n) + np.bincount(b, flow, minlength=n)
+    current[source_cells] += source_g * np.abs(voltage[n] - voltage[source_cells])
+    current[sink_cells] += sink_g * np.abs(voltage[sink_cells])
+    return float(voltage[n]), current * 0.5
+
+
+def evaluate(board, color: str) -> Tuple[float, np.ndarray]:
+    """电阻估值：对方电阻与己方电阻之比的对数，正值对 color 有利
+    Args:
+        board: 棋盘
+        color: 估值的视角
+    Returns:
+        Tuple[float, np.ndarray]: (估值, 双方电路中流过每个格子的电流之和)
+    """
+    opponent = 'B' if color == 'R' else 'R'
+    own, own_current = solve_circuit(board, color)
+    other, other_current = solve_circuit(board, opponent)
+    return float(np.log(other / own)), own_current + other_current
@@ -0,0 +1,139 @@
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+
+from core.board import Board, COLOR_CODES
+from ai.dataset import ShardWriter, record_dtype
+from ai.mcts import MCTS
+from ai.network import load_network
+from ai.parallel import get_executor
+
+
+def play_game(size: int, time_limit: float, seed: int, random_opening: int = 2,
+              playout_batch: int = 64, network_path: str = None) -> np.ndarray:
+    """
+    自我对弈一盘，记录每一步的局面、根节点访问分布与终局结果
+    Args:
+        size: 棋盘大小
+        time_limit: 每步的搜索时间（秒）
+        seed: 随机种子
+        random_opening: 开局随机落子的步数（不记录），使各盘对局不同
+        playout_batch: 每个叶节点的批量模拟数
+        network_path: 策略/价值网络的权重文件，指定时使用PUCT搜索
+    Returns:
+        np.ndarray: record_dtype(size) 类型的样本数组
+    """
+    random.seed(seed)
+    kwargs = {'playout_batch': playout_batch}
+    if network_path:
+        kwargs = {'network': load_network(network_path)}
+    board = Board(size)
+    color = 'R'
+    positions = []
+    while board.check_winner() is None:
+        if board.move_count < random_opening:
+            action = random.choice(board.available)
+        else:
+            engine = MCTS(board, color, color, **kwargs)
+            engine.rng = np.random.default_rng(seed + board.move_count)
+            action = engine.search(time_limit=time_limit)[0]
+            stats = engine.root_stats()
+            total = sum(n for n, _ in stats.values())
+            if total:
+                policy = np.zeros(size * size, dtype=np.float32)
+                for (row, col), (n, _) in stats.items():
+                    policy[row * size + col] = n / total
+                positions.append((bytes(board.cells), COLOR_CODES[color], policy))
+        board.place_stone(action[0], action[1], color)
+        color = 'B' if color == 'R' else 'R'
+
+    winner = COLOR_CODES[board.check_winner()]
+    records = np.zeros(len(positions), dtype=record_dtype(size))
+    for i, (cells, to_move, policy) in enumerate(positions):
+        records[i]['cells'] = np.frombuffer(cells, dtype=np.uint8)
+        records[i]['to_move'] = to_move
+        records[i]['outcome'] = 1 if to_move == winner else -1
+        records[i]['policy'] = policy
+    return records
+
+
+def generate(directory: str, games: int, workers: int = None, size: int = 11, time_limit: float = 0.5,
+             shard_size: int = 65536, flush_every: int = 4096, seed: int = None, progress=None, **kwargs) -> int:
+    """
+    在进程池中并行自我对弈，把样本批量写入分片
+    Args:
+        directory: 输出目录
+        games: 对局数
+        workers: 进程数，默认使用全部CPU核心
+        size: 棋盘大小
+        time_limit: 每步的搜索时间（秒）
+        shard_size: 每个分片的样本容量
+        flush_every: 累积多少条样本写入一次
+        seed: 基础随机种子，默认随机
+        progress: 可选的回调函数，每完成一盘以 {'games', 'total', 'written', 'seconds'} 字典调用一次
+        **kwargs: 传给 play_game 的其他参数
+    Returns:
+        int: 写入的样本数
+    """
+    workers = workers or os.cpu_count() or 1
+    base_seed = seed if seed is not None else random.randrange(1 << 30)
+    writer = ShardWriter(directory, size=size, shard_size=shard_size)
+    executor = get_executor(workers)
+    futures = [executor.submit(play_game, size, time_limit, base_seed + i * 1000, **kwargs) for i in range(games)]
+    pending = []
+    written = 0
+    start_time = time.time()
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            pending.append(future.result())
+            if sum(len(records) for records in pending) >= flush_every or done == games:
+                batch = np.concatenate(pending)
+                writer.append(batch)
+                written += len(batch)
+                pending = []
+            if progress is not None:
+                progress({'games': done, 'total': games, 'written': written,
+                          'seconds': round(time.time() - start_time, 1)})
+    finally:
+        if pending:
+            batch = np.concatenate(pending)
+            writer.append(batch)
+            written += len(batch)
+        writer.close()
+    return written
+
+
+def _print_progress(info: dict):
+    print(f"自我对弈 {info['games']}/{info['total']} 盘，已写入 {info['written']} 条样本，"
+          f"用时 {info['seconds']} 秒", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自我对弈生成训练样本')
+    parser.add_argument('directory', help='输出目录（已存在时继续追加）')
+    parser.add_argument('--games', type=int, default=100, help='对局数')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认使用全部CPU核心')
+    parser.add_argument('--size', type=int, default=11, help='棋盘大小')
+    parser.add_argument('--time', type=float, default=0.5, help='每步的搜索时间（秒）')
+    parser.add_argument('--shard-size', type=int, default=65536, help='每个分片的样本容量')
+    parser.add_argument('--random-opening', type=int, default=2, help='开局随机落子的步数')
+    parser.add_argument('--batch', type=int, default=64, help='每个叶节点的批量模拟数')
+    parser.add_argument('--network', default=None, help='策略/价值网络权重文件，指定时使用PUCT搜索')
+    parser.add_argument('--seed', type=int, default=None, help='基础随机种子')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    written = generate(args.directory, args.games, workers=args.workers, size=args.size, time_limit=args.time,
+                       shard_size=args.shard_size, seed=args.seed, random_opening=args.random_opening,
+                       playout_batch=args.batch, network_path=args.network, progress=_print_progress)
+    print(f"共写入 {written} 条样本到 {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+from typing import Dict, Optional, Tuple
+
+# 每步搜索时间的下限（秒）
+MIN_MOVE_TIME = 0.05
+# 估计自己剩余步数时的下限，以及剩余空格折算为自己步数的比例（Hex 对局通常在填满棋盘之前结束）
+MIN_MOVES_LEFT = 8
+MOVES_PER_EMPTY = 1 / 3
+# 单步最多使用剩余时间的比例
+MAX_FRACTION = 0.25
+# 对局阶段（已落子比例）-> 分配权重：开局到中盘多用时间，残局少用
+PHASE_WEIGHTS = ((0.0, 1.0), (0.1, 1.3), (0.35, 1.3), (0.6, 0.6), (1.0, 0.4))
+
+# 提前结束：每隔多少次模拟检查一次、至少完成的模拟次数，
+# 以及“访问占比稳定”的条件（连续检查次数、占比的相对变化、领先第二名的倍数、至少用掉的时间比例）
+EARLY_STOP_INTERVAL = 100
+EARLY_STOP_MIN_SIMULATIONS = 200
+STABLE_CHECKS = 10
+STABLE_SHARE_DELTA = 0.05
+STABLE_MIN_LEAD = 1.2
+STABLE_MIN_FRACTION = 0.3
+
+
+def phase_weight(phase: float) -> float:
+    """按 PHASE_WEIGHTS 线性插值"""
+    for (x0, w0), (x1, w1) in zip(PHASE_WEIGHTS, PHASE_WEIGHTS[1:]):
+        if phase <= x1:
+            return w0 + (w1 - w0) * (phase - x0) / (x1 - x0)
+    return PHASE_WEIGHTS[-1][1]
+
+
+class GameClock:
+    """一方的对局计时：基本时间 + 每步加秒，按对局阶段分配每步的搜索时间"""
+
+    def __init__(self, main_time: float, increment: float = 0.0):
+        """
+        Args:
+            main_time: 整局的基本时间（秒）
+            increment: 每走一步增加的时间（秒）
+        """
+        self.remaining = main_time
+        self.increment = increment
+
+    @classmethod
+    def for_average(cls, average: float, size: int) -> 'GameClock':
+        """
+        按平均每步时间创建计时：总时间与每步固定 average 秒、走 size*size/4 步相同，
+        其中七成作为基本时间、三成作为每步加秒
+        Args:
+            average: 平均每步时间（秒）
+            size: 棋盘大小
+        """
+        moves = max(MIN_MOVES_LEFT, size * size / 4)
+        return cls(average * moves * 0.7, average * 0.3)
+
+    def allocate(self, board) -> float:
+        """
+        分配本步的搜索时间
+        Args:
+            board: 当前局面
+        Returns:
+            float: 搜索时间（秒）
+        """
+        empty = len(board.available)
+        if empty <= 1:
+            return MIN_MOVE_TIME
+        cells = board.size * board.size
+        moves_left = max(MIN_MOVES_LEFT, empty * MOVES_PER_EMPTY)
+        remaining = max(0.0, self.remaining)
+        target = remaining / moves_left * phase_weight(1 - empty / cells) + self.increment * 0.9
+        limit = remaining * MAX_FRACTION + self.increment
+        return max(MIN_MOVE_TIME, min(target, limit))
+
+    def charge(self, seconds: float):
+        """扣除本步用时并加上每步加秒"""
+        self.remaining += self.increment - seconds
+
+
+class EarlyStop:
+    """搜索提前结束的判断
+
+    两种情况下结束：访问次数最多的子节点领先第二名的次数超过剩余时间内能完成的模拟次数（无法被超过）；
+    或者它连续多次检查都保持最多、访问占比几乎不变且明显领先第二名，并且已用掉一定比例的时间（访问占比稳定）。
+    """
+
+    def __init__(self, time_limit: float):
+        """
+        Args:
+            time_limit: 本次搜索的时间限制（秒）
+        """
+        self.time_limit = time_limit
+        self.best = None
+        self.share = 0.0
+        self.stable = 0
+
+    def check(self, stats: Dict[Tuple[int, int], Tuple[int, float]], simulations: int, elapsed: float,
+              choice: Optional[Tuple[int, int]] = None) -> Optional[str]:
+        """
+        Args:
+            stats: 根节点统计 {动作: (访问次数, 累计奖励)}
+            simulations: 已完成的模拟次数
+            elapsed: 已用时间（秒）
+            choice: 搜索结束时实际会选择的动作；与访问次数最多的动作不同时不提前结束
+        Returns:
+            Optional[str]: 提前结束的原因（'unreachable' 或 'stable'），继续搜索时返回 None
+        """
+        if simulations < EARLY_STOP_MIN_SIMULATIONS or elapsed <= 0 or not stats:
+            return None
+        ranked = sorted(stats.items(), key=lambda item: item[1][0], reverse=True)
+        best, (first, _) = ranked[0]
+        if choice is not None and choice != best:
+            self.best, self.stable = None, 0
+            return None
+        second = ranked[1][1][0] if len(ranked) > 1 else 0
+        remaining = simulations / elapsed * max(0.0, self.time_limit - elapsed)
+        if first - second > remaining:
+            return 'unreachable'
+
+        total = sum(n for n, _ in stats.values())
+        share = first / total
+        if best == self.best and abs(share - self.share) < STABLE_SHARE_DELTA * self.share:
+            self.stable += 1
+        else:
+            self.stable = 0
+        self.best, self.share = best, share
+        if (self.stable >= STABLE_CHECKS and first >= STABLE_MIN_LEAD * second
+                and elapsed >= self.time_limit * STABLE_MIN_FRACTION):
+            return 'stable'
+        return None
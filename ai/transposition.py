@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from typing import Any, Optional
+
+# 轮到蓝方行棋时异或进局面哈希的随机数（棋盘哈希本身不含行棋方）
+SIDE_KEY = 0x9E3779B97F4A7C15
+
+
+def position_key(board, color: str) -> int:
+    """局面键：棋盘的Zobrist哈希加上行棋方
+    Args:
+        board: 棋盘
+        color: 行棋方
+    Returns:
+        int: 64位局面键
+    """
+    return board.hash ^ SIDE_KEY if color == 'B' else board.hash
+
+
+class TranspositionTable:
+    """有容量上限的置换表，按最近最少使用（LRU）淘汰"""
+
+    def __init__(self, capacity: int = 200000):
+        """
+        初始化置换表
+        Args:
+            capacity: 最多保存的局面数
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int) -> Optional[Any]:
+        """查找局面，命中时将其标记为最近使用"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: int, entry: Any):
+        """保存局面，超出容量时淘汰最久未使用的局面"""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """清空置换表"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,312 @@
+import os
+import queue
+import random
+import time
+import logging
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+
+from core.board import coord_table
+from .array_mcts import ArrayMCTS
+
+# 为树并行搜索设置日志编码
+if not logging.getLogger().handlers:
+    logging.basicConfig(encoding='utf-8')  # 确保日志使用UTF-8编码
+
+# 共享节点数组：(名称, memoryview 格式, 每项字节数, 初始值)
+_ARRAY_LAYOUT = (
+    ('visits', 'i', 4, 0),
+    ('values', 'd', 8, 0.0),
+    ('parent', 'i', 4, -1),
+    ('action', 'h', 2, -1),
+    ('first_child', 'i', 4, -1),
+    ('child_count', 'h', 2, 0),
+)
+
+
+def _tree_worker(tasks, done, workers, capacity, c, virtual_loss, index, lock):
+    """常驻工作进程：每收到一个任务就接入（共享内存块未变时沿用）共享树，迭代到截止时间或收到停止标志，
+    把模拟次数写回控制块；收到 None 时退出"""
+    tree = None
+    names = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_names, board, color, ai_color, deadline, seed = task
+            random.seed(seed)
+            if task_names != names:
+                if tree is not None:
+                    tree.close()
+                tree = SharedTreeMCTS.attach(task_names, workers, capacity, board, color, ai_color, c,
+                                             virtual_loss, lock)
+                names = task_names
+            else:
+                tree.hex = board
+                tree.color = color
+                tree.ai_color = ai_color
+            control = tree.control
+            count = 0
+            while time.time() < deadline and not control[1]:
+                tree._iterate()
+                count += 1
+            control[2 + index] = count
+            done.put(index)
+    finally:
+        if tree is not None:
+            tree.close()
+
+
+class SharedTreeMCTS(ArrayMCTS):
+    """树并行MCTS
+
+    在 ArrayMCTS 的结构数组之上，把节点统计放进 multiprocessing.shared_memory，
+    多个工作进程共同生长同一棵树。每个进程持有自己的棋盘副本；扩展节点时加锁分配
+    连续的子节点块，统计量的更新不加锁。
+    选择阶段对路径上的节点施加虚拟损失（先记一次访问和一次失败，回传时修正），
+    让同时下降的进程分散到不同的变化上。
+
+    visits/values 的 += 是跨进程的非原子读-改-写：两个进程同时更新同一节点时其中一次更新会丢失。
+    丢失的若是访问次数或奖励，只带来少量噪声；丢失的若是撤销虚拟损失的那次写入，
+    该节点的 values 会永久多出一次 -virtual_loss 的偏差（根节点不施加虚拟损失，不受影响）。
+    这种冲突只在多个进程同时经过同一节点时发生，偏差随树的生长被稀释，因此接受它而不加锁。
+
+    工作进程在第一次搜索时启动并常驻，之后每次搜索只通过队列下发任务；
+    推进根节点（advance）重新分配共享内存后，工作进程在下一个任务中重新接入。
+    用完后需调用 close() 结束工作进程并释放共享内存。
+    """
+
+    def __init__(self, hex, color, ai_color, workers: int = None, capacity: int = 2000000,
+                 c: float = 1.5, virtual_loss: float = 1.0):
+        """
+        初始化共享搜索树
+        Args:
+            hex: Hex棋盘状态
+            color: 根局面的行棋方
+            ai_color: AI的颜色
+            workers: 工作进程数，默认使用全部CPU核心
+            capacity: 共享节点数组的容量（固定，不扩容）
+            c: UCT公式中的探索参数
+            virtual_loss: 每次经过节点时施加的虚拟损失
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.virtual_loss = virtual_loss
+        self.lock = multiprocessing.Lock()
+        self.owner = True
+        self.processes = []
+        self.tasks = []
+        self.done = None
+        super().__init__(hex, color, ai_color, capacity=capacity, max_nodes=capacity, c=c)
+
+    @classmethod
+    def attach(cls, names, workers, capacity, board, color, ai_color, c, virtual_loss, lock) -> 'SharedTreeMCTS':
+        """在工作进程中接入已存在的共享树"""
+        tree = cls.__new__(cls)
+        tree.workers = workers
+        tree.hex = board.copy()
+        tree.color = color
+        tree.ai_color = ai_color
+        tree.capacity = capacity
+        tree.max_nodes = capacity
+        tree.c = c
+        tree.virtual_loss = virtual_loss
+        tree.lock = lock
+        tree.owner = False
+        tree.processes = []
+        tree.coords = coord_table(board.size)
+        tree._open(names, create=False)
+        return tree
+
+    def _allocate(self, capacity: int):
+        """在共享内存中分配各节点数组与控制块（节点数、停止标志、每个工作进程的模拟次数），
+        重新分配时先释放旧的共享内存"""
+        self._release()
+        self._open(None, create=True)
+        for name, fmt, _, initial in _ARRAY_LAYOUT:
+            if initial:
+                getattr(self, name)[:] = array(fmt, [initial]) * capacity
+
+    def _open(self, names, create: bool):
+        """创建或打开共享内存块，并建立按类型解释的 memoryview"""
+        self.blocks = {}
+        for name, fmt, itemsize, _ in _ARRAY_LAYOUT + (('control', 'q', 8, 0),):
+            count = self.workers + 2 if name == 'control' else self.capacity
+            if create:
+                block = shared_memory.SharedMemory(create=True, size=count * itemsize)
+                block.buf[:count * itemsize] = bytes(count * itemsize)
+            else:
+                block = shared_memory.SharedMemory(name=names[name])
+            self.blocks[name] = block
+            setattr(self, name, block.buf[:count * itemsize].cast(fmt))
+
+    @property
+    def block_names(self):
+        """共享内存块名称，传给工作进程用于接入"""
+        return {name: block.name for name, block in self.blocks.items()}
+
+    @property
+    def node_count(self) -> int:
+        return self.control[0]
+
+    @node_count.setter
+    def node_count(self, value: int):
+        self.control[0] = value
+
+    def close(self):
+        """结束工作进程，释放 memoryview 并关闭共享内存；创建者同时删除共享内存块"""
+        self._stop_workers()
+        self._release()
+
+    def _start_workers(self):
+        """启动常驻工作进程（已启动时不做任何事）"""
+        if self.processes:
+            return
+        self.done = multiprocessing.Queue()
+        for i in range(self.workers):
+            tasks = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_tree_worker,
+                args=(tasks, self.done, self.workers, self.capacity, self.c, self.virtual_loss, i, self.lock),
+                daemon=True)
+            process.start()
+            self.tasks.append(tasks)
+            self.processes.append(process)
+        logging.info(f"启动树并行工作进程: {self.workers}个")
+
+    def _stop_workers(self):
+        """通知工作进程退出并等待"""
+        processes = getattr(self, 'processes', None)
+        if not processes:
+            return
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.tasks = []
+        self.done = None
+
+    def _release(self):
+        """释放 memoryview 并关闭共享内存；创建者同时删除共享内存块"""
+        blocks = getattr(self, 'blocks', None)
+        if not blocks:
+            return
+        for name in list(blocks):
+            getattr(self, name).release()
+        for block in blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks = {}
+
+    def __del__(self):
+        self.close()
+
+    def _grow(self, needed: int) -> bool:
+        """共享数组容量固定"""
+        return needed <= self.capacity
+
+    def _expand(self, node: int) -> bool:
+        """加锁扩展节点，其他进程已扩展时直接返回"""
+        with self.lock:
+            if self.child_count[node] > 0:
+                return True
+            return super()._expand(node)
+
+    def _iterate(self):
+        """执行一次带虚拟损失的 选择-扩展-模拟-回传"""
+        board = self.hex
+        coords = self.coords
+        visits = self.visits
+        values = self.values
+        loss = self.virtual_loss
+        root_token = board.move_count + 1
+        node = 0
+        color = self.color
+        path = [0]
+        visits[0] += 1
+
+        while self.child_count[node] > 0 and board.check_winner() is None:
+            node = self._select_child(node)
+            visits[node] += 1
+            values[node] -= loss
+            path.append(node)
+            row, col = coords[self.action[node]]
+            board.place_stone(row, col, color)
+            color = 'B' if color == 'R' else 'R'
+
+        # 访问计数已包含本次的虚拟访问，因此以 >1 判断是否被访问过
+        if board.check_winner() is None and (node == 0 or visits[node] > 1) and self._expand(node):
+            node = self._select_child(node)
+            visits[node] += 1
+            values[node] -= loss
+            path.append(node)
+            row, col = coords[self.action[node]]
+            board.place_stone(row, col, color)
+            color = 'B' if color == 'R' else 'R'
+
+        winner = self._simulate(color)
+        mover = 'B' if color == 'R' else 'R'
+        reward = 1.0 if winner == mover else -1.0
+        # 访问次数在下降时已加过，这里只写入奖励并撤销虚拟损失（非原子更新，见类的说明）
+        for node in reversed(path):
+            values[node] += reward + (loss if node else 0.0)
+            reward = -reward
+        board.undo(root_token)
+
+    def search(self, time_limit=5.0, stop_event=None, progress=None, early_stop=False):
+        """
+        启动工作进程共同搜索，找到最佳动作
+        Args:
+            time_limit: 搜索时间限制（秒）
+            stop_event: 可选的 threading.Event，被置位时通知工作进程提前结束
+            progress: 可选的回调函数，搜索结束时以 progress_info() 的结果调用一次
+            early_stop: 为与其他引擎的接口一致而接受，工作进程总是搜索到截止时间
+        Returns:
+            Tuple: (最佳动作, 胜率, 所有进程的模拟次数之和, 搜索时间)
+        """
+        start_time = time.time()
+        logging.info(f"开始树并行MCTS搜索 - 时间限制:{time_limit}秒, 进程数:{self.workers}")
+
+        # 如果是首步，优先选择中心位置
+        size = self.hex.size
+        if len(self.hex.available) == size * size:
+            center = size // 2
+            logging.info(f"首步直接选择中心位置 ({center}, {center})")
+            return (center, center), 1.0, 1, 0.0
+
+        # 根节点先在主进程中扩展，工作进程从同一组子节点开始分流
+        if self.child_count[0] == 0:
+            self._expand(0)
+
+        deadline = start_time + time_limit
+        base_seed = random.randrange(1 << 30)
+        self._start_workers()
+        self.control[1] = 0
+        names = self.block_names
+        for i, tasks in enumerate(self.tasks):
+            self.control[2 + i] = 0
+            tasks.put((names, self.hex, self.color, self.ai_color, deadline, base_seed + i))
+        remaining = len(self.tasks)
+        while remaining:
+            try:
+                self.done.get(timeout=0.05)
+                remaining -= 1
+            except queue.Empty:
+                if stop_event is not None and stop_event.is_set() and not self.control[1]:
+                    logging.info("搜索被取消 - 通知工作进程停止")
+                    self.control[1] = 1
+                if not all(process.is_alive() for process in self.processes):
+                    logging.error("树并行工作进程意外退出，重新启动")
+                    self._stop_workers()
+                    break
+
+        simulation_count = sum(self.control[2 + i] for i in range(self.workers))
+        search_time = time.time() - start_time
+        if progress is not None:
+            progress(self.progress_info(simulation_count, search_time))
+        return self._report(simulation_count, search_time)
@@ -0,0 +1,144 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import wait
+from typing import Dict
+
+from ai.arena import submit_game
+from ai.parallel import get_executor
+
+# 可调参数：名称 -> (初始值, 下界, 上界, 扰动步长, 是否取整)，名称即 MCTS 的构造参数
+PARAMETERS = {
+    'c': (1.5, 0.2, 4.0, 0.25, False),            # UCT探索参数
+    'center_bias': (0.5, 0.0, 0.95, 0.1, False),  # 模拟中在中心区域落子的概率
+    'warm_up': (5, 0, 20, 2, True),               # 主循环之前先扩展的靠近中心的走法数
+}
+
+
+def clip_params(theta: Dict[str, float], params: Dict = PARAMETERS) -> Dict:
+    """把参数限制在上下界之内，整数参数取整"""
+    result = {}
+    for name, value in theta.items():
+        _, low, high, _, integer = params[name]
+        value = min(max(value, low), high)
+        result[name] = int(round(value)) if integer else round(value, 4)
+    return result
+
+
+def engine_spec(engine: str, values: Dict) -> str:
+    """生成 ai.arena 使用的引擎配置字符串"""
+    return f"{engine}:" + ','.join(f"{name}={json.dumps(value)}" for name, value in values.items())
+
+
+def _write_json(path: str, data: Dict):
+    """先写临时文件再替换，中断时不会留下写了一半的文件"""
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def spsa(engine: str = 'mcts', iterations: int = 100, games: int = 16, checkpoint: str = 'tune_checkpoint.json',
+         config: str = 'tuned.json', workers: int = None, size: int = 11, time_limit: float = 0.5,
+         a: float = 4.0, c: float = 1.0, seed: int = None, params: Dict = PARAMETERS, progress=None) -> Dict:
+    """
+    SPSA 调参：每轮对所有参数同时做 ±1 随机扰动，让正、负扰动两组参数对弈 games 盘，
+    以胜负差作为梯度的估计更新参数。每轮结束后写入检查点与当前的配置文件，
+    检查点存在时从中断处继续
+    Args:
+        engine: 基础引擎名称（见 ai.engines）
+        iterations: 总轮数（含检查点中已完成的轮数）
+        games: 每轮对弈的盘数（取偶数，每个随机开局双方各先手一次）
+        checkpoint: 检查点文件
+        config: 输出的引擎配置文件，可被 Game.load_config 加载
+        workers: 进程数，默认使用全部CPU核心
+        size: 棋盘大小
+        time_limit: 每步搜索时间（秒）
+        a: 学习率系数，第 k 轮的学习率为 a / (k + 1 + A)^0.602，A 为总轮数的10%
+        c: 扰动系数，第 k 轮的扰动为 扰动步长 * c / (k + 1)^0.101
+        seed: 随机种子，默认随机（续跑时沿用检查点中的种子）
+        params: 参数声明，格式同 PARAMETERS
+        progress: 可选的回调函数，每轮结束后以该轮写入检查点的历史记录（另加 'seconds'）调用一次
+    Returns:
+        Dict: 调参得到的参数
+    """
+    if os.path.exists(checkpoint):
+        with open(checkpoint, encoding='utf-8') as f:
+            state = json.load(f)
+        if state['engine'] != engine:
+            raise ValueError(f"检查点的引擎为 {state['engine']}，与 {engine} 不一致")
+        logging.warning(f"从检查点继续: 第 {state['iteration']} 轮，参数 {state['theta']}")
+    else:
+        state = {'engine': engine, 'iteration': 0, 'seed': seed if seed is not None else random.randrange(1 << 30),
+                 'theta': {name: float(spec[0]) for name, spec in params.items()}, 'history': []}
+
+    workers = workers or os.cpu_count() or 1
+    executor = get_executor(workers)
+    games += games % 2
+    stability = 0.1 * iterations
+    while state['iteration'] < iterations:
+        k = state['iteration']
+        start_time = time.time()
+        rng = random.Random(state['seed'] + k)
+        c_k = c / (k + 1) ** 0.101
+        a_k = a / (k + 1 + stability) ** 0.602
+        theta = state['theta']
+        delta = {name: rng.choice((-1, 1)) for name in theta}
+        plus = clip_params({name: theta[name] + c_k * params[name][3] * delta[name] for name in theta}, params)
+        minus = clip_params({name: theta[name] - c_k * params[name][3] * delta[name] for name in theta}, params)
+
+        spec_plus, spec_minus = engine_spec(engine, plus), engine_spec(engine, minus)
+        round_seed = rng.randrange(1 << 30)
+        futures = dict(submit_game(executor, spec_plus, spec_minus, i, size, time_limit, round_seed)
+                       for i in range(games))
+        wait(futures)
+        wins = sum((future.result() == 'first') == plus_first for future, plus_first in futures.items())
+        result = (2 * wins - games) / games
+
+        # 在以扰动步长为单位的坐标中做梯度上升
+        for name in theta:
+            step = params[name][3]
+            theta[name] += step * a_k * result * delta[name] / (2.0 * c_k)
+            theta[name] = min(max(theta[name], params[name][1]), params[name][2])
+        state['iteration'] = k + 1
+        state['history'].append({'iteration': k + 1, 'plus': plus, 'minus': minus, 'wins': wins, 'games': games,
+                                 'theta': clip_params(theta, params)})
+        _write_json(checkpoint, state)
+        _write_json(config, {'engine': engine, 'params': clip_params(theta, params), 'iterations': k + 1})
+        if progress is not None:
+            progress(dict(state['history'][-1], seconds=round(time.time() - start_time, 1)))
+    return clip_params(state['theta'], params)
+
+
+def _print_progress(info: Dict, iterations: int):
+    print(f"第 {info['iteration']}/{iterations} 轮  正扰动 {info['wins']}:{info['games'] - info['wins']} 负扰动  "
+          f"参数 {info['theta']}  用时 {info['seconds']} 秒", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用SPSA和并行自我对弈调整引擎参数')
+    parser.add_argument('--engine', default='mcts', help='基础引擎名称')
+    parser.add_argument('--iterations', type=int, default=100, help='总轮数')
+    parser.add_argument('--games', type=int, default=16, help='每轮对弈的盘数')
+    parser.add_argument('--checkpoint', default='tune_checkpoint.json', help='检查点文件（存在时继续调参）')
+    parser.add_argument('--config', default='tuned.json', help='输出的引擎配置文件（可被 Game.load_config 加载）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认使用全部CPU核心')
+    parser.add_argument('--size', type=int, default=11, help='棋盘大小')
+    parser.add_argument('--time', type=float, default=0.5, help='每步搜索时间（秒）')
+    parser.add_argument('--a', type=float, default=4.0, help='学习率系数')
+    parser.add_argument('--c', type=float, default=1.0, help='扰动系数')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    tuned = spsa(args.engine, args.iterations, args.games, args.checkpoint, args.config, workers=args.workers,
+                 size=args.size, time_limit=args.time, a=args.a, c=args.c, seed=args.seed,
+                 progress=lambda info: _print_progress(info, args.iterations))
+    print(json.dumps({'engine': args.engine, 'params': tuned}, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
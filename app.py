@@ -1,11 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import sys
 import os
+import json
 import logging
 import traceback
 from datetime import datetime
+from functools import wraps
 from core.game import Game
+from core.sessions import SessionRegistry, SessionLimitReached
+from core.jobs import JobManager, JobQueueFull
+from core.scheduler import SearchScheduler, SearchQueueFull
+from core.engine_pool import EnginePool, ENGINE_SERVER
 from core.utils import move_to_coord, coord_to_move, get_symmetric_move
 from core.board import Board
 
@@ -30,8 +36,52 @@ console_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s
 console_handler.setFormatter(console_formatter)
 logging.getLogger().addHandler(console_handler)
 
-# 创建游戏实例
-game = Game()
+# 所有会话共用的搜索调度器：设置 HEX_ENGINE_SERVER 时把搜索发给常驻的 GTP 引擎进程（连接池），
+# 否则在本机固定大小的进程池中按时间片轮转
+scheduler = EnginePool(ENGINE_SERVER) if ENGINE_SERVER else SearchScheduler()
+
+# 按会话保存的游戏实例，每个玩家（浏览器）一局
+sessions = SessionRegistry(factory=lambda: Game(scheduler=scheduler))
+SESSION_COOKIE = 'hex_session'
+
+# 异步搜索任务（有界线程池）
+jobs = JobManager()
+
+
+def _session_id():
+    """从请求体、查询参数或 Cookie 中获取会话编号"""
+    data = request.get_json(silent=True) or {}
+    return data.get('session_id') or request.args.get('session_id') or request.cookies.get(SESSION_COOKIE)
+
+
+def _session_response(session, payload: dict):
+    """在响应中带上会话编号（响应体与 Cookie）"""
+    payload['session_id'] = session.id
+    response = jsonify(payload)
+    response.set_cookie(SESSION_COOKIE, session.id, httponly=True, samesite='Lax')
+    return response
+
+
+def _search_busy(error):
+    """搜索队列已满时的响应（已执行的玩家落子保留，稍后可重新请求 /api/ai_move）"""
+    logging.warning(f"拒绝搜索请求: {error}")
+    return jsonify({'error': 'Search queue is full, please retry later', 'retry': '/api/ai_move'}), 503
+
+
+def with_game(view):
+    """查找请求所属的会话，在会话锁内以该会话的 Game 调用视图函数"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        session = sessions.get(_session_id())
+        if session is None:
+            logging.warning("会话不存在或已过期")
+            return jsonify({'error': 'Session not found, please start a new game'}), 404
+        try:
+            with session.lock:
+                return view(session.game, *args, **kwargs)
+        finally:
+            sessions.release(session)
+    return wrapper
 
 @app.route('/')
 def index():
@@ -46,196 +96,327 @@ def init_game():
         data = request.json
         is_first = data.get('first', True)
         difficulty = data.get('difficulty', 'medium')
+        engine = data.get('engine')  # 未指定时使用各难度的默认引擎
+        ponder = data.get('ponder', False)
         
-        logging.info(f"初始化游戏 - 玩家选择先手: {is_first}, 难度: {difficulty}")
-        
-        # 重置游戏
-        global game
-        game = Game()
+        logging.info(f"初始化游戏 - 玩家选择先手: {is_first}, 难度: {difficulty}, 引擎: {engine}, 后台思考: {ponder}")
         
-        # 设置AI难度
-        game.set_difficulty(difficulty)
-        
-        if is_first:
-            # 如果前端选择先手，则后端为后手
-            game.my_color = 'B'  # AI使用蓝色
-            logging.info("玩家选择先手，AI使用蓝色")
-            return jsonify({
-                'success': True,
-                'current_player': game.current_color
-            })
-        else:
-            # 前端选择后手，AI先手
-            game.my_color = 'R'  # AI使用红色
-            logging.info("玩家选择后手，AI使用红色并先行")
-            move = game.handle_first_move()
+        # 为会话创建新游戏（已有会话时先关闭旧游戏，停止后台思考并释放搜索树）
+        session, _ = sessions.create(_session_id())
+        with session.lock:
+            game = session.game
+            sessions.release(session)  # 已持有会话锁，淘汰时会跳过该会话
+            
+            # 设置AI难度、搜索引擎与后台思考
+            game.set_difficulty(difficulty)
+            if engine:
+                game.set_engine(engine)
+            game.set_ponder(ponder)
             
-            if not move:
-                logging.error("AI首步落子失败")
-                return jsonify({'error': 'AI failed to make the first move'}), 500
+            if is_first:
+                # 如果前端选择先手，则后端为后手
+                game.my_color = 'B'  # AI使用蓝色
+                logging.info("玩家选择先手，AI使用蓝色")
+                return _session_response(session, {
+                    'success': True,
+                    'current_player': game.current_color
+                })
+            else:
+                # 前端选择后手，AI先手
+                game.my_color = 'R'  # AI使用红色
+                logging.info("玩家选择后手，AI使用红色并先行")
+                move = game.handle_first_move()
                 
-            logging.info(f"AI首步: {move}")
-            return jsonify({
-                'success': True,
-                'move': move,
-                'current_player': game.current_color
-            })
+                if not move:
+                    logging.error("AI首步落子失败")
+                    return jsonify({'error': 'AI failed to make the first move'}), 500
+                    
+                logging.info(f"AI首步: {move}")
+                game.start_pondering()
+                return _session_response(session, {
+                    'success': True,
+                    'move': move,
+                    'current_player': game.current_color
+                })
+    except SessionLimitReached as e:
+        logging.warning(f"拒绝创建会话: {e}")
+        return jsonify({'error': 'Too many active games, please retry later'}), 503
     except Exception as e:
         error_msg = f"初始化游戏失败: {str(e)}\n{traceback.format_exc()}"
         logging.error(error_msg)
         return jsonify({'error': error_msg}), 500
 
-@app.route('/api/move', methods=['POST'])
-def make_move():
-    """接收前端的移动并响应"""
-    try:
-        data = request.json
-        move_str = data.get('move')
-        difficulty = data.get('difficulty', 'medium')
-        
-        if not move_str:
-            return jsonify({'error': 'No move provided'}), 400
-        
-        logging.info(f"收到玩家移动请求: {move_str}, 难度: {difficulty}")
-        
-        # 更新AI难度
-        game.set_difficulty(difficulty)
-        
-        # 解析前端移动
-        move = game._parse_move(move_str)
-        if not move:
-            logging.error(f"无效的移动格式: {move_str}")
-            return jsonify({'error': 'Invalid move format'}), 400
-        
-        # 执行移动
-        success = game.make_move(move)
-        if not success:
-            logging.error(f"无效移动: {move_str} -> ({move[0]},{move[1]})")
-            return jsonify({'error': 'Invalid move'}), 400
-        
+def _play_move(game, data, progress=None):
+    """执行玩家的移动并由AI应对
+    Args:
+        game: 会话的游戏
+        data: 请求数据（move、difficulty）
+        progress: 可选的搜索进度回调
+    Returns:
+        Tuple[dict, int]: (响应数据, HTTP状态码)
+    """
+    move_str = data.get('move')
+    difficulty = data.get('difficulty', 'medium')
+    
+    if not move_str:
+        return {'error': 'No move provided'}, 400
+    
+    logging.info(f"收到玩家移动请求: {move_str}, 难度: {difficulty}")
+    
+    # 更新AI难度
+    game.set_difficulty(difficulty)
+    
+    # 解析前端移动
+    move = game._parse_move(move_str)
+    if not move:
+        logging.error(f"无效的移动格式: {move_str}")
+        return {'error': 'Invalid move format'}, 400
+    
+    # 执行移动
+    success = game.make_move(move)
+    if not success:
+        logging.error(f"无效移动: {move_str} -> ({move[0]},{move[1]})")
+        return {'error': 'Invalid move'}, 400
+    
+    # 检查游戏是否结束
+    winner = game.get_winner()
+    if winner:
+        logging.info(f"游戏结束，获胜者: {winner}")
+        return {
+            'success': True,
+            'current_player': game.current_color,
+            'game_over': True,
+            'winner': winner
+        }, 200
+    
+    # 获取AI的响应
+    logging.info("请求AI响应...")
+    ai_move = game.get_ai_move(progress)
+    
+    if ai_move:
+        logging.info(f"AI响应: {ai_move}")
         # 检查游戏是否结束
         winner = game.get_winner()
         if winner:
-            logging.info(f"游戏结束，获胜者: {winner}")
-            return jsonify({
-                'success': True,
-                'current_player': game.current_color,
-                'game_over': True,
-                'winner': winner
-            })
-        
-        # 获取AI的响应
-        logging.info("请求AI响应...")
-        ai_move = game.get_ai_move()
+            logging.info(f"AI移动后游戏结束，获胜者: {winner}")
+            
+        response = {
+            'success': True,
+            'move': ai_move,
+            'current_player': game.current_color,
+            'game_over': winner is not None,
+            'winner': winner
+        }
+        game.start_pondering()
+        logging.info(f"返回响应: {response}")
+        return response, 200
+    else:
+        logging.info("AI未生成响应，可能是游戏已结束")
+        return {
+            'success': True,
+            'current_player': game.current_color,
+            'game_over': False
+        }, 200
+
+def _ai_move(game, data, progress=None):
+    """由AI走下一步
+    Args:
+        game: 会话的游戏
+        data: 请求数据（difficulty）
+        progress: 可选的搜索进度回调
+    Returns:
+        Tuple[dict, int]: (响应数据, HTTP状态码)
+    """
+    difficulty = data.get('difficulty', 'medium')
+    logging.info(f"直接请求AI移动，难度: {difficulty}")
+    
+    # 更新AI难度
+    game.set_difficulty(difficulty)
+    
+    ai_move = game.get_ai_move(progress)
+    
+    if not ai_move:
+        logging.error("AI未能生成移动")
+        return {'error': 'AI failed to generate a move'}, 500
+    
+    # 检查游戏是否结束
+    winner = game.get_winner()
+    if winner:
+        logging.info(f"AI移动后游戏结束，获胜者: {winner}")
         
-        if ai_move:
-            logging.info(f"AI响应: {ai_move}")
-            # 检查游戏是否结束
-            winner = game.get_winner()
-            if winner:
-                logging.info(f"AI移动后游戏结束，获胜者: {winner}")
-                
-            response = {
-                'success': True,
-                'move': ai_move,
-                'current_player': game.current_color,
-                'game_over': winner is not None,
-                'winner': winner
-            }
-            logging.info(f"返回响应: {response}")
-            return jsonify(response)
-        else:
-            logging.info("AI未生成响应，可能是游戏已结束")
-            return jsonify({
-                'success': True,
-                'current_player': game.current_color,
-                'game_over': False
-            })
+    response = {
+        'move': ai_move,
+        'current_player': game.current_color,
+        'game_over': winner is not None,
+        'winner': winner
+    }
+    game.start_pondering()
+    logging.info(f"返回AI移动: {response}")
+    return response, 200
+
+def _swap(game, data, progress=None):
+    """应用交换规则，随后由AI走下一步
+    Args:
+        game: 会话的游戏
+        data: 请求数据（difficulty）
+        progress: 可选的搜索进度回调
+    Returns:
+        Tuple[dict, int]: (响应数据, HTTP状态码)
+    """
+    difficulty = data.get('difficulty', 'medium')
+    
+    logging.info(f"交换规则请求，难度: {difficulty}")
+    game.set_difficulty(difficulty)
+    
+    # 确保只有在第一步后才能交换
+    if len(game.move_history) != 1:
+        logging.error(f"交换规则只能在第一步后使用! 当前历史: {len(game.move_history)}")
+        return {'error': 'Swap is only allowed after the first move'}, 400
+    
+    # 处理交换
+    success = game.handle_swap()
+    if not success:
+        logging.error("应用交换规则失败")
+        return {'error': 'Failed to apply swap rule'}, 400
+    
+    # 交换后由AI下一步棋
+    logging.info("交换后请求AI移动...")
+    ai_move = game.get_ai_move(progress)
+    
+    # 对称位置的格式化
+    first_move = game.move_history[0][0]  # 获取坐标元组
+    symmetric_move = game._format_move(first_move[0], first_move[1])
+    
+    response = {
+        'success': True,
+        'symmetric_move': symmetric_move,
+        'move': ai_move,
+        'current_player': game.current_color
+    }
+    game.start_pondering()
+    
+    logging.info(f"交换规则应用成功，返回: {response}")
+    return response, 200
+
+@app.route('/api/move', methods=['POST'])
+@with_game
+def make_move(game):
+    """接收前端的移动并响应"""
+    try:
+        payload, status = _play_move(game, request.json)
+        return jsonify(payload), status
+    except SearchQueueFull as e:
+        return _search_busy(e)
     except Exception as e:
         error_msg = f"处理移动失败: {str(e)}\n{traceback.format_exc()}"
         logging.error(error_msg)
         return jsonify({'error': error_msg}), 500
 
 @app.route('/api/ai_move', methods=['GET'])
-def get_ai_move():
+@with_game
+def get_ai_move(game):
     """获取AI的下一步移动"""
     try:
-        difficulty = request.args.get('difficulty', 'medium')
-        logging.info(f"直接请求AI移动，难度: {difficulty}")
-        
-        # 更新AI难度
-        game.set_difficulty(difficulty)
-        
-        ai_move = game.get_ai_move()
-        
-        if not ai_move:
-            logging.error("AI未能生成移动")
-            return jsonify({'error': 'AI failed to generate a move'}), 500
-        
-        # 检查游戏是否结束
-        winner = game.get_winner()
-        if winner:
-            logging.info(f"AI移动后游戏结束，获胜者: {winner}")
-            
-        response = {
-            'move': ai_move,
-            'current_player': game.current_color,
-            'game_over': winner is not None,
-            'winner': winner
-        }
-        logging.info(f"返回AI移动: {response}")
-        return jsonify(response)
+        payload, status = _ai_move(game, request.args)
+        return jsonify(payload), status
+    except SearchQueueFull as e:
+        return _search_busy(e)
     except Exception as e:
         error_msg = f"获取AI移动失败: {str(e)}\n{traceback.format_exc()}"
         logging.error(error_msg)
         return jsonify({'error': error_msg}), 500
 
 @app.route('/api/swap', methods=['POST'])
-def swap():
+@with_game
+def swap(game):
     """处理交换规则"""
     try:
         logging.info("收到交换规则请求")
-        data = request.json or {}
-        difficulty = data.get('difficulty', 'medium')
-        
-        logging.info(f"交换规则请求，难度: {difficulty}")
-        game.set_difficulty(difficulty)
-        
-        # 确保只有在第一步后才能交换
-        if len(game.move_history) != 1:
-            logging.error(f"交换规则只能在第一步后使用! 当前历史: {len(game.move_history)}")
-            return jsonify({'error': 'Swap is only allowed after the first move'}), 400
-        
-        # 处理交换
-        success = game.handle_swap()
-        if not success:
-            logging.error("应用交换规则失败")
-            return jsonify({'error': 'Failed to apply swap rule'}), 400
-        
-        # 交换后由AI下一步棋
-        logging.info("交换后请求AI移动...")
-        ai_move = game.get_ai_move()
-        
-        # 对称位置的格式化
-        first_move = game.move_history[0][0]  # 获取坐标元组
-        symmetric_move = game._format_move(first_move[0], first_move[1])
-        
-        response = {
-            'success': True,
-            'symmetric_move': symmetric_move,
-            'move': ai_move,
-            'current_player': game.current_color
-        }
-        
-        logging.info(f"交换规则应用成功，返回: {response}")
-        return jsonify(response)
+        payload, status = _swap(game, request.json or {})
+        return jsonify(payload), status
+    except SearchQueueFull as e:
+        return _search_busy(e)
     except Exception as e:
         error_msg = f"处理交换规则失败: {str(e)}\n{traceback.format_exc()}"
         logging.error(error_msg)
         return jsonify({'error': error_msg}), 500
 
+# 可异步执行的操作：名称 -> 处理函数
+JOB_ACTIONS = {'move': _play_move, 'ai_move': _ai_move, 'swap': _swap}
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """异步执行 move/ai_move/swap：立即返回任务编号，搜索在后台线程池中进行，
+    进度与结果通过 /api/jobs/<job_id>/events 的 SSE 事件流获取"""
+    data = request.get_json(silent=True) or {}
+    handler = JOB_ACTIONS.get(data.get('action'))
+    if handler is None:
+        return jsonify({'error': f"Unknown action, expected one of {list(JOB_ACTIONS)}"}), 400
+    session = sessions.get(_session_id())
+    if session is None:
+        return jsonify({'error': 'Session not found, please start a new game'}), 404
+
+    # 会话在任务执行结束前保持取得状态，排队期间不会被淘汰
+    def run(job):
+        try:
+            with session.lock:
+                try:
+                    return handler(session.game, data, job.progress)
+                except SearchQueueFull as e:
+                    logging.warning(f"拒绝搜索请求: {e}")
+                    return {'error': 'Search queue is full, please retry later', 'retry': '/api/ai_move'}, 503
+        finally:
+            sessions.release(session)
+
+    try:
+        job = jobs.submit(run, session.id)
+    except JobQueueFull as e:
+        sessions.release(session)
+        logging.warning(f"拒绝任务: {e}")
+        return jsonify({'error': 'Server busy, please retry later'}), 503
+    return jsonify({
+        'job_id': job.id,
+        'session_id': session.id,
+        'status': job.status,
+        'events': f"/api/jobs/{job.id}/events"
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """查询任务状态、最近一次进度与结果"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.snapshot())
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """以 Server-Sent Events 推送任务事件：queued、started、progress（约每500次模拟）、done 或 error；
+    断线重连时按 Last-Event-ID 从下一个事件继续"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    start = int(last_id) + 1 if last_id and last_id.isdigit() else 0
+
+    def generate():
+        for index, event, data in job.stream(start):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"id: {index}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """搜索调度器指标：排队深度、进行中的时间片、拒绝/降级计数、等待时间与总用时的分布"""
+    return jsonify({'scheduler': scheduler.metrics(), 'sessions': len(sessions)})
+
 @app.route('/api/board', methods=['GET'])
-def get_board_state():
+@with_game
+def get_board_state(game):
     """获取当前棋盘状态"""
     try:
         logging.info("请求棋盘状态")
@@ -254,9 +435,10 @@ def get_board_state():
         # 添加棋子信息
         for r in range(game.board.size):
             for c in range(game.board.size):
-                if game.board.red_stones[r][c]:
+                color = game.board.get_color(r, c)
+                if color == 'R':
                     board_state['red_stones'].append((r, c))
-                elif game.board.blue_stones[r][c]:
+                elif color == 'B':
                     board_state['blue_stones'].append((r, c))
         
         # 添加移动历史
@@ -274,6 +456,15 @@ def get_board_state():
         logging.error(error_msg)
         return jsonify({'error': error_msg}), 500
 
+@app.route('/api/close', methods=['POST'])
+def close_session():
+    """结束会话，释放游戏与搜索树"""
+    session_id = _session_id()
+    closed = bool(session_id) and sessions.close(session_id)
+    response = jsonify({'success': closed})
+    response.delete_cookie(SESSION_COOKIE)
+    return response
+
 if __name__ == '__main__':
     try:
         logging.info("启动Flask应用，端口:5000")
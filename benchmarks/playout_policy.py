@@ -0,0 +1,104 @@
+# encoding: utf-8
+"""模拟策略基准
+
+1. 在多个固定种子的11x11开局局面上比较 RandomPolicy 与 PatternPolicy 每秒的模拟次数（取平均）；
+2. 让使用两种策略的 MCTS 对弈若干盘，统计模式策略的胜率。每两盘使用同一个随机开局（随机落下的前几手），
+   双方各执红一次，避免所有对局都从空棋盘走出同一盘棋。
+
+用法（在项目根目录）: python -m benchmarks.playout_policy [--seconds 3] [--positions 4] [--games 10] [--size 7]
+                                                     [--time 1] [--opening 2] [--seed 0]
+"""
+import argparse
+import json
+import logging
+import random
+import time
+
+from core.board import Board
+from ai.mcts import MCTS
+from ai.policy import RANDOM_POLICY, PATTERN_POLICY
+from benchmarks.positions import opening_positions, to_move
+
+POLICIES = {'random': RANDOM_POLICY, 'pattern': PATTERN_POLICY}
+
+
+def playout_rate(policy, seconds: float, positions: int = 4) -> float:
+    """在 positions 个开局局面上各模拟 seconds / positions 秒，返回总的每秒模拟次数"""
+    count = 0
+    elapsed = 0.0
+    for board in opening_positions(positions):
+        color = to_move(board)
+        root = MCTS(board, color, color, policy=policy)
+        start = time.time()
+        while time.time() - start < seconds / positions:
+            root.simulate()
+            count += 1
+        elapsed += time.time() - start
+    return count / elapsed
+
+
+def play_game(size: int, time_limit: float, red_policy, blue_policy, opening: int = 0, seed: int = 0) -> str:
+    """
+    两种策略的 MCTS 对弈一盘，返回获胜方颜色
+    Args:
+        size: 棋盘大小
+        time_limit: 每步的搜索时间（秒）
+        red_policy: 红方的模拟策略
+        blue_policy: 蓝方的模拟策略
+        opening: 开局随机落子的步数
+        seed: 随机开局的种子
+    """
+    board = Board(size)
+    policies = {'R': red_policy, 'B': blue_policy}
+    color = 'R'
+    rng = random.Random(seed)
+    for _ in range(opening):
+        row, col = rng.choice(board.available)
+        board.place_stone(row, col, color)
+        color = 'B' if color == 'R' else 'R'
+    while board.check_winner() is None:
+        engine = MCTS(board, color, color, policy=policies[color])
+        action = engine.search(time_limit=time_limit)[0]
+        board.place_stone(action[0], action[1], color)
+        color = 'B' if color == 'R' else 'R'
+    return board.check_winner()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟策略基准')
+    parser.add_argument('--seconds', type=float, default=3.0, help='测量模拟速度的时间（秒）')
+    parser.add_argument('--positions', type=int, default=4, help='测量模拟速度的开局局面数')
+    parser.add_argument('--games', type=int, default=10, help='对弈盘数（双方轮流执红）')
+    parser.add_argument('--size', type=int, default=7, help='对弈的棋盘大小')
+    parser.add_argument('--time', type=float, default=1.0, help='对弈中每步的搜索时间（秒）')
+    parser.add_argument('--opening', type=int, default=2, help='对弈开局随机落子的步数')
+    parser.add_argument('--seed', type=int, default=0, help='随机开局的基础种子')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rates = {}
+    for name, policy in POLICIES.items():
+        rates[name] = round(playout_rate(policy, args.seconds, args.positions), 1)
+        print(f"policy={name:8s}  playouts/s={rates[name]:9.1f}")
+
+    wins = 0
+    for game in range(args.games):
+        pattern_color = 'R' if game % 2 == 0 else 'B'
+        seed = args.seed + game // 2
+        if pattern_color == 'R':
+            winner = play_game(args.size, args.time, PATTERN_POLICY, RANDOM_POLICY, args.opening, seed)
+        else:
+            winner = play_game(args.size, args.time, RANDOM_POLICY, PATTERN_POLICY, args.opening, seed)
+        wins += winner == pattern_color
+        print(f"game={game + 1:3d}  opening={seed}  pattern={pattern_color}  winner={winner}")
+    win_rate = wins / args.games if args.games else 0.0
+    print(f"pattern vs random: {wins}/{args.games}  win_rate={win_rate:.3f}")
+
+    print(json.dumps({'playouts_per_sec': rates, 'positions': args.positions, 'games': args.games,
+                      'size': args.size, 'time_per_move': args.time, 'opening': args.opening, 'seed': args.seed,
+                      'pattern_wins': wins, 'win_rate': round(win_rate, 3)},
+                     ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# encoding: utf-8
+"""基准脚本共用的测试局面"""
+import random
+from typing import List
+
+from core.board import Board
+
+
+def make_position(size: int, moves: int, seed: int) -> Board:
+    """生成固定种子的局面（随机落子，跳过会分出胜负的落子）"""
+    rng = random.Random(seed)
+    board = Board(size)
+    color = 'R'
+    while board.move_count < moves:
+        row, col = rng.choice(board.available)
+        token = board.place_stone(row, col, color)
+        if board.check_winner() is not None:
+            board.undo(token)
+            continue
+        color = 'B' if color == 'R' else 'R'
+    return board
+
+
+def opening_position(seed: int = 2024, moves: int = 6, size: int = 11) -> Board:
+    """生成固定种子的开局局面"""
+    return make_position(size, moves, seed)
+
+
+def opening_positions(count: int, seed: int = 2024, moves: int = 6, size: int = 11) -> List[Board]:
+    """生成 count 个不同种子的开局局面，测量在多个局面上取平均，避免结果依赖单一开局"""
+    return [make_position(size, moves, seed + i) for i in range(count)]
+
+
+def to_move(board: Board) -> str:
+    """局面的行棋方"""
+    return 'R' if board.move_count % 2 == 0 else 'B'
@@ -0,0 +1,324 @@
+# encoding: utf-8
+"""核心操作基准套件
+
+在固定种子生成的 11x11 与 19x19 局面上测量：
+Board.place_stone（含 undo）、Board.check_winner、UnionFind.find/union、棋盘复制、
+MCTS.simulate（每秒模拟次数）、MCTS.search（固定时间的每秒模拟次数、固定模拟次数的用时）、
+MCTS 与 ArrayMCTS 的每秒模拟次数与固定模拟次数的内存峰值、
+H-search（从头计算与增量计算的每秒次数），以及 ai.engines 中每个引擎固定时间搜索的每秒模拟次数。
+每个项目重复测量 repeat 次取最好的一次（噪声只会让结果变差），同时记录相对离散度
+（(最好 - 最差) / 最好）。结果以 JSON 输出；与基线比较时，允许的变差取 threshold 与
+两次测量中较大离散度的2倍中的较大者，超过的项目标记为回退。共享或单核机器上的噪声常常超过离散度，
+比较结果默认只作提示；在安静的专用机器上加 --strict 时，有回退则以退出码 1 结束。
+
+用法（在项目根目录）: python -m benchmarks.suite [--seconds 1] [--repeat 5] [--filter search]
+                      [--output result.json] [--baseline benchmarks/baseline.json] [--threshold 0.1] [--strict]
+                      [--save-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+from core.board import Board, UnionFind
+from ai.mcts import MCTS
+from ai.array_mcts import ArrayMCTS
+from ai.hsearch import HSearch
+from ai.engines import available_engines
+from benchmarks.positions import make_position, to_move
+
+# 默认基线文件
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# 测试局面：名称 -> (棋盘大小, 随机落子数, 种子)
+POSITIONS = {
+    '11-opening': (11, 6, 2024),
+    '11-middle': (11, 30, 2025),
+    '19-opening': (19, 10, 2026),
+    '19-middle': (19, 80, 2027),
+}
+
+
+def throughput(step, seconds: float) -> float:
+    """反复调用 step（每次返回完成的操作数），返回每秒操作数"""
+    done = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        done += step()
+        now = time.perf_counter()
+        if now >= deadline:
+            return done / (now - start)
+
+
+def bench_place_stone(board: Board, seconds: float) -> float:
+    """在每个空位落子后立即撤销"""
+    cells = list(board.available)
+    color = to_move(board)
+
+    def step():
+        for row, col in cells:
+            board.undo(board.place_stone(row, col, color))
+        return len(cells)
+    return throughput(step, seconds)
+
+
+def bench_check_winner(board: Board, seconds: float) -> float:
+    def step():
+        for _ in range(1000):
+            board.check_winner()
+        return 1000
+    return throughput(step, seconds)
+
+
+def bench_union_find(board: Board, seconds: float) -> float:
+    """固定种子的随机 union 与 find 序列，每轮结束后回滚"""
+    n = board.size * board.size + 2
+    rng = random.Random(n)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(n)]
+    queries = [rng.randrange(n) for _ in range(n)]
+    uf = UnionFind(n)
+
+    def step():
+        mark = uf.snapshot()
+        for x, y in pairs:
+            uf.union(x, y)
+        for x in queries:
+            uf.find(x)
+        uf.rollback(mark)
+        return len(pairs) + len(queries)
+    return throughput(step, seconds)
+
+
+def bench_copy(board: Board, seconds: float) -> float:
+    def step():
+        for _ in range(100):
+            board.copy()
+        return 100
+    return throughput(step, seconds)
+
+
+def bench_simulate(board: Board, seconds: float) -> float:
+    """根节点上反复随机模拟到终局"""
+    random.seed(0)
+    root = MCTS(board, to_move(board), to_move(board))
+
+    def step():
+        root.simulate()
+        return 1
+    return throughput(step, seconds)
+
+
+def _search_rate(engine, board: Board, seconds: float) -> float:
+    """用引擎构造函数 (hex, color, ai_color) 固定时间搜索，返回每秒模拟次数"""
+    random.seed(0)
+    tree = engine(board, to_move(board), to_move(board))
+    try:
+        _, _, count, elapsed = tree.search(time_limit=seconds)
+    finally:
+        close = getattr(tree, 'close', None)
+        if close is not None:
+            close()
+    return count / elapsed
+
+
+def _search_memory(run, board: Board) -> float:
+    """固定模拟次数（同 bench_search_count）的搜索期间 Python 分配内存的峰值（MB，tracemalloc 统计）
+    Args:
+        run: (棋盘, 模拟次数) -> None，建树并完成指定次数的模拟
+    """
+    random.seed(0)
+    tracemalloc.start()
+    try:
+        run(board, 2000 if board.size <= 11 else 500)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / (1 << 20)
+
+
+def _run_mcts(board: Board, simulations: int):
+    MCTS(board, to_move(board), to_move(board)).search(time_limit=3600.0, max_simulations=simulations)
+
+
+def _run_array(board: Board, simulations: int):
+    tree = ArrayMCTS(board, to_move(board), to_move(board))
+    for _ in range(simulations):
+        tree._iterate()
+
+
+def bench_search_time(board: Board, seconds: float) -> float:
+    """固定搜索时间，返回每秒模拟次数"""
+    return _search_rate(MCTS, board, seconds)
+
+
+def bench_search_time_array(board: Board, seconds: float) -> float:
+    """ArrayMCTS 固定搜索时间，返回每秒模拟次数"""
+    return _search_rate(ArrayMCTS, board, seconds)
+
+
+def bench_search_memory(board: Board, seconds: float) -> float:
+    """MCTS 固定模拟次数的内存峰值（MB）"""
+    return _search_memory(_run_mcts, board)
+
+
+def bench_search_memory_array(board: Board, seconds: float) -> float:
+    """ArrayMCTS 固定模拟次数的内存峰值（MB）"""
+    return _search_memory(_run_array, board)
+
+
+def bench_search_count(board: Board, seconds: float) -> float:
+    """固定模拟次数（按棋盘大小：11路2000次，19路500次），返回用时（秒）"""
+    random.seed(0)
+    simulations = 2000 if board.size <= 11 else 500
+    start = time.perf_counter()
+    MCTS(board, to_move(board), to_move(board)).search(time_limit=3600.0, max_simulations=simulations)
+    return time.perf_counter() - start
+
+
+def _hsearch_throughput(board: Board, seconds: float, incremental: bool) -> float:
+    """固定种子选取4个走法，落子后为双方各做一次 H-search（增量时以落子前的结果为父局面）"""
+    moves = random.Random(board.size).sample(list(board.available), 4)
+    color = to_move(board)
+    parents = {side: HSearch(board, side) for side in 'RB'}
+
+    def step():
+        for row, col in moves:
+            token = board.place_stone(row, col, color)
+            for side in 'RB':
+                if incremental:
+                    HSearch(board, side, parent=parents[side], move=row * board.size + col)
+                else:
+                    HSearch(board, side)
+            board.undo(token)
+        return len(moves) * 2
+    return throughput(step, seconds)
+
+
+def bench_hsearch_full(board: Board, seconds: float) -> float:
+    """从头计算 H-search，返回每秒次数"""
+    return _hsearch_throughput(board, seconds, False)
+
+
+def bench_hsearch_incremental(board: Board, seconds: float) -> float:
+    """在父局面的结果上增量计算 H-search，返回每秒次数"""
+    return _hsearch_throughput(board, seconds, True)
+
+
+# 基准项目：名称 -> (函数, 单位, 是否越大越好)
+BENCHMARKS = {
+    'place_stone': (bench_place_stone, 'ops/s', True),
+    'check_winner': (bench_check_winner, 'ops/s', True),
+    'union_find': (bench_union_find, 'ops/s', True),
+    'copy': (bench_copy, 'ops/s', True),
+    'simulate': (bench_simulate, 'playouts/s', True),
+    'search_time': (bench_search_time, 'sims/s', True),
+    'search_count': (bench_search_count, 's', False),
+    'search_time_array': (bench_search_time_array, 'sims/s', True),
+    'search_memory': (bench_search_memory, 'MB', False),
+    'search_memory_array': (bench_search_memory_array, 'MB', False),
+    'hsearch_full': (bench_hsearch_full, 'hsearch/s', True),
+    'hsearch_incremental': (bench_hsearch_incremental, 'hsearch/s', True),
+}
+# 注册表中的每个引擎（含权重或调参配置存在时的 'puct'/'tuned'）固定时间搜索的每秒模拟次数
+# （alphabeta 为每秒搜索的节点数）
+for _name, _engine in available_engines().items():
+    BENCHMARKS[f'engine_{_name}'] = (partial(_search_rate, _engine), 'sims/s', True)
+
+
+def run(seconds: float = 1.0, repeat: int = 5, pattern: str = '') -> dict:
+    """
+    运行基准
+    Args:
+        seconds: 每次测量的时长（秒）
+        repeat: 重复次数，取最好的一次
+        pattern: 只运行名称中包含该字符串的项目
+    Returns:
+        dict: {项目名/局面名: {'value', 'spread', 'unit', 'higher_is_better'}}，spread 为相对离散度
+    """
+    results = {}
+    for position, (size, moves, seed) in POSITIONS.items():
+        for name, (func, unit, higher) in BENCHMARKS.items():
+            key = f"{name}/{position}"
+            if pattern not in key:
+                continue
+            values = [func(make_position(size, moves, seed), seconds) for _ in range(repeat)]
+            value = max(values) if higher else min(values)
+            spread = (max(values) - min(values)) / value if value else 0.0
+            results[key] = {'value': round(value, 4), 'spread': round(spread, 4), 'unit': unit,
+                            'higher_is_better': higher}
+            print(f"{key:28s} {value:14.2f} {unit}  离散度 {spread:.1%}", file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """
+    与基线比较
+    Args:
+        results: 本次结果
+        baseline: 基线结果（同样的格式）
+        threshold: 变差超过该比例视为回退（项目的离散度较大时放宽到离散度的2倍）
+    Returns:
+        dict: {项目: {'baseline', 'value', 'change', 'allowed', 'regression'}}，change 为正表示变好
+    """
+    report = {}
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or not base['value']:
+            continue
+        ratio = result['value'] / base['value']
+        change = ratio - 1.0 if result['higher_is_better'] else 1.0 / ratio - 1.0
+        allowed = max(threshold, 2.0 * max(base.get('spread', 0.0), result.get('spread', 0.0)))
+        report[key] = {'baseline': base['value'], 'value': result['value'], 'change': round(change, 4),
+                       'allowed': round(allowed, 4), 'regression': change < -allowed}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='核心操作基准套件')
+    parser.add_argument('--seconds', type=float, default=1.0, help='每次测量的时长（秒）')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最好的一次')
+    parser.add_argument('--filter', default='', help='只运行名称中包含该字符串的项目，例如 search 或 19-')
+    parser.add_argument('--output', default=None, help='把结果写入该 JSON 文件')
+    parser.add_argument('--baseline', default=BASELINE, help='基线 JSON 文件（存在时进行比较）')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='变差超过该比例视为回退（离散度较大的项目放宽到离散度的2倍）')
+    parser.add_argument('--strict', action='store_true', help='有回退时以退出码 1 结束（默认只作提示）')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    args = parser.parse_args()
+
+    results = run(args.seconds, args.repeat, args.filter)
+    summary = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpu_count': os.cpu_count(), 'seconds': args.seconds, 'repeat': args.repeat},
+        'results': results,
+    }
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report = compare(results, json.load(f)['results'], args.threshold)
+        summary['comparison'] = report
+        regressions = [key for key, item in report.items() if item['regression']]
+        for key, item in report.items():
+            flag = '  REGRESSION' if item['regression'] else ''
+            print(f"{key:28s} {item['change']:+8.1%} (允许 -{item['allowed']:.1%}){flag}", file=sys.stderr)
+        summary['regressions'] = regressions
+
+    text = json.dumps(summary, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=1)
+    print(text)
+    sys.exit(1 if regressions and args.strict else 0)
+
+
+if __name__ == '__main__':
+    main()
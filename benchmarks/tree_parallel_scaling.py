@@ -0,0 +1,52 @@
+# encoding: utf-8
+"""树并行MCTS扩展性基准
+
+在固定的11x11局面上，分别用 1/2/4/8 个工作进程运行 SharedTreeMCTS，
+输出每秒模拟次数及相对单进程的加速比。工作进程常驻，测量前先做一次短搜索让进程启动并接入共享树。
+结果中记录测量机器的 CPU 核数；工作进程数超过核数时的加速比没有意义，应在多核机器上测量。
+
+用法（在项目根目录）: python -m benchmarks.tree_parallel_scaling [--time 5] [--workers 1 2 4 8] [--output result.json]
+"""
+import argparse
+import json
+import os
+
+from ai.tree_parallel import SharedTreeMCTS
+from benchmarks.positions import opening_position, to_move
+
+
+def main():
+    parser = argparse.ArgumentParser(description='树并行MCTS扩展性基准')
+    parser.add_argument('--time', type=float, default=5.0, help='每种进程数的搜索时间（秒）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='要测试的进程数')
+    parser.add_argument('--output', default=None, help='把结果写入该 JSON 文件')
+    args = parser.parse_args()
+
+    board = opening_position()
+    color = to_move(board)
+    results = []
+    base_rate = None
+    for workers in args.workers:
+        tree = SharedTreeMCTS(board, color, color, workers=workers)
+        try:
+            tree.search(time_limit=0.2)
+            _, _, count, elapsed = tree.search(time_limit=args.time)
+            nodes = tree.node_count
+        finally:
+            tree.close()
+        rate = count / elapsed
+        base_rate = base_rate or rate
+        results.append({'workers': workers, 'simulations': count, 'seconds': round(elapsed, 3),
+                        'sims_per_sec': round(rate, 1), 'speedup': round(rate / base_rate, 2),
+                        'nodes': nodes})
+        print(f"workers={workers:2d}  sims={count:7d}  sims/s={rate:9.1f}  speedup={rate / base_rate:5.2f}x  nodes={nodes}")
+
+    text = json.dumps({'cpu_count': os.cpu_count(), 'time': args.time, 'results': results}, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,95 @@
+import random
 from typing import List, Optional, Tuple
 
+# 棋盘格子的紧凑编码
+EMPTY = 0
+RED = 1
+BLUE = 2
+
+COLOR_CODES = {'R': RED, 'B': BLUE}
+CODE_COLORS = ('.', 'R', 'B')
+
+# 六个相邻方向（与棋盘渲染的六边形布局一致）
+DIRECTIONS = ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0))
+
+# 按棋盘大小缓存的邻接表、坐标表与Zobrist随机数表
+_NEIGHBOR_TABLES = {}
+_COORD_TABLES = {}
+_ZOBRIST_TABLES = {}
+
+
+def neighbor_table(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """获取指定大小棋盘的邻接表（按一维编号索引）
+    Args:
+        size: 棋盘大小
+    Returns:
+        Tuple[Tuple[int, ...], ...]: 每个格子的相邻格子编号
+    """
+    table = _NEIGHBOR_TABLES.get(size)
+    if table is None:
+        rows = []
+        for r in range(size):
+            for c in range(size):
+                rows.append(tuple((r + dr) * size + (c + dc)
+                                  for dr, dc in DIRECTIONS
+                                  if 0 <= r + dr < size and 0 <= c + dc < size))
+        table = tuple(rows)
+        _NEIGHBOR_TABLES[size] = table
+    return table
+
+
+def coord_table(size: int) -> Tuple[Tuple[int, int], ...]:
+    """获取一维编号到 (row, col) 坐标的映射表（共享的元组，避免重复分配）"""
+    table = _COORD_TABLES.get(size)
+    if table is None:
+        table = tuple((r, c) for r in range(size) for c in range(size))
+        _COORD_TABLES[size] = table
+    return table
+
+
+def zobrist_table(size: int) -> Tuple[int, ...]:
+    """获取Zobrist随机数表：下标 idx * 3 + 颜色编码 对应一个64位随机数
+    （固定种子生成，不同进程中的同一局面哈希相同）"""
+    table = _ZOBRIST_TABLES.get(size)
+    if table is None:
+        rng = random.Random(0x5A0B21 + size)
+        table = tuple(rng.getrandbits(64) if code else 0
+                      for _ in range(size * size) for code in range(3))
+        _ZOBRIST_TABLES[size] = table
+    return table
+
+
+def should_swap(move: Tuple[int, int], size: int = 11) -> bool:
+    """后手是否对先手的第一步使用交换规则：第一步落在中央区域（11路棋盘为第3~7行、第3~7列）时交换
+    Args:
+        move: 先手第一步的 (row, col)
+        size: 棋盘大小
+    Returns:
+        bool: 是否交换
+    """
+    margin = size * 3 // 11
+    return margin <= move[0] <= size - 1 - margin and margin <= move[1] <= size - 1 - margin
+
+
 class UnionFind:
-    """并查集实现"""
+    """并查集实现
+
+    按秩合并、不做路径压缩（find 为 O(log n)），每次合并写入变更日志，
+    因此可以用 snapshot()/rollback() 精确撤销到任意历史状态。
+    """
     def __init__(self, n):
         self.parent = list(range(n))
         self.rank = [0] * n
-    
+        # 合并日志：被挂接的根编号，若新根的秩因此加一则记录其按位取反
+        self.history = []
+
     def find(self, x):
         """查找x的根节点"""
-        if self.parent[x] != x:
-            self.parent[x] = self.find(self.parent[x])
-        return self.parent[x]
-    
+        parent = self.parent
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
     def union(self, x, y):
         """合并x和y所在的集合"""
         root_x = self.find(x)
@@ -19,16 +97,106 @@ class UnionFind:
         if root_x == root_y:
             return
         if self.rank[root_x] < self.rank[root_y]:
-            self.parent[root_x] = root_y
+            root_x, root_y = root_y, root_x
+        self.parent[root_y] = root_x
+        if self.rank[root_x] == self.rank[root_y]:
+            self.rank[root_x] += 1
+            self.history.append(~root_y)
         else:
-            self.parent[root_y] = root_x
-            if self.rank[root_x] == self.rank[root_y]:
-                self.rank[root_x] += 1
-    
+            self.history.append(root_y)
+
     def connected(self, x, y):
         """判断x和y是否连通"""
         return self.find(x) == self.find(y)
 
+    def snapshot(self) -> int:
+        """记录当前状态，返回可传给 rollback 的标记"""
+        return len(self.history)
+
+    def rollback(self, mark: int):
+        """撤销标记之后的所有合并
+        Args:
+            mark: snapshot() 返回的标记
+        """
+        history = self.history
+        parent = self.parent
+        while len(history) > mark:
+            entry = history.pop()
+            if entry < 0:
+                entry = ~entry
+                self.rank[parent[entry]] -= 1
+            parent[entry] = entry
+
+    def copy(self) -> 'UnionFind':
+        """复制并查集（列表拷贝）"""
+        uf = UnionFind.__new__(UnionFind)
+        uf.parent = self.parent[:]
+        uf.rank = self.rank[:]
+        uf.history = self.history[:]
+        return uf
+
+
+class CellSet:
+    """可按下标访问的空位集合
+
+    元素为 (row, col) 坐标。内部用列表保存元素、用一维编号到列表下标的
+    映射记录位置，删除时与末尾元素交换，因此增、删、成员检查均为O(1)，
+    并且支持 len()、迭代和下标访问（可直接用于 random.choice）。
+    """
+    __slots__ = ('size', 'cells', 'pos')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.cells = list(coord_table(size))
+        self.pos = list(range(size * size))
+
+    def add(self, cell: Tuple[int, int]):
+        """加入一个空位"""
+        idx = cell[0] * self.size + cell[1]
+        if self.pos[idx] < 0:
+            self.pos[idx] = len(self.cells)
+            self.cells.append(cell)
+
+    def remove(self, cell: Tuple[int, int]):
+        """删除一个空位，不存在时抛出 ValueError"""
+        idx = cell[0] * self.size + cell[1]
+        i = self.pos[idx]
+        if i < 0:
+            raise ValueError(f"{cell} not in CellSet")
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.pos[last[0] * self.size + last[1]] = i
+        self.pos[idx] = -1
+
+    def copy(self) -> 'CellSet':
+        """复制集合（两次列表拷贝）"""
+        other = CellSet.__new__(CellSet)
+        other.size = self.size
+        other.cells = self.cells[:]
+        other.pos = self.pos[:]
+        return other
+
+    def __contains__(self, cell) -> bool:
+        try:
+            row, col = cell
+        except (TypeError, ValueError):
+            return False
+        return 0 <= row < self.size and 0 <= col < self.size and self.pos[row * self.size + col] >= 0
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __getitem__(self, i):
+        return self.cells[i]
+
+    def __repr__(self) -> str:
+        return f"CellSet({self.cells!r})"
+
+
 class Board:
     def __init__(self, size: int = 11):
         """初始化棋盘
@@ -36,44 +204,104 @@ class Board:
             size: 棋盘大小，默认11x11
         """
         self.size = size
-        self.board = [['.' for _ in range(size)] for _ in range(size)]
-        # 为红蓝双方分别创建棋子矩阵
-        self.red_stones = [[False for _ in range(size)] for _ in range(size)]
-        self.blue_stones = [[False for _ in range(size)] for _ in range(size)]
+        # 一维紧凑棋盘：每格一个字节（EMPTY/RED/BLUE），复制即内存拷贝
+        self.cells = bytearray(size * size)
+        self.neighbors = neighbor_table(size)
         # 为每个颜色维护一个并查集
         self.uf_b = UnionFind(size * size + 2)  # 蓝方(B)的并查集
         self.uf_r = UnionFind(size * size + 2)  # 红方(R)的并查集
         self.virtual1 = size * size      # 虚拟节点1（用于连接边界）
         self.virtual2 = size * size + 1  # 虚拟节点2（用于连接边界）
-        self.available = [(r, c) for r in range(size) for c in range(size)]
+        self.available = CellSet(size)
+        # Zobrist哈希：所有棋子随机数的异或，落子与撤销时增量更新
+        self.zobrist = zobrist_table(size)
+        self.hash = 0
+        # 落子栈：一维编号与落子前对应颜色并查集的快照标记，用于撤销
+        self.moves = []
+        self.marks = []
+
+    @property
+    def move_count(self) -> int:
+        """已落子数"""
+        return len(self.moves)
+
+    def copy(self) -> 'Board':
+        """快速复制棋盘，只拷贝字节数组与列表，不做递归深拷贝
+        Returns:
+            Board: 与当前棋盘状态相同的新棋盘
+        """
+        other = Board.__new__(Board)
+        other.size = self.size
+        other.cells = self.cells[:]
+        other.neighbors = self.neighbors
+        other.uf_b = self.uf_b.copy()
+        other.uf_r = self.uf_r.copy()
+        other.virtual1 = self.virtual1
+        other.virtual2 = self.virtual2
+        other.available = self.available.copy()
+        other.zobrist = self.zobrist
+        other.hash = self.hash
+        other.moves = self.moves[:]
+        other.marks = self.marks[:]
+        return other
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    @property
+    def board(self) -> List[List[str]]:
+        """字符形式的二维棋盘（'.'、'R'、'B'），每次访问重新生成"""
+        size = self.size
+        return [[CODE_COLORS[v] for v in self.cells[r * size:(r + 1) * size]] for r in range(size)]
+
+    @property
+    def red_stones(self) -> List[List[bool]]:
+        """红方棋子矩阵，每次访问重新生成"""
+        size = self.size
+        return [[v == RED for v in self.cells[r * size:(r + 1) * size]] for r in range(size)]
+
+    @property
+    def blue_stones(self) -> List[List[bool]]:
+        """蓝方棋子矩阵，每次访问重新生成"""
+        size = self.size
+        return [[v == BLUE for v in self.cells[r * size:(r + 1) * size]] for r in range(size)]
+
+    def get_color(self, row: int, col: int) -> str:
+        """获取指定位置的棋子颜色
+        Args:
+            row: 行坐标
+            col: 列坐标
+        Returns:
+            str: 'R'、'B'，空位返回 '.'
+        """
+        return CODE_COLORS[self.cells[row * self.size + col]]
 
-    def place_stone(self, row: int, col: int, color: str) -> bool:
+    def place_stone(self, row: int, col: int, color: str) -> int:
         """在指定位置落子
         Args:
             row: 行坐标
             col: 列坐标
             color: 棋子颜色 ('B' 或 'R')
         Returns:
-            bool: 落子是否成功
+            int: 撤销令牌（落子后的步数，恒为正），落子失败返回 0。
+                 令牌可以传给 undo() 回滚到这一步之前的局面
         """
         if not self.is_valid_move(row, col):
-            return False
-            
-        self.board[row][col] = color
-        # 更新红蓝棋子矩阵
-        if color == 'R':
-            self.red_stones[row][col] = True
-        else:
-            self.blue_stones[row][col] = True
-            
-        self.available.remove((row, col))
-        
-        # 选择对应颜色的并查集
-        uf = self.uf_b if color == 'B' else self.uf_r
+            return 0
+
         cur_id = self._node_id(row, col)
-        
+        code = COLOR_CODES[color]
+        # 选择对应颜色的并查集
+        uf = self.uf_b if code == BLUE else self.uf_r
+
+        self.cells[cur_id] = code
+        self.available.remove((row, col))
+        self.hash ^= self.zobrist[cur_id * 3 + code]
+        self.moves.append(cur_id)
+        self.marks.append(uf.snapshot())
+
         # 连接虚拟节点
-        if color == 'B':
+        if code == BLUE:
             if col == 0:
                 uf.union(cur_id, self.virtual1)
             if col == self.size - 1:
@@ -83,14 +311,38 @@ class Board:
                 uf.union(cur_id, self.virtual1)
             if row == self.size - 1:
                 uf.union(cur_id, self.virtual2)
-        
+
         # 检查周围节点
-        directions = [(-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0)]
-        for dx, dy in directions:
-            nr, nc = row + dx, col + dy
-            if 0 <= nr < self.size and 0 <= nc < self.size and self.board[nr][nc] == color:
-                uf.union(cur_id, self._node_id(nr, nc))
-        
+        cells = self.cells
+        for nid in self.neighbors[cur_id]:
+            if cells[nid] == code:
+                uf.union(cur_id, nid)
+
+        return len(self.moves)
+
+    def undo(self, token: Optional[int] = None) -> bool:
+        """撤销落子
+        Args:
+            token: place_stone 返回的令牌，回滚到该步之前的局面（其后的落子一并撤销）；
+                   为 None 时只撤销最后一步
+        Returns:
+            bool: 是否撤销了至少一步
+        """
+        moves = self.moves
+        if token is None:
+            token = len(moves)
+        if token < 1 or len(moves) < token:
+            return False
+        coords = coord_table(self.size)
+        while len(moves) >= token:
+            cur_id = moves.pop()
+            mark = self.marks.pop()
+            code = self.cells[cur_id]
+            uf = self.uf_b if code == BLUE else self.uf_r
+            uf.rollback(mark)
+            self.hash ^= self.zobrist[cur_id * 3 + code]
+            self.cells[cur_id] = EMPTY
+            self.available.add(coords[cur_id])
         return True
 
     def is_valid_move(self, row: int, col: int) -> bool:
@@ -101,17 +353,16 @@ class Board:
         Returns:
             bool: 是否合法
         """
-        return (0 <= row < self.size and 
-                0 <= col < self.size and 
-                self.board[row][col] == '.' and 
-                (row, col) in self.available)
+        return (0 <= row < self.size and
+                0 <= col < self.size and
+                self.cells[row * self.size + col] == EMPTY)
 
     def get_board_state(self) -> List[List[str]]:
         """获取当前棋盘状态
         Returns:
             List[List[str]]: 棋盘状态的深拷贝
         """
-        return [row[:] for row in self.board]
+        return self.board
 
     def check_winner(self) -> Optional[str]:
         """检查是否有获胜方
@@ -126,4 +377,4 @@ class Board:
 
     def _node_id(self, row: int, col: int) -> int:
         """将二维坐标转换为一维节点编号"""
-        return row * self.size + col 
\ No newline at end of file
+        return row * self.size + col
@@ -0,0 +1,304 @@
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from .board import Board
+from .gtp import GtpError, GTP_COLORS, RESIGN
+from .scheduler import SearchQueueFull, _percentiles, METRIC_WINDOW
+from .utils import coord_to_move, move_to_coord
+
+# 引擎服务器地址：'host:port' 连接 python -m core.gtp --port 启动的服务器，'spawn' 为每个连接启动一个本地引擎进程；
+# 未设置时 app.py 在本进程中搜索。连接数上限与等待空闲连接的超时（秒）可用环境变量覆盖
+ENGINE_SERVER = os.environ.get('HEX_ENGINE_SERVER')
+ENGINE_POOL_SIZE = int(os.environ.get('HEX_ENGINE_POOL', 4))
+ENGINE_POOL_TIMEOUT = float(os.environ.get('HEX_ENGINE_POOL_TIMEOUT', 30))
+
+# 本地引擎进程的启动命令（在项目根目录下运行）
+SPAWN_COMMAND = [sys.executable, '-m', 'core.gtp']
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class GtpClient:
+    """一个到 GTP 引擎的连接（TCP 或子进程的标准输入输出）
+
+    同时记录已经发给引擎的状态（棋盘大小与棋子、引擎名称、每步时间、是否提前结束），
+    之后只发送发生变化的部分。
+    """
+
+    def __init__(self, reader, writer, closer: Callable[[], None]):
+        self.reader = reader
+        self.writer = writer
+        self.closer = closer
+        self.size = None       # 引擎的棋盘大小，None 表示未知
+        self.stones = {}       # 引擎棋盘上的棋子：(行, 列) -> 颜色
+        self.settings = {}     # 已发送的设置命令 -> 参数
+
+    @classmethod
+    def connect(cls, address: str, timeout: Optional[float] = None) -> 'GtpClient':
+        """
+        连接 TCP 引擎服务器
+        Args:
+            address: 'host:port'
+            timeout: 读写超时（秒）
+        """
+        host, port = address.rsplit(':', 1)
+        sock = socket.create_connection((host, int(port)), timeout=timeout)
+        stream = sock.makefile('rw', encoding='utf-8', newline='\n')
+
+        def close():
+            stream.close()
+            sock.close()
+        return cls(stream, stream, close)
+
+    @classmethod
+    def spawn(cls, command=None) -> 'GtpClient':
+        """
+        启动一个通过标准输入输出通信的本地引擎进程
+        Args:
+            command: 启动命令，默认为 python -m core.gtp
+        """
+        process = subprocess.Popen(command or SPAWN_COMMAND, cwd=PROJECT_ROOT, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                   text=True, encoding='utf-8', bufsize=1)
+
+        def close():
+            try:
+                process.stdin.write('quit\n')
+                process.stdin.flush()
+                process.wait(timeout=5)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                process.kill()
+        return cls(process.stdout, process.stdin, close)
+
+    def command(self, line: str) -> str:
+        """
+        发送一条命令并读取回复
+        Args:
+            line: 命令行（不含换行）
+        Returns:
+            str: 回复内容（去掉 '=' 前缀）
+        Raises:
+            GtpError: 引擎以 '?' 回复
+            ConnectionError: 连接已断开
+        """
+        self.writer.write(line + '\n')
+        self.writer.flush()
+        lines = []
+        while True:
+            text = self.reader.readline()
+            if not text:
+                raise ConnectionError(f"引擎连接已断开（命令: {line}）")
+            text = text.rstrip('\r\n')
+            if not text and lines:
+                break
+            if text:
+                lines.append(text)
+        status, first = lines[0][0], lines[0][1:].split(' ', 1)
+        body = '\n'.join(([first[1]] if len(first) > 1 else []) + lines[1:]).strip()
+        if status == '?':
+            raise GtpError(body)
+        return body
+
+    def close(self):
+        try:
+            self.closer()
+        except OSError:
+            pass
+
+    def shared_stones(self, board: Board) -> int:
+        """
+        引擎棋盘与 board 的一致程度
+        Returns:
+            int: 引擎棋盘上的棋子数；大小不同或有棋子不在 board 上（需要清空重放）时返回 -1
+        """
+        if self.size != board.size:
+            return -1
+        if any(board.get_color(r, c) != color for (r, c), color in self.stones.items()):
+            return -1
+        return len(self.stones)
+
+    def sync(self, board: Board):
+        """
+        把引擎的棋盘同步为 board：引擎上的棋子都还在 board 上时只补发新增的落子，
+        否则（换了棋盘、悔棋或交换）用 boardsize 清空后重放全部棋子
+        """
+        if self.shared_stones(board) < 0:
+            self.command(f"boardsize {board.size}")
+            self.size, self.stones = board.size, {}
+        for r in range(board.size):
+            for c in range(board.size):
+                stone = board.get_color(r, c)
+                if stone in GTP_COLORS and (r, c) not in self.stones:
+                    self.command(f"play {GTP_COLORS[stone]} {coord_to_move(r, c)}")
+                    self.stones[(r, c)] = stone
+
+    def setting(self, command: str, value: str):
+        """发送设置命令，参数与上次发送的相同时跳过"""
+        if self.settings.get(command) != value:
+            self.command(f"{command} {value}")
+            self.settings[command] = value
+
+
+class EnginePool:
+    """到常驻 GTP 引擎的连接池，接口与 SearchScheduler.search 相同，可作为 Game 的调度器
+
+    每次搜索优先借用棋盘与当前局面最接近的空闲连接，只把引擎还没有的棋子用 play 发过去
+    （局面对不上时先 boardsize 清空再重放），用 time_settings 设置本步时间，再以 genmove 取得走法；
+    连接出错时丢弃并在下次需要时重新建立。
+    引擎进程常驻并保持已加载的引擎（如网络权重）；同一局的连续搜索落在同一连接上时，
+    引擎进程中的 Game 可以复用上一步的搜索树。Web 进程中不再创建搜索树。
+    """
+
+    def __init__(self, address: Optional[str] = ENGINE_SERVER, size: int = ENGINE_POOL_SIZE,
+                 timeout: float = ENGINE_POOL_TIMEOUT):
+        """
+        Args:
+            address: 'host:port'，或 'spawn'/None 表示启动本地引擎进程
+            size: 连接数上限
+            timeout: 等待空闲连接的最长时间（秒），超时后拒绝请求
+        """
+        self.address = address
+        self.size = size
+        self.timeout = timeout
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.counters = {'submitted': 0, 'completed': 0, 'rejected': 0, 'failed': 0, 'connections': 0}
+        self.in_use = 0
+        self.waits = deque(maxlen=METRIC_WINDOW)
+        self.latencies = deque(maxlen=METRIC_WINDOW)
+
+    def _connect(self) -> GtpClient:
+        if self.address and self.address != 'spawn':
+            client = GtpClient.connect(self.address)
+        else:
+            client = GtpClient.spawn()
+        with self.lock:
+            self.counters['connections'] += 1
+        logging.info(f"建立引擎连接: {self.address or 'spawn'}")
+        return client
+
+    @contextmanager
+    def acquire(self, board: Optional[Board] = None):
+        """
+        借用一个连接（没有空闲连接时新建，达到上限时等待）
+        Args:
+            board: 可选的局面，指定时优先借用引擎棋盘与之最接近（需要补发的落子最少）的空闲连接
+        Raises:
+            SearchQueueFull: 等待超时
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.counters['rejected'] += 1
+            raise SearchQueueFull(f"{self.timeout} 秒内没有空闲的引擎连接")
+        client = None
+        try:
+            with self.lock:
+                if self.idle and board is not None:
+                    client = max(self.idle, key=lambda idle: idle.shared_stones(board))
+                    self.idle.remove(client)
+                else:
+                    client = self.idle.popleft() if self.idle else None
+                self.in_use += 1
+            if client is None:
+                client = self._connect()
+            yield client
+            with self.lock:
+                self.idle.append(client)
+            client = None
+        finally:
+            if client is not None:
+                client.close()  # 出错的连接状态未知，不再复用
+            with self.lock:
+                self.in_use -= 1
+            self.slots.release()
+
+    def search(self, name: str, engine: Callable, board: Board, color: str, ai_color: str, time_limit: float,
+               progress: Optional[Callable[[Dict], None]] = None,
+               early_stop: bool = False) -> Tuple[Optional[Tuple[int, int]], float, int, float]:
+        """
+        由引擎进程搜索当前局面（参数与返回值同 SearchScheduler.search）
+        Args:
+            name: 引擎名称，在引擎进程中查找
+            engine: 未使用（构造函数无法跨进程传给已启动的引擎）
+            board: 当前局面
+            color: 当前行棋方
+            ai_color: AI的颜色
+            time_limit: 搜索时间（秒）
+            progress: GTP 没有中途的进度回复，搜索结束后以最终结果（格式同 MCTS.progress_info）调用一次
+            early_stop: 通过扩展命令 hex-early-stop 设置引擎进程中的 Game 是否提前结束搜索
+        Returns:
+            Tuple: (最佳动作, 胜率, 模拟次数, 用时)
+        Raises:
+            SearchQueueFull: 没有空闲的引擎连接
+            GtpError: 引擎拒绝命令
+        """
+        submitted = time.time()
+        with self.lock:
+            self.counters['submitted'] += 1
+        try:
+            with self.acquire(board) as client:
+                start_time = time.time()
+                with self.lock:
+                    self.waits.append(start_time - submitted)
+                client.sync(board)
+                client.setting('hex-engine', name)
+                client.setting('hex-early-stop', 'on' if early_stop else 'off')
+                client.setting('time_settings', f"0 {time_limit:.3f} 1")
+                reply = client.command(f"genmove {GTP_COLORS[color]}")
+                ratio, count, seconds = 0.5, 0, time.time() - start_time
+                if reply.lower() != RESIGN:
+                    # 引擎进程的 Game 已经落下这一步
+                    client.stones[move_to_coord(reply)] = color
+                    ratio, count, seconds = client.command('hex-search-info').split()
+                    ratio, count, seconds = float(ratio), int(count), float(seconds)
+        except SearchQueueFull:
+            raise
+        except Exception:
+            with self.lock:
+                self.counters['failed'] += 1
+            raise
+        with self.lock:
+            self.counters['completed'] += 1
+            self.latencies.append(time.time() - submitted)
+        move = None if reply.lower() == RESIGN else move_to_coord(reply)
+        if progress is not None:
+            progress({'simulations': count, 'elapsed': round(seconds, 3), 'best_move': move,
+                      'win_rate': round(ratio, 4) if move else None})
+        logging.info(f"引擎进程返回: {reply}, 胜率: {ratio:.3f}, 模拟次数: {count}, 用时: {seconds:.2f}秒")
+        return move, ratio, count, seconds
+
+    def reserve_local(self) -> bool:
+        """搜索总是交给引擎进程，Web 进程中不做本地搜索（见 SearchScheduler.reserve_local）"""
+        return False
+
+    def metrics(self) -> Dict:
+        """
+        连接池指标
+        Returns:
+            Dict: 连接数上限、空闲/使用中的连接数、计数器，以及等待空闲连接的时间与总用时的分布（秒）
+        """
+        with self.lock:
+            return {
+                'address': self.address or 'spawn',
+                'pool_size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                **self.counters,
+                'wait_time': _percentiles(self.waits),
+                'latency': _percentiles(self.latencies),
+            }
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self.lock:
+            clients, self.idle = list(self.idle), deque()
+        for client in clients:
+            client.close()
@@ -3,11 +3,13 @@ import logging
 import time
 import os
 import random
+import threading
 from typing import Tuple, Optional
 from datetime import datetime
 
-from .board import Board
-from ai.mcts import MCTS
+from .board import Board, should_swap
+from ai.engines import available_engines, load_engine_config
+from ai.time_manager import GameClock
 
 # 创建logs目录（如果不存在）
 os.makedirs('logs', exist_ok=True)
@@ -29,23 +31,44 @@ logging.getLogger().addHandler(console_handler)
 
     
 class Game:
-    def __init__(self, board_size: int = 11):
+    def __init__(self, board_size: int = 11, scheduler=None):
         """初始化游戏
         Args:
             board_size: 棋盘大小
+            scheduler: 可选的共享搜索调度器（见 core.scheduler），设置后调度器空闲时占用一个名额在本线程中搜索，
+                       繁忙时在调度器的进程池中执行
         """
         self.board = Board(board_size)
+        self.scheduler = scheduler
         self.mcts = None
+        self.mcts_engine = None  # 创建 self.mcts 时使用的引擎
+        self.mcts_moves = 0      # self.mcts 根局面对应的历史步数
+        self.ponder = False          # 是否在对手思考时继续搜索
+        self.ponder_limit = 120.0    # 单次后台思考的最长时间（秒）
+        self.ponder_thread = None
+        self.ponder_stop = None
+        self.ponder_start = None     # 后台思考开始时根节点各动作的访问次数
+        self.ponder_gain = {}        # 最近一次后台思考在对手各个应对下新增的模拟次数
+        self.last_search_rate = 0.0  # 最近一次搜索的模拟速度（次/秒），用于折算后台思考的收益
+        self.last_search = None      # 最近一次搜索的摘要：win_rate、simulations、seconds
         self.my_color = None
         self.current_color = 'R'  # 红方先手
         self.move_history = []
         self.start_time = time.time()
         self.difficulty = 'medium'  # 默认中等难度
+        # 各难度平均每步的搜索时间：按它创建整局的计时（见 GameClock.for_average），
+        # 每步按对局阶段分配，开局到中盘多用、残局少用
         self.search_times = {
-            'easy': 2.0,    # 简单难度搜索2秒
-            'medium': 5.0,  # 中等难度搜索5秒
-            'hard': 10.0    # 困难难度搜索10秒
+            'easy': 2.0,    # 简单难度平均每步2秒
+            'medium': 5.0,  # 中等难度平均每步5秒
+            'hard': 10.0    # 困难难度平均每步10秒
         }
+        self.clock = None        # AI的对局计时，首次搜索时按难度创建，切换难度时重建
+        self.early_stop = True   # 最佳动作无法被超过或已稳定时提前结束搜索
+        self.engine = 'mcts'  # 默认使用对象树MCTS
+        self.engines = available_engines()  # 引擎注册表（见 ai.engines）
+        # 按难度指定的引擎，未指定的难度使用 self.engine
+        self.difficulty_engines = {'easy': 'alphabeta'}
         logging.info("Game initialized with board size %d", board_size)
         self._log_board_state()
 
@@ -57,10 +80,121 @@ class Game:
         if difficulty in self.search_times:
             old_difficulty = self.difficulty
             self.difficulty = difficulty
+            if difficulty != old_difficulty:
+                self.clock = None
             logging.info(f"AI难度从 {old_difficulty} 更改为 {difficulty}")
         else:
             logging.warning(f"无效的难度设置: {difficulty}，使用默认难度: {self.difficulty}")
 
+    def set_engine(self, engine: str, difficulty: Optional[str] = None):
+        """设置AI搜索引擎
+        Args:
+            engine: 引擎名称（见 self.engines）
+            difficulty: 只为该难度指定引擎；为 None 时设置所有难度的引擎（并清除按难度的设置）
+        """
+        if engine not in self.engines:
+            logging.warning(f"无效的引擎设置: {engine}，使用默认引擎: {self.active_engine}")
+            return
+        if difficulty is not None:
+            self.difficulty_engines[difficulty] = engine
+            logging.info(f"难度 {difficulty} 的AI引擎设为 {engine}")
+            return
+        old_engine = self.engine
+        self.engine = engine
+        self.difficulty_engines = {}
+        logging.info(f"AI引擎从 {old_engine} 更改为 {engine}")
+
+    def load_config(self, path: str, difficulty: Optional[str] = None) -> bool:
+        """加载调参得到的引擎配置（见 ai.tune），注册为 'tuned' 引擎并启用
+        Args:
+            path: JSON 配置文件
+            difficulty: 只为该难度启用；为 None 时所有难度都使用
+        Returns:
+            bool: 是否加载成功
+        """
+        try:
+            self.engines['tuned'] = load_engine_config(path, self.engines)
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"加载引擎配置失败: {path}, {e}")
+            return False
+        logging.info(f"已加载引擎配置: {path}")
+        self.set_engine('tuned', difficulty)
+        return True
+
+    @property
+    def active_engine(self) -> str:
+        """当前难度实际使用的引擎名称"""
+        return self.difficulty_engines.get(self.difficulty, self.engine)
+
+    def set_ponder(self, enabled: bool):
+        """开启或关闭后台思考
+        Args:
+            enabled: 是否在对手思考期间继续搜索
+        """
+        self.ponder = bool(enabled)
+        if not self.ponder:
+            self.stop_pondering()
+        logging.info(f"后台思考: {'开启' if self.ponder else '关闭'}")
+
+    def start_pondering(self) -> bool:
+        """AI落子后，在后台线程中继续搜索对手可能的应对
+        Returns:
+            bool: 是否启动了后台思考
+        """
+        if not self.ponder or self.mcts is None or self.get_winner() or self.current_color == self.my_color:
+            return False
+        self.stop_pondering()
+        
+        # 把搜索树推进到AI落子之后的局面（对手行棋）
+        tree = self._reuse_tree()
+        if tree is None:
+            logging.info("没有可复用的搜索树，跳过后台思考")
+            return False
+        self.mcts = tree
+        self.mcts_moves = len(self.move_history)
+        # 使用调度器时，后台思考同样占用一个名额（由后台思考线程结束时归还）
+        if self.scheduler is not None and not self.scheduler.reserve_local():
+            logging.info("调度器繁忙，跳过后台思考")
+            return False
+        self.ponder_start = {action: n for action, (n, _) in tree.root_stats().items()}
+        self.ponder_gain = {}
+        
+        stop_event = threading.Event()
+        thread = threading.Thread(target=self._ponder, args=(tree, stop_event), daemon=True)
+        self.ponder_stop = stop_event
+        self.ponder_thread = thread
+        thread.start()
+        logging.info(f"开始后台思考 - 对手颜色:{tree.color}，最长{self.ponder_limit}秒")
+        return True
+
+    def stop_pondering(self):
+        """停止后台思考并等待线程退出"""
+        thread = self.ponder_thread
+        if thread is None:
+            return
+        self.ponder_stop.set()
+        thread.join()
+        self.ponder_thread = None
+        self.ponder_stop = None
+        # 只记录后台思考期间新增的访问，之前前台搜索留下的统计不算作后台思考的收益
+        start = self.ponder_start or {}
+        if self.mcts is not None:
+            self.ponder_gain = {action: n - start.get(action, 0)
+                                for action, (n, _) in self.mcts.root_stats().items() if n > start.get(action, 0)}
+        self.ponder_start = None
+        logging.info("后台思考已停止")
+
+    def _ponder(self, tree, stop_event: threading.Event):
+        """后台思考线程：在搜索树上持续搜索直到被取消或超时"""
+        try:
+            _, _, count, spent = tree.search(time_limit=self.ponder_limit, stop_event=stop_event)
+            logging.info(f"后台思考结束 - 模拟次数:{count}，用时:{spent:.2f}秒")
+        except Exception as e:
+            logging.error(f"后台思考失败: {str(e)}")
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release_local()
+
     def handle_first_move(self) -> str:
         """处理先手情况
         Returns:
@@ -115,7 +249,7 @@ class Game:
         self.make_move(move)
         
         # 判断是否交换
-        if 3 <= move[0] <= 7 and 3 <= move[1] <= 7:
+        if should_swap(move, self.board.size):
             self.my_color = 'R'
             logging.info("Choosing to swap")
             return "change"
@@ -157,6 +291,8 @@ class Game:
             logging.error(f"交换规则只能在第一步后使用! 当前历史: {len(self.move_history)}")
             return False
             
+        self.stop_pondering()
+        
         # 获取第一步移动
         first_move, first_color = self.move_history[0]
         logging.info(f"应用交换规则，第一步: ({first_move[0]},{first_move[1]}), 颜色: {first_color}")
@@ -188,17 +324,59 @@ class Game:
         self._log_board_state()
         
         # 重置MCTS
-        self.mcts = None
+        self._discard_tree()
         
         return True
 
-    def get_ai_move(self) -> Optional[str]:
+    def _local_search(self, time_limit: float, progress=None):
+        """在当前线程中搜索，优先复用上一次搜索中与实际走法对应的子树
+        Args:
+            time_limit: 搜索时间（秒）
+            progress: 可选的进度回调
+        Returns:
+            Tuple: (最佳动作, 胜率, 模拟次数, 用时)
+        """
+        # 后台思考之后对手只走了一步时，该应对下新增的模拟可以折算为时间
+        reply = None
+        if self.ponder_gain and len(self.move_history) == self.mcts_moves + 1:
+            reply = self.move_history[-1][0]
+        gained = self.ponder_gain.get(reply, 0)
+        self.ponder_gain = {}
+        tree = self._reuse_tree()
+        if tree is None:
+            gained = 0
+            # 旧树无法复用（共享内存树持有共享内存块与工作进程，必须先关闭）
+            self._discard_tree()
+            engine = self.active_engine
+            logging.info(f"创建新的搜索实例 - 引擎:{engine}, 当前颜色:{self.current_color}, AI颜色:{self.my_color}")
+            self.mcts = self.engines[engine](self.board, self.current_color, self.my_color)
+            self.mcts_engine = engine
+        else:
+            self.mcts = tree
+        self.mcts_moves = len(self.move_history)
+        
+        # 后台思考在当前局面上新增的模拟折算为时间，最多节省一半的搜索时间
+        if gained > 0 and self.last_search_rate > 0:
+            credit = min(time_limit * 0.5, gained / self.last_search_rate)
+            time_limit -= credit
+            logging.info(f"复用后台思考的 {gained} 次模拟，搜索时间缩短 {credit:.2f} 秒")
+        logging.info(f"开始MCTS搜索...难度: {self.difficulty}, 搜索时间: {time_limit}秒")
+        
+        return self.mcts.search(time_limit=time_limit, progress=progress, early_stop=self.early_stop)
+
+    def get_ai_move(self, progress=None, time_limit: Optional[float] = None) -> Optional[str]:
         """获取 AI 的下一步移动
+        Args:
+            progress: 可选的进度回调，传给引擎的 search（见 MCTS.progress_info）
+            time_limit: 搜索时间（秒），None 时由按难度创建的对局计时分配
         Returns:
             str: 移动坐标
         """
         logging.info(f"请求AI移动 - 当前玩家:{self.current_color}, AI颜色:{self.my_color or '未设置'}, 难度:{self.difficulty}")
         
+        # 后台思考使用的是同一棵搜索树，先停下来再复用
+        self.stop_pondering()
+        
         # 检查是否已经结束
         winner = self.get_winner()
         if winner:
@@ -215,27 +393,41 @@ class Game:
             logging.warning(f"不是AI的回合! 当前回合: {self.current_color}, AI: {self.my_color}")
             return None
             
-        if not self.mcts:
-            # 确保my_color已设置，如果未设置，默认为当前颜色
-            if self.my_color is None:
-                self.my_color = self.current_color
-                logging.info(f"未设置AI颜色，默认设为当前颜色: {self.current_color}")
-                
-            logging.info(f"创建新的MCTS实例 - 当前颜色:{self.current_color}, AI颜色:{self.my_color}")
-            self.mcts = MCTS(self.board, self.current_color, self.my_color)
-        else:
-            # 更新MCTS的状态
-            logging.info(f"更新MCTS实例 - 当前颜色:{self.current_color}")
-            self.mcts.hex = self.board
-            self.mcts.color = self.current_color
+        # 确保my_color已设置，如果未设置，默认为当前颜色
+        if self.my_color is None:
+            self.my_color = self.current_color
+            logging.info(f"未设置AI颜色，默认设为当前颜色: {self.current_color}")
         
-        # 根据难度获取搜索时间
-        time_limit = self.search_times.get(self.difficulty, 5.0)
-        logging.info(f"开始MCTS搜索...难度: {self.difficulty}, 搜索时间: {time_limit}秒")
+        # 未指定时由对局计时按剩余时间与对局阶段分配
+        clock = None
+        if time_limit is None:
+            if self.clock is None:
+                self.clock = GameClock.for_average(self.search_times.get(self.difficulty, 5.0), self.board.size)
+            clock = self.clock
+            time_limit = clock.allocate(self.board)
+            logging.info(f"对局计时剩余 {clock.remaining:.1f} 秒，本步分配 {time_limit:.2f} 秒")
+        
+        if self.scheduler is not None and not self.scheduler.reserve_local():
+            # 调度器繁忙：交给共享调度器在进程池中按时间片搜索；不保留本地搜索树
+            engine = self.active_engine
+            self._discard_tree()
+            logging.info(f"提交搜索到调度器 - 引擎:{engine}, 难度: {self.difficulty}, 搜索时间: {time_limit}秒")
+            move, ratio, count, time_spent = self.scheduler.search(
+                engine, self.engines[engine], self.board, self.current_color, self.my_color, time_limit, progress,
+                early_stop=self.early_stop)
+        else:
+            # 没有调度器，或调度器空闲时占用一个名额在本线程中搜索（复用子树，之后可以后台思考）
+            try:
+                move, ratio, count, time_spent = self._local_search(time_limit, progress)
+            finally:
+                if self.scheduler is not None:
+                    self.scheduler.release_local()
         
-        # 执行搜索
-        start_time = time.time()
-        move, ratio, count, time_spent = self.mcts.search(time_limit=time_limit)
+        if time_spent > 0:
+            self.last_search_rate = count / time_spent
+        if clock is not None:
+            clock.charge(time_spent)
+        self.last_search = {'win_rate': ratio, 'simulations': count, 'seconds': time_spent}
         
         if move:
             move_str = self._format_move(move[0], move[1])
@@ -266,6 +458,62 @@ class Game:
             logging.error("AI无法生成有效移动!")
             return None
 
+    def _reuse_tree(self):
+        """沿上次搜索之后的实际走法（我方落子与对手应对）下降到对应的子树
+        Returns:
+            搜索实例，新根与当前局面一致；无法复用时返回 None
+        """
+        tree = self.mcts
+        if tree is None or self.mcts_engine != self.active_engine or self.mcts_moves > len(self.move_history):
+            return None
+        
+        for move, color in self.move_history[self.mcts_moves:]:
+            if tree.color != color:
+                return None
+            tree = tree.advance(move)
+            if tree is None:
+                logging.info(f"搜索树中没有走法 {move} 的统计，放弃复用")
+                return None
+        
+        if tree.hex.cells != self.board.cells or tree.ai_color != self.my_color:
+            logging.warning("复用的搜索树与当前局面不一致，重新创建")
+            return None
+        logging.info(f"复用搜索树 - 新根继承 {len(self.move_history) - self.mcts_moves} 步之后的统计")
+        return tree
+
+    def _discard_tree(self):
+        """丢弃搜索树；共享内存树同时关闭工作进程并释放共享内存块"""
+        close = getattr(self.mcts, 'close', None)
+        if close is not None:
+            close()
+        self.mcts = None
+        self.mcts_engine = None
+
+    def undo(self) -> bool:
+        """撤销最后一步：按其余历史重建棋盘，轮到被撤销一步的一方，并丢弃搜索树
+        Returns:
+            bool: 是否有可撤销的移动
+        """
+        if not self.move_history:
+            logging.warning("没有可撤销的移动")
+            return False
+        self.stop_pondering()
+        (row, col), color = self.move_history.pop()
+        board = Board(self.board.size)
+        for (r, c), stone in self.move_history:
+            board.place_stone(r, c, stone)
+        self.board = board
+        self.current_color = color
+        self._discard_tree()
+        logging.info(f"撤销移动: {self._format_move(row, col)}，颜色: {color}")
+        return True
+
+    def close(self):
+        """结束游戏：停止后台思考并释放搜索树（共享内存树同时关闭共享内存块）"""
+        self.stop_pondering()
+        self._discard_tree()
+        logging.info("游戏已关闭，搜索树已释放")
+
     def is_game_over(self) -> bool:
         """检查游戏是否结束"""
         winner = self.board.check_winner()
@@ -360,13 +608,7 @@ class Game:
                 row = " " * (r) + row 
             
             for c in range(self.board.size):
-                pos = (r, c)
-                if self.board.red_stones[r][c]:
-                    row += "R "
-                elif self.board.blue_stones[r][c]:
-                    row += "B "
-                else:
-                    row += ". "
+                row += self.board.get_color(r, c) + " "
             board_str += row + "\n"
         
         logging.info(f"当前棋盘状态:\n{board_str}")
@@ -0,0 +1,357 @@
+import argparse
+import logging
+import socketserver
+import sys
+import time
+from typing import Callable, Dict, Optional, TextIO
+
+from ai.time_manager import GameClock
+from .game import Game
+from .scheduler import SearchScheduler
+from .utils import move_to_coord
+
+# GTP 颜色名称 -> 棋盘颜色
+COLORS = {'black': 'R', 'b': 'R', 'red': 'R', 'r': 'R', 'white': 'B', 'w': 'B', 'blue': 'B'}
+GTP_COLORS = {'R': 'black', 'B': 'white'}
+
+SWAP_MOVE = 'swap-pieces'
+RESIGN = 'resign'
+
+
+class GtpError(Exception):
+    """GTP 命令失败（以 '?' 回复）"""
+
+
+class GtpEngine:
+    """一个连接上的 GTP 会话：解析命令并操作一局 Game
+
+    支持 GTP（HexGui 等 Hex 工具使用的协议）的 protocol_version、name、version、known_command、
+    list_commands、quit、boardsize、clear_board、play、genmove、undo、time_settings、time_left、showboard，
+    以及扩展命令 hex-engine、hex-engines、hex-difficulty、hex-early-stop、hex-search-info。
+    颜色 black/b/red/r 表示先手红方，white/w/blue 表示后手蓝方；坐标为 'a1' 形式（列字母 + 行号），
+    play 可以使用 'swap-pieces'（交换规则），genmove 在对局结束时回复 'resign'。
+    """
+
+    def __init__(self, size: int = 11, difficulty: str = 'medium', engine: Optional[str] = None,
+                 scheduler: Optional[SearchScheduler] = None):
+        """
+        Args:
+            size: 初始棋盘大小
+            difficulty: 未设置时间控制时按该难度决定搜索时间
+            engine: 引擎名称，None 时使用各难度的默认引擎
+            scheduler: 可选的共享搜索调度器（多个连接共用进程池）
+        """
+        self.difficulty = difficulty
+        self.engine = engine
+        self.scheduler = scheduler
+        self.early_stop = True  # 是否在最佳动作无法被超过或已稳定时提前结束搜索
+        self.main_time = 0.0   # time_settings 的基本时间（秒）
+        self.byo_time = 0.0    # 读秒时间（秒）
+        self.byo_stones = 0    # 每个读秒周期内的步数
+        self.time_left = {}    # 颜色 -> (剩余时间, 剩余步数)；步数为 0 表示仍在基本时间内
+        self.finished = False
+        self.commands: Dict[str, Callable] = {
+            'protocol_version': lambda args: '2',
+            'name': lambda args: 'hex-mcts',
+            'version': lambda args: '1.0',
+            'known_command': lambda args: 'true' if args and args[0] in self.commands else 'false',
+            'list_commands': lambda args: '\n'.join(self.commands),
+            'quit': self.cmd_quit,
+            'boardsize': self.cmd_boardsize,
+            'clear_board': self.cmd_clear_board,
+            'play': self.cmd_play,
+            'genmove': self.cmd_genmove,
+            'undo': self.cmd_undo,
+            'time_settings': self.cmd_time_settings,
+            'time_left': self.cmd_time_left,
+            'showboard': self.cmd_showboard,
+            'hex-engine': self.cmd_engine,
+            'hex-engines': lambda args: ' '.join(self.game.engines),
+            'hex-difficulty': self.cmd_difficulty,
+            'hex-early-stop': self.cmd_early_stop,
+            'hex-search-info': self.cmd_search_info,
+        }
+        self.game = self._new_game(size)
+
+    def _new_game(self, size: int) -> Game:
+        game = Game(size, scheduler=self.scheduler)
+        game.set_difficulty(self.difficulty)
+        game.early_stop = self.early_stop
+        if self.engine:
+            game.set_engine(self.engine)
+        return game
+
+    def handle(self, line: str) -> Optional[str]:
+        """
+        执行一行命令
+        Args:
+            line: 命令行，可带数字编号，'#' 之后为注释
+        Returns:
+            Optional[str]: 完整的回复（'=' 或 '?' 开头，以空行结束），空行与注释返回 None
+        """
+        line = ''.join(ch for ch in line.split('#', 1)[0] if ch == '\t' or ch >= ' ').replace('\t', ' ')
+        parts = line.split()
+        if not parts:
+            return None
+        command_id = ''
+        if parts[0].isdigit():
+            command_id = parts.pop(0)
+            if not parts:
+                return f"?{command_id} missing command\n\n"
+        command, args = parts[0].lower(), parts[1:]
+        handler = self.commands.get(command)
+        try:
+            if handler is None:
+                raise GtpError('unknown command')
+            result = handler(args)
+        except GtpError as e:
+            return f"?{command_id} {e}\n\n"
+        except Exception as e:
+            logging.exception(f"GTP 命令执行失败: {line}")
+            return f"?{command_id} internal error: {e}\n\n"
+        return f"={command_id} {result}".rstrip(' ') + "\n\n"
+
+    def cmd_quit(self, args) -> str:
+        self.finished = True
+        self.game.close()
+        return ''
+
+    def cmd_boardsize(self, args) -> str:
+        # Hex 工具会发送 "boardsize N N"，只支持正方形棋盘
+        if not args or not all(arg.isdigit() for arg in args) or len(set(args)) != 1:
+            raise GtpError('unacceptable size')
+        size = int(args[0])
+        if not 1 <= size <= 26:
+            raise GtpError('unacceptable size')
+        self.game.close()
+        self.game = self._new_game(size)
+        return ''
+
+    def cmd_clear_board(self, args) -> str:
+        return self.cmd_boardsize([str(self.game.board.size)])
+
+    def cmd_play(self, args) -> str:
+        if len(args) != 2:
+            raise GtpError('syntax error')
+        color = self._color(args[0])
+        if args[1].lower() == SWAP_MOVE:
+            if not self.game.handle_swap():
+                raise GtpError('illegal move')
+            return ''
+        move = self._move(args[1])
+        # GTP 允许任意一方落子，按命令中的颜色落子
+        self.game.current_color = color
+        if not self.game.make_move(move):
+            raise GtpError('illegal move')
+        return ''
+
+    def cmd_genmove(self, args) -> str:
+        if len(args) != 1:
+            raise GtpError('syntax error')
+        color = self._color(args[0])
+        game = self.game
+        if game.get_winner() or not game.board.available:
+            return RESIGN
+        game.current_color = color
+        game.my_color = color
+        start_time = time.time()
+        move = game.get_ai_move(time_limit=self._move_time(color))
+        if move is None:
+            return RESIGN
+        self._charge(color, time.time() - start_time)
+        return move
+
+    def cmd_undo(self, args) -> str:
+        if not self.game.undo():
+            raise GtpError('cannot undo')
+        return ''
+
+    def cmd_time_settings(self, args) -> str:
+        try:
+            main_time, byo_time, byo_stones = float(args[0]), float(args[1]), int(args[2])
+        except (IndexError, ValueError):
+            raise GtpError('syntax error')
+        self.main_time, self.byo_time, self.byo_stones = main_time, byo_time, byo_stones
+        self.time_left = {}
+        return ''
+
+    def cmd_time_left(self, args) -> str:
+        try:
+            color, seconds, stones = self._color(args[0]), float(args[1]), int(args[2])
+        except (IndexError, ValueError):
+            raise GtpError('syntax error')
+        self.time_left[color] = (seconds, stones)
+        return ''
+
+    def cmd_showboard(self, args) -> str:
+        board = self.game.board
+        lines = ['  ' + ' '.join(chr(ord('a') + c) for c in range(board.size))]
+        for r in range(board.size):
+            cells = ' '.join(board.get_color(r, c) for c in range(board.size))
+            lines.append(' ' * r + f"{r + 1:2d} {cells}")
+        return '\n' + '\n'.join(lines)
+
+    def cmd_engine(self, args) -> str:
+        """无参数时返回当前引擎，否则设置所有难度使用的引擎"""
+        if not args:
+            return self.game.active_engine
+        if args[0] not in self.game.engines:
+            raise GtpError(f"unknown engine, expected one of: {' '.join(self.game.engines)}")
+        self.engine = args[0]
+        self.game.set_engine(args[0])
+        return ''
+
+    def cmd_difficulty(self, args) -> str:
+        if not args:
+            return self.difficulty
+        if args[0] not in self.game.search_times:
+            raise GtpError(f"unknown difficulty, expected one of: {' '.join(self.game.search_times)}")
+        self.difficulty = args[0]
+        self.game.set_difficulty(args[0])
+        return ''
+
+    def cmd_early_stop(self, args) -> str:
+        """无参数时返回当前设置，否则以 on/off 设置是否提前结束搜索"""
+        if not args:
+            return 'on' if self.early_stop else 'off'
+        if args[0].lower() not in ('on', 'off'):
+            raise GtpError('syntax error')
+        self.early_stop = args[0].lower() == 'on'
+        self.game.early_stop = self.early_stop
+        return ''
+
+    def cmd_search_info(self, args) -> str:
+        """最近一次 genmove 的搜索摘要：胜率 模拟次数 用时（秒）"""
+        info = self.game.last_search
+        if not info:
+            raise GtpError('no search yet')
+        return f"{info['win_rate']:.4f} {info['simulations']} {info['seconds']:.3f}"
+
+    def _color(self, arg: str) -> str:
+        color = COLORS.get(arg.lower())
+        if color is None:
+            raise GtpError('invalid color')
+        return color
+
+    def _move(self, arg: str):
+        move = move_to_coord(arg)
+        size = self.game.board.size
+        if move is None or not (0 <= move[0] < size and 0 <= move[1] < size):
+            raise GtpError('invalid vertex')
+        return move
+
+    def _move_time(self, color: str) -> Optional[float]:
+        """
+        按时间控制分配本步的搜索时间
+        Returns:
+            Optional[float]: 搜索时间（秒），没有时间控制时返回 None（按难度决定）
+        """
+        if self.main_time <= 0 and self.byo_time <= 0:
+            return None
+        seconds, stones = self.time_left.get(color, (self.main_time, 0))
+        if stones > 0:
+            # 读秒中：本周期剩余时间平均分给剩余步数
+            budget = seconds / stones
+        elif seconds > 0:
+            # 基本时间内：按剩余时间与对局阶段分配，每步的读秒时间视为加秒
+            increment = self.byo_time / self.byo_stones if self.byo_stones > 0 else 0.0
+            budget = GameClock(seconds, increment).allocate(self.game.board)
+        elif self.byo_stones > 0:
+            budget = self.byo_time / self.byo_stones
+        else:
+            budget = 0.0
+        # 留出通信与落子的余量
+        return max(0.05, budget * 0.9)
+
+    def _charge(self, color: str, spent: float):
+        """没有收到 time_left 时自行扣除基本时间（用完后进入读秒）"""
+        seconds, stones = self.time_left.get(color, (self.main_time, 0))
+        if stones > 0 or seconds <= 0:
+            return
+        seconds -= spent
+        self.time_left[color] = (seconds, 0) if seconds > 0 else (self.byo_time, self.byo_stones)
+
+
+def serve(engine: GtpEngine, reader: TextIO, writer: TextIO):
+    """
+    在一对文本流上执行 GTP 会话，直到 quit 或输入结束
+    Args:
+        engine: GTP 会话
+        reader: 命令输入
+        writer: 回复输出
+    """
+    for line in reader:
+        response = engine.handle(line)
+        if response is None:
+            continue
+        writer.write(response)
+        writer.flush()
+        if engine.finished:
+            break
+    engine.game.close()
+
+
+class GtpHandler(socketserver.StreamRequestHandler):
+    """TCP 连接：每个连接一个 GTP 会话"""
+
+    def handle(self):
+        reader = (line.decode('utf-8', errors='replace') for line in self.rfile)
+        writer = _SocketWriter(self.wfile)
+        logging.info(f"GTP 连接: {self.client_address}")
+        serve(self.server.make_engine(), reader, writer)
+        logging.info(f"GTP 连接结束: {self.client_address}")
+
+
+class _SocketWriter:
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text: str):
+        self.wfile.write(text.encode('utf-8'))
+
+    def flush(self):
+        self.wfile.flush()
+
+
+class GtpServer(socketserver.ThreadingTCPServer):
+    """本地 TCP 上的 GTP 服务器，每个连接在独立线程中处理"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, make_engine: Callable[[], GtpEngine]):
+        self.make_engine = make_engine
+        super().__init__(address, GtpHandler)
+
+
+def main():
+    """python -m core.gtp [--port 7070] [--workers 4]：未指定端口时通过标准输入输出通信"""
+    parser = argparse.ArgumentParser(description='GTP 引擎服务器（标准输入输出或本地 TCP）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=None, help='监听端口，未指定时使用标准输入输出')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='共享搜索调度器的进程数；0 表示在各连接的线程中直接搜索')
+    parser.add_argument('--size', type=int, default=11, help='初始棋盘大小')
+    parser.add_argument('--difficulty', default='medium', help='没有时间控制时按该难度决定搜索时间')
+    parser.add_argument('--engine', default=None, help='引擎名称，默认使用各难度的默认引擎')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    scheduler = SearchScheduler(workers=args.workers) if args.workers > 0 else None
+
+    def make_engine():
+        return GtpEngine(args.size, args.difficulty, args.engine, scheduler)
+
+    if args.port is None:
+        serve(make_engine(), sys.stdin, sys.stdout)
+        return
+    with GtpServer((args.host, args.port), make_engine) as server:
+        print(f"GTP 服务器监听 {args.host}:{server.server_address[1]}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# 同时执行的搜索任务数、排队上限与已结束任务的保留时间（秒），可用环境变量覆盖
+JOB_WORKERS = int(os.environ.get('HEX_JOB_WORKERS', 4))
+JOB_QUEUE_LIMIT = int(os.environ.get('HEX_JOB_QUEUE_LIMIT', 16))
+JOB_RETENTION = float(os.environ.get('HEX_JOB_RETENTION', 300))
+
+
+class JobQueueFull(Exception):
+    """排队的任务已达上限"""
+
+
+class Job:
+    """一个后台任务及其事件流
+
+    事件按顺序编号保存，订阅者可以从任意编号开始读取（断线重连时不丢事件）。
+    事件类型：'queued'、'started'、'progress'、'done'、'error'，最后两者表示任务结束。
+    """
+
+    def __init__(self, job_id: str, session_id: Optional[str] = None):
+        self.id = job_id
+        self.session_id = session_id
+        self.status = 'queued'
+        self.result = None
+        self.events = []
+        self.finished_at = None
+        self.condition = threading.Condition()
+        self.emit('queued', {'job_id': job_id})
+
+    def emit(self, event: str, data: Dict):
+        """追加一个事件并唤醒等待的订阅者"""
+        with self.condition:
+            self.events.append((event, data))
+            if event in ('done', 'error'):
+                self.status = event
+                self.result = data
+                self.finished_at = time.time()
+            elif event == 'started':
+                self.status = 'running'
+            self.condition.notify_all()
+
+    def progress(self, info: Dict):
+        """进度回调，可直接传给 Game.get_ai_move"""
+        self.emit('progress', info)
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def stream(self, start: int = 0, heartbeat: float = 15.0) -> Iterator[Tuple[int, Optional[str], Optional[Dict]]]:
+        """
+        依次产生事件，直到任务结束
+        Args:
+            start: 从第几个事件开始（0 为第一个）
+            heartbeat: 超过该时间没有新事件时产生一次 (序号, None, None) 作为心跳
+        Returns:
+            Iterator: (事件序号, 事件类型, 数据)
+        """
+        index = start
+        while True:
+            with self.condition:
+                if index >= len(self.events) and not self.finished:
+                    self.condition.wait(heartbeat)
+                pending = self.events[index:]
+                finished = self.finished
+            if not pending:
+                if finished:
+                    return
+                yield index, None, None
+                continue
+            for event, data in pending:
+                yield index, event, data
+                index += 1
+            if finished and index >= len(self.events):
+                return
+
+    def snapshot(self) -> Dict:
+        """任务状态摘要：状态、最近一次进度与结果"""
+        with self.condition:
+            last_progress = next((data for event, data in reversed(self.events) if event == 'progress'), None)
+            return {'job_id': self.id, 'status': self.status, 'progress': last_progress, 'result': self.result}
+
+
+class JobManager:
+    """有界线程池上的后台任务
+
+    任务数（排队与执行中）超过上限时拒绝提交；已结束的任务保留一段时间供查询与事件重放，之后清理。
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_limit: int = JOB_QUEUE_LIMIT, retention: float = JOB_RETENTION):
+        """
+        Args:
+            workers: 同时执行的任务数
+            queue_limit: 未结束任务数的上限
+            retention: 已结束任务的保留时间（秒）
+        """
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hex-job')
+        self.queue_limit = queue_limit
+        self.retention = retention
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, func: Callable[[Job], Tuple[Dict, int]], session_id: Optional[str] = None) -> Job:
+        """
+        提交任务
+        Args:
+            func: 任务函数，参数为 Job（用 job.progress 报告进度），返回 (结果数据, HTTP状态码)；
+                  状态码不小于400时以 'error' 事件结束
+            session_id: 任务所属的会话
+        Returns:
+            Job: 新任务
+        Raises:
+            JobQueueFull: 未结束的任务已达上限
+        """
+        with self.lock:
+            self._cleanup()
+            active = sum(1 for job in self.jobs.values() if not job.finished)
+            if active >= self.queue_limit:
+                raise JobQueueFull(f"未完成的任务已达上限 {self.queue_limit}")
+            job = Job(uuid.uuid4().hex, session_id)
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, func)
+        logging.info(f"提交任务 {job.id}，会话: {session_id}，未完成任务数: {active + 1}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job: Job, func: Callable[[Job], Tuple[Dict, int]]):
+        job.emit('started', {'job_id': job.id})
+        try:
+            data, status = func(job)
+            data['status_code'] = status
+            job.emit('error' if status >= 400 else 'done', data)
+        except Exception as e:
+            logging.exception(f"任务 {job.id} 执行失败")
+            job.emit('error', {'error': str(e), 'status_code': 500})
+
+    def _cleanup(self):
+        """清理超过保留时间的已结束任务（调用方持有 self.lock）"""
+        deadline = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < deadline]:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,354 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+from typing import Callable, Dict, Optional, Tuple
+
+from ai.mcts import MCTS, most_visited
+from ai.parallel import merge_root_stats, _resume_search_worker, _release_search_tree, _engine_search_worker
+from ai.time_manager import EarlyStop
+from .board import Board
+
+# 搜索进程数、排队上限、时间片长度（秒）与开始缩短搜索时间的排队深度，可用环境变量覆盖
+SEARCH_WORKERS = int(os.environ.get('HEX_SEARCH_WORKERS', os.cpu_count() or 1))
+SEARCH_QUEUE_LIMIT = int(os.environ.get('HEX_SEARCH_QUEUE_LIMIT', 32))
+SEARCH_SLICE = float(os.environ.get('HEX_SEARCH_SLICE', 0.5))
+SEARCH_DEGRADE_DEPTH = int(os.environ.get('HEX_SEARCH_DEGRADE_DEPTH', SEARCH_WORKERS))
+
+# 不能按时间片拆分的引擎（确定性的迭代加深搜索，拆开后每片结果相同，根节点也没有可合并的访问统计），
+# 整段预算作为一个时间片，直接返回引擎自己 search 的结果
+UNSLICED_ENGINES = {'alphabeta'}
+# 自己使用进程池的引擎，不能在调度器的工作进程中再创建进程；本地搜索时按原引擎运行，
+# 交给进程池时改用单进程MCTS（调度器本身已按根并行合并各时间片）
+PROCESS_ENGINES = {'parallel', 'tree'}
+
+# 保留最近多少次请求的等待时间与总用时，用于计算分位数
+METRIC_WINDOW = 1000
+
+
+class SearchQueueFull(Exception):
+    """排队的搜索请求已达上限"""
+
+
+class SearchRequest:
+    """一次搜索请求：剩余预算、进行中的时间片与合并后的根节点统计"""
+
+    def __init__(self, key: int, name: str, engine: Callable, board: Board, color: str, ai_color: str,
+                 time_limit: float, slice_time: float, progress: Optional[Callable[[Dict], None]],
+                 early_stop: bool = False):
+        self.key = key                # 子进程中保留搜索树所用的编号
+        self.name = name
+        self.engine = engine
+        self.board = board
+        self.color = color
+        self.ai_color = ai_color
+        self.time_limit = time_limit
+        self.slice_time = slice_time
+        self.progress = progress
+        self.unassigned = time_limit  # 尚未分配给时间片的预算（秒）
+        self.searched = 0.0           # 已完成的时间片的总时长（秒）
+        self.early = EarlyStop(time_limit) if early_stop else None
+        self.running = 0              # 进行中的时间片数
+        self.trees = {}               # 进程序号 -> 该进程中这个请求的搜索树累计的根节点统计
+        self.stats = {}
+        self.count = 0
+        self.result = None            # 不拆分的引擎自己 search 的返回值
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.unassigned <= 0 and self.running == 0
+
+
+def _percentiles(values) -> Dict[str, float]:
+    """均值、中位数、95分位与最大值（秒）"""
+    if not values:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    values = sorted(values)
+    return {
+        'mean': round(sum(values) / len(values), 4),
+        'p50': round(values[len(values) // 2], 4),
+        'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+        'max': round(values[-1], 4),
+    }
+
+
+class SearchScheduler:
+    """所有会话共用的搜索调度器
+
+    get_ai_move 的搜索不在请求线程中执行，而是拆成时间片提交到固定数量的单进程执行器：
+    请求在某个进程上的第一个时间片创建搜索树，之后分到同一进程的时间片在这棵树上继续搜索 slice_time 秒，
+    请求结束后才丢弃；各进程上的树的根节点统计按根并行的方式合并，
+    直到用完该请求的时间预算，最后按 ai.mcts.most_visited 选择合并后访问次数最多的动作。
+
+    就绪的请求按轮转顺序分配空闲的进程（优先分到已有它的搜索树的进程），每次只分配一个时间片后排到队尾，
+    因此 10 秒的困难搜索与 2 秒的简单搜索按时间片交替执行，不会让短搜索等到长搜索结束；
+    进程空闲时同一请求可以同时在多个进程上各有一棵树。
+    未完成的请求数达到 queue_limit 时直接拒绝；超过 degrade_depth 时按排队深度等比例缩短新请求的预算。
+
+    调度器空闲（没有未完成的请求）时，Game 可以用 reserve_local 占用一个进程名额，在请求线程中
+    搜索并保留搜索树（复用子树与后台思考）；同一时刻最多一个本地搜索，避免多个线程争用 GIL。
+    """
+
+    def __init__(self, workers: int = SEARCH_WORKERS, queue_limit: int = SEARCH_QUEUE_LIMIT,
+                 slice_time: float = SEARCH_SLICE, degrade_depth: int = SEARCH_DEGRADE_DEPTH,
+                 min_time: float = 0.5):
+        """
+        Args:
+            workers: 进程数，即同时运行的时间片数
+            queue_limit: 未完成请求数的上限
+            slice_time: 时间片长度（秒）
+            degrade_depth: 未完成请求数超过该值时缩短新请求的搜索时间
+            min_time: 缩短后的最短搜索时间（秒）
+        """
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.slice_time = slice_time
+        self.degrade_depth = degrade_depth
+        self.min_time = min_time
+        self.lanes = [ProcessPoolExecutor(max_workers=1) for _ in range(workers)]
+        self.idle = set(range(workers))  # 没有进行中的时间片的进程
+        self.keys = count()
+        self.condition = threading.Condition()
+        self.ready = deque()   # 还有未分配预算的请求，按轮转顺序
+        self.pending = 0       # 未完成的请求数
+        self.running = 0       # 进行中的时间片数（含本地搜索占用的名额）
+        self.local = 0         # 占用名额的本地搜索数
+        self.counters = {'submitted': 0, 'completed': 0, 'rejected': 0, 'degraded': 0, 'failed': 0,
+                         'early_stopped': 0, 'slices': 0, 'local': 0, 'substituted': 0}
+        self.waits = deque(maxlen=METRIC_WINDOW)
+        self.latencies = deque(maxlen=METRIC_WINDOW)
+        self.closed = False
+        self.thread = threading.Thread(target=self._dispatch, name='hex-scheduler', daemon=True)
+        self.thread.start()
+
+    def search(self, name: str, engine: Callable, board: Board, color: str, ai_color: str, time_limit: float,
+               progress: Optional[Callable[[Dict], None]] = None,
+               early_stop: bool = False) -> Tuple[Optional[Tuple[int, int]], float, int, float]:
+        """
+        排队执行一次搜索并等待结果（与引擎的 search 返回值相同）
+        Args:
+            name: 引擎名称，决定是否按时间片拆分
+            engine: 引擎构造函数 (hex, color, ai_color) -> 搜索实例，需可以传给子进程
+            board: 当前局面（会被复制）
+            color: 当前行棋方
+            ai_color: AI的颜色
+            time_limit: 搜索时间预算（秒），排队较深时会被缩短
+            progress: 可选的进度回调，每个时间片结束后以合并后的统计调用一次（格式同 MCTS.progress_info）
+            early_stop: 每个时间片结束后按合并的统计判断能否提前结束（见 ai.time_manager.EarlyStop），
+                        提前结束时不再分配剩余的预算
+        Returns:
+            Tuple: (最佳动作, 胜率, 模拟次数, 用时)
+        Raises:
+            SearchQueueFull: 未完成的请求已达上限
+        """
+        # 首步直接选择中心位置（与各引擎一致），不占用进程
+        if len(board.available) == board.size * board.size:
+            center = board.size // 2
+            return (center, center), 1.0, 1, 0.0
+
+        if name in PROCESS_ENGINES:
+            logging.info(f"引擎 {name} 自己使用进程池，调度搜索改用单进程MCTS按时间片搜索")
+            name, engine = 'mcts', MCTS
+            with self.condition:
+                self.counters['substituted'] += 1
+        with self.condition:
+            if self.pending >= self.queue_limit:
+                self.counters['rejected'] += 1
+                raise SearchQueueFull(f"未完成的搜索请求已达上限 {self.queue_limit}")
+            depth = self.pending + 1
+            if depth > self.degrade_depth:
+                reduced = max(self.min_time, time_limit * self.degrade_depth / depth)
+                if reduced < time_limit:
+                    logging.info(f"搜索排队深度 {depth}，搜索时间从 {time_limit:.2f} 秒缩短为 {reduced:.2f} 秒")
+                    time_limit = reduced
+                    self.counters['degraded'] += 1
+            slice_time = time_limit if name in UNSLICED_ENGINES else self.slice_time
+            request = SearchRequest(next(self.keys), name, engine, board.copy(), color, ai_color, time_limit, slice_time, progress,
+                                    early_stop and name not in UNSLICED_ENGINES)
+            self.pending += 1
+            self.counters['submitted'] += 1
+            self.ready.append(request)
+            self.condition.notify_all()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return self._result(request)
+
+    def reserve_local(self) -> bool:
+        """
+        调度器空闲时为请求线程中的本地搜索（或后台思考）占用一个进程名额
+        Returns:
+            bool: 是否占用成功；成功后搜索结束时须调用 release_local
+        """
+        with self.condition:
+            if self.closed or self.pending or self.local or self.running >= self.workers:
+                return False
+            self.local += 1
+            self.running += 1
+            self.counters['local'] += 1
+            return True
+
+    def release_local(self):
+        """归还 reserve_local 占用的名额"""
+        with self.condition:
+            self.local -= 1
+            self.running -= 1
+            self.condition.notify_all()
+
+    def metrics(self) -> Dict:
+        """
+        调度器指标
+        Returns:
+            Dict: 进程数、未完成/等待中的请求数、进行中的时间片数、本地搜索数、计数器，
+                  以及最近请求从提交到第一个时间片开始的等待时间与总用时的分布（秒）
+        """
+        with self.condition:
+            waiting = sum(1 for request in self.ready if request.started is None)
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'queue_depth': self.pending,
+                'waiting': waiting,
+                'running_slices': self.running - self.local,
+                'local_searches': self.local,
+                **self.counters,
+                'wait_time': _percentiles(self.waits),
+                'latency': _percentiles(self.latencies),
+            }
+
+    def shutdown(self):
+        """停止分配新的时间片并关闭进程（不等待进行中的时间片）"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for lane in self.lanes:
+            lane.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self):
+        """分配线程：有空闲进程时按轮转顺序为就绪的请求提交一个时间片"""
+        while True:
+            with self.condition:
+                while not self.closed and (not self.ready or self.running >= self.workers):
+                    self.condition.wait()
+                if self.closed:
+                    return
+                request = self.ready.popleft()
+                seconds = min(request.slice_time, request.unassigned)
+                request.unassigned -= seconds
+                if request.unassigned > 1e-3:
+                    self.ready.append(request)
+                else:
+                    request.unassigned = 0.0
+                if request.started is None:
+                    request.started = time.time()
+                    self.waits.append(request.started - request.submitted)
+                # 本地搜索占用名额但不占用进程，因此此时总有空闲的进程
+                lane = next((lane for lane in request.trees if lane in self.idle), min(self.idle))
+                self.idle.discard(lane)
+                request.running += 1
+                self.running += 1
+                self.counters['slices'] += 1
+            seed = random.randrange(1 << 30)
+            try:
+                if request.name in UNSLICED_ENGINES:
+                    future = self.lanes[lane].submit(_engine_search_worker, request.engine, request.board,
+                                                     request.color, request.ai_color, seconds, seed)
+                else:
+                    future = self.lanes[lane].submit(_resume_search_worker, request.key, request.engine,
+                                                     request.board, request.color, request.ai_color, seconds, seed)
+            except Exception as e:
+                self._slice_done(request, lane, seconds, None, e)
+                continue
+            future.add_done_callback(
+                lambda f, request=request, lane=lane, seconds=seconds: self._slice_done(request, lane, seconds, f))
+
+    def _slice_done(self, request: SearchRequest, lane: int, seconds: float, future,
+                    error: Optional[Exception] = None):
+        """时间片结束：更新该进程上的树的统计并重新合并，预算用完且没有进行中的时间片时丢弃子进程中的树并唤醒等待的请求"""
+        if future is not None:
+            try:
+                if request.name in UNSLICED_ENGINES:
+                    request.result = future.result()
+                    stats, count = None, request.result[2]
+                else:
+                    stats, count = future.result()
+            except Exception as e:
+                error = e
+        with self.condition:
+            self.running -= 1
+            request.running -= 1
+            self.idle.add(lane)
+            if error is not None:
+                logging.error(f"搜索时间片失败: {error}")
+                if request.error is None:
+                    request.error = error
+                    request.unassigned = 0.0
+                    if request in self.ready:
+                        self.ready.remove(request)
+            else:
+                if stats is not None:
+                    request.trees[lane] = stats
+                    request.stats = merge_root_stats(request.trees.values())
+                request.count += count
+                request.searched += seconds
+                if request.early is not None and request.unassigned > 0:
+                    reason = request.early.check(request.stats, request.count, request.searched)
+                    if reason:
+                        logging.info(f"提前结束调度搜索（{reason}）- 已用预算 {request.searched:.2f}/{request.time_limit:.2f} 秒")
+                        request.unassigned = 0.0
+                        if request in self.ready:
+                            self.ready.remove(request)
+                        self.counters['early_stopped'] += 1
+            finished = request.finished
+            if finished:
+                self.pending -= 1
+                self.counters['failed' if request.error is not None else 'completed'] += 1
+                self.latencies.append(time.time() - request.submitted)
+            self.condition.notify_all()
+        if finished:
+            self._release_trees(request)
+            request.done.set()
+        elif error is None and request.progress is not None:
+            request.progress(self._progress_info(request))
+
+    def _release_trees(self, request: SearchRequest):
+        """丢弃请求在各子进程中保留的搜索树（排在这些进程的执行队列中，不占用名额）"""
+        for lane in request.trees:
+            try:
+                self.lanes[lane].submit(_release_search_tree, request.key)
+            except Exception as e:
+                logging.warning(f"丢弃搜索树失败: {e}")
+
+    def _progress_info(self, request: SearchRequest) -> Dict:
+        """合并后统计的进度摘要（格式同 MCTS.progress_info）"""
+        elapsed = time.time() - (request.started or request.submitted)
+        info = {'simulations': request.count, 'elapsed': round(elapsed, 3), 'best_move': None, 'win_rate': None}
+        best_action, ratio = most_visited(request.stats)
+        if best_action is not None:
+            info['best_move'] = best_action
+            info['win_rate'] = round(ratio, 4)
+        return info
+
+    def _result(self, request: SearchRequest) -> Tuple[Optional[Tuple[int, int]], float, int, float]:
+        search_time = time.time() - request.started
+        if request.result is not None:
+            best_action, best_ratio = request.result[0], request.result[1]
+        elif request.stats:
+            best_action, best_ratio = most_visited(request.stats)
+        elif request.board.available:
+            best_action, best_ratio = random.choice(request.board.available), 0.5
+            logging.info(f"调度搜索未返回统计，随机选择: {best_action}")
+        else:
+            best_action, best_ratio = None, 0.5
+        logging.info(f"调度搜索完成 - 引擎:{request.name}, 预算:{request.time_limit:.2f}秒, "
+                     f"等待:{request.started - request.submitted:.2f}秒, 用时:{search_time:.2f}秒, 模拟次数:{request.count}")
+        return best_action, best_ratio, request.count, search_time
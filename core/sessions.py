@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from .game import Game
+
+# 会话数上限与空闲超时（秒），可用环境变量覆盖
+MAX_SESSIONS = int(os.environ.get('HEX_MAX_SESSIONS', 32))
+SESSION_IDLE_TIMEOUT = float(os.environ.get('HEX_SESSION_IDLE_TIMEOUT', 1800))
+
+
+class SessionLimitReached(Exception):
+    """会话数已达上限且没有可以淘汰的会话"""
+
+
+class Session:
+    """一个玩家的对局：Game 实例与保护它的锁（同一会话的请求串行执行）
+
+    busy 为已通过 SessionRegistry.get/create 取得、尚未 release 的使用者数（在注册表的锁内增减），
+    大于0时会话不会被淘汰。
+    """
+
+    __slots__ = ('id', 'game', 'lock', 'last_used', 'busy')
+
+    def __init__(self, session_id: str, game: Game):
+        self.id = session_id
+        self.game = game
+        self.lock = threading.RLock()
+        self.last_used = time.time()
+        self.busy = 0
+
+
+class SessionRegistry:
+    """按会话编号管理 Game 实例
+
+    会话按最近使用的顺序保存；超过空闲时间的会话、以及数量超过上限时最久未使用的会话会被淘汰，
+    淘汰时停止后台思考并释放搜索树。get/create 返回的会话在调用方 release 之前（包括取得会话后、
+    拿到会话锁之前的这段时间，以及已提交尚未执行的后台任务）不会被淘汰。
+    被淘汰的会话在注册表的锁内移除，游戏在释放锁之后关闭（关闭要等待后台思考线程与工作进程退出）。
+    """
+
+    def __init__(self, capacity: int = MAX_SESSIONS, idle_timeout: float = SESSION_IDLE_TIMEOUT,
+                 factory: Callable[[], Game] = Game):
+        """
+        Args:
+            capacity: 会话数上限
+            idle_timeout: 空闲超时（秒），超过后淘汰
+            factory: 创建 Game 的函数
+        """
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """
+        获取会话并标记为最近使用；返回的会话在调用 release 之前不会被淘汰
+        Args:
+            session_id: 会话编号
+        Returns:
+            Optional[Session]: 会话，不存在（或已被淘汰）时返回 None
+        """
+        if not session_id:
+            return None
+        evicted = []
+        with self.lock:
+            self._evict_idle(evicted)
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.time()
+                session.busy += 1
+                self.sessions.move_to_end(session_id)
+        self._close_games(evicted)
+        return session
+
+    def release(self, session: Session):
+        """归还 get/create 取得的会话，之后会话可以被淘汰"""
+        with self.lock:
+            session.busy -= 1
+            session.last_used = time.time()
+
+    def create(self, session_id: Optional[str] = None) -> Tuple[Session, bool]:
+        """
+        为会话创建新的 Game；会话已存在时关闭旧游戏并替换。返回的会话在调用 release 之前不会被淘汰
+        Args:
+            session_id: 会话编号，None 时生成新编号
+        Returns:
+            Tuple[Session, bool]: (会话, 是否为新会话)
+        Raises:
+            SessionLimitReached: 会话数已达上限且所有会话都在使用中
+        """
+        session_id = session_id or uuid.uuid4().hex
+        evicted = []
+        with self.lock:
+            self._evict_idle(evicted)
+            session = self.sessions.get(session_id)
+            created = session is None
+            if created and len(self.sessions) >= self.capacity:
+                self._evict_lru(len(self.sessions) - self.capacity + 1, evicted)
+            full = created and len(self.sessions) >= self.capacity
+            if created and not full:
+                # 先占住位置并持有会话锁，Game 在释放注册表的锁之后创建；同时取得该会话的请求等待会话锁
+                session = Session(session_id, None)
+                session.lock.acquire()
+                self.sessions[session_id] = session
+                session.busy = 1
+            elif not created:
+                self.sessions.move_to_end(session_id)
+                session.busy += 1
+        self._close_games(evicted)
+        if full:
+            raise SessionLimitReached(f"会话数已达上限 {self.capacity}，且都在使用中")
+        if created:
+            try:
+                session.game = self.factory()
+            except Exception:
+                with self.lock:
+                    self.sessions.pop(session_id, None)
+                raise
+            finally:
+                session.lock.release()
+            logging.info(f"创建会话 {session_id}，当前会话数: {len(self.sessions)}")
+            return session, True
+        # 同一会话的并发 create 依次替换，被替换的 Game 都会被关闭
+        with session.lock:
+            old, session.game = session.game, self.factory()
+            session.last_used = time.time()
+        if old is not None:
+            old.close()
+        return session, False
+
+    def close(self, session_id: str) -> bool:
+        """
+        关闭并移除会话
+        Returns:
+            bool: 会话是否存在
+        """
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        with session.lock:
+            session.game.close()
+        logging.info(f"关闭会话 {session_id}，当前会话数: {len(self.sessions)}")
+        return True
+
+    def close_all(self):
+        """关闭所有会话"""
+        for session_id in list(self.sessions):
+            self.close(session_id)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def _evict(self, session: Session, reason: str, evicted: list) -> bool:
+        """把一个空闲的会话移出注册表（调用方持有 self.lock），它的游戏加入 evicted，
+        由调用方在释放锁之后关闭；会话被取得未归还或正忙时跳过"""
+        if session.busy or not session.lock.acquire(blocking=False):
+            return False
+        try:
+            del self.sessions[session.id]
+        finally:
+            session.lock.release()
+        if session.game is not None:
+            evicted.append(session.game)
+        logging.info(f"淘汰会话 {session.id}（{reason}），剩余会话数: {len(self.sessions)}")
+        return True
+
+    def _evict_idle(self, evicted: list):
+        """淘汰超过空闲时间的会话"""
+        deadline = time.time() - self.idle_timeout
+        for session in list(self.sessions.values()):
+            if session.last_used >= deadline:
+                break  # 按最近使用排序，之后的会话都更新
+            self._evict(session, '空闲超时', evicted)
+
+    def _evict_lru(self, count: int, evicted: list):
+        """按最久未使用的顺序淘汰 count 个会话"""
+        for session in list(self.sessions.values()):
+            if count <= 0:
+                break
+            if self._evict(session, '超过会话数上限', evicted):
+                count -= 1
+
+    @staticmethod
+    def _close_games(games: list):
+        """关闭被淘汰会话的游戏（不持有注册表的锁）"""
+        for game in games:
+            game.close()
@@ -2,6 +2,7 @@
 class HexAPI {
     constructor(baseUrl = '') {
         this.baseUrl = baseUrl || 'http://localhost:5000';
+        this.sessionId = null;  // 后端按会话保存对局，由 initGame 返回
     }
 
     async initGame(isFirstPlayer, difficulty = 'medium') {
@@ -11,10 +12,14 @@ class HexAPI {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     first: isFirstPlayer,
-                    difficulty: difficulty
+                    difficulty: difficulty,
+                    session_id: this.sessionId
                 })
             });
             const data = await response.json();
+            if (data && data.session_id) {
+                this.sessionId = data.session_id;
+            }
             return data;
         } catch (error) {
             console.error('Error initializing game:', error);
@@ -29,7 +34,8 @@ class HexAPI {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     move: moveStr,
-                    difficulty: difficulty
+                    difficulty: difficulty,
+                    session_id: this.sessionId
                 })
             });
             const data = await response.json();
@@ -42,7 +48,7 @@ class HexAPI {
 
     async getAIMove(difficulty = 'medium') {
         try {
-            const response = await fetch(`${this.baseUrl}/api/ai_move?difficulty=${difficulty}`);
+            const response = await fetch(`${this.baseUrl}/api/ai_move?difficulty=${difficulty}&session_id=${this.sessionId}`);
             const data = await response.json();
             return data;
         } catch (error) {
@@ -56,7 +62,7 @@ class HexAPI {
             const response = await fetch(`${this.baseUrl}/api/swap`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ difficulty: difficulty })
+                body: JSON.stringify({ difficulty: difficulty, session_id: this.sessionId })
             });
             const data = await response.json();
             return data;
@@ -65,4 +71,64 @@ class HexAPI {
             return null;
         }
     }
-}
\ No newline at end of file
+
+    // 异步任务：提交后立即返回任务编号，搜索进度与结果通过 SSE 事件流推送
+    async submitJob(action, params = {}) {
+        const response = await fetch(`${this.baseUrl}/api/jobs`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ...params, action: action, session_id: this.sessionId })
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || `HTTP ${response.status}`);
+        }
+        return data;
+    }
+
+    // 订阅任务事件；onProgress 收到 {simulations, elapsed, best_move, win_rate}，
+    // 返回的 Promise 在 done 事件时兑现为最终结果，在 error 事件时拒绝
+    watchJob(jobId, onProgress = null) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`${this.baseUrl}/api/jobs/${jobId}/events`);
+            source.addEventListener('progress', (event) => {
+                if (onProgress) {
+                    onProgress(JSON.parse(event.data));
+                }
+            });
+            source.addEventListener('done', (event) => {
+                source.close();
+                resolve(JSON.parse(event.data));
+            });
+            source.addEventListener('error', (event) => {
+                // 服务端的 error 事件带有数据；没有数据时是连接错误，EventSource 会自动重连
+                if (event.data) {
+                    source.close();
+                    reject(new Error(JSON.parse(event.data).error));
+                }
+            });
+        });
+    }
+
+    async runJob(action, params = {}, onProgress = null) {
+        try {
+            const job = await this.submitJob(action, params);
+            return await this.watchJob(job.job_id, onProgress);
+        } catch (error) {
+            console.error(`Error running ${action} job:`, error);
+            return null;
+        }
+    }
+
+    async makeMoveAsync(moveStr, difficulty = 'medium', onProgress = null) {
+        return this.runJob('move', { move: moveStr, difficulty: difficulty }, onProgress);
+    }
+
+    async getAIMoveAsync(difficulty = 'medium', onProgress = null) {
+        return this.runJob('ai_move', { difficulty: difficulty }, onProgress);
+    }
+
+    async swapAsync(difficulty = 'medium', onProgress = null) {
+        return this.runJob('swap', { difficulty: difficulty }, onProgress);
+    }
+}
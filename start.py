@@ -13,8 +13,8 @@ def install_dependencies():
     """安装必要的依赖"""
     print("正在安装必要的依赖...")
     try:
-        # 安装Flask和Flask-CORS
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'flask', 'flask-cors'])
+        # 安装Flask、Flask-CORS和NumPy
+        subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'flask', 'flask-cors', 'numpy'])
         print("依赖安装成功！")
         return True
     except subprocess.CalledProcessError as e:
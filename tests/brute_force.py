@@ -0,0 +1,45 @@
+from typing import Dict, Tuple
+
+from core.board import Board
+
+
+def solve(board: Board, color: str, memo: Dict = None) -> str:
+    """穷举求解：双方都走最优时的获胜方（只适用于很小的棋盘）
+    Args:
+        board: 局面（搜索中落子后撤销，返回时不变）
+        color: 行棋方
+        memo: 可选的结果缓存 {(格子内容, 行棋方): 获胜方}，多次求解同一棋盘大小时可共用
+    """
+    if memo is None:
+        memo = {}
+    key = (bytes(board.cells), color)
+    result = memo.get(key)
+    if result is not None:
+        return result
+    result = board.check_winner()
+    if result is None:
+        other = 'B' if color == 'R' else 'R'
+        result = other
+        for row, col in list(board.available):
+            token = board.place_stone(row, col, color)
+            won = solve(board, other, memo) == color
+            board.undo(token)
+            if won:
+                result = color
+                break
+    memo[key] = result
+    return result
+
+
+def winning_moves(board: Board, color: str, memo: Dict = None) -> Tuple[Tuple[int, int], ...]:
+    """穷举求出行棋方的所有获胜走法"""
+    if memo is None:
+        memo = {}
+    other = 'B' if color == 'R' else 'R'
+    moves = []
+    for row, col in sorted(board.available):
+        token = board.place_stone(row, col, color)
+        if solve(board, other, memo) == color:
+            moves.append((row, col))
+        board.undo(token)
+    return tuple(moves)
@@ -0,0 +1,63 @@
+import random
+
+from core.board import Board
+
+
+def _state(board):
+    """棋盘的完整可比较状态：格子、并查集、空位集合与哈希"""
+    return (bytes(board.cells), board.uf_r.parent[:], board.uf_r.rank[:], board.uf_b.parent[:],
+            board.uf_b.rank[:], sorted(board.available), board.hash, board.moves[:], board.marks[:])
+
+
+def _random_game(board, rng, count):
+    color = 'R'
+    tokens = []
+    for _ in range(count):
+        if board.check_winner() or not board.available:
+            break
+        row, col = rng.choice(board.available)
+        tokens.append((_state(board), board.place_stone(row, col, color)))
+        color = 'B' if color == 'R' else 'R'
+    return tokens
+
+
+def test_undo_restores_every_step():
+    rng = random.Random(1)
+    for size in (3, 5, 7):
+        for _ in range(20):
+            board = Board(size)
+            tokens = _random_game(board, rng, size * size)
+            for before, token in reversed(tokens):
+                assert board.undo()
+                assert _state(board) == before
+            assert not board.undo()
+
+
+def test_undo_token_rolls_back_later_moves():
+    rng = random.Random(2)
+    board = Board(7)
+    tokens = _random_game(board, rng, 30)
+    before, token = tokens[len(tokens) // 2]
+    assert board.undo(token)
+    assert _state(board) == before
+    assert not board.undo(len(tokens) + 1)
+
+
+def test_undo_restores_winner_and_connectivity():
+    board = Board(3)
+    token = None
+    for row in range(3):
+        token = board.place_stone(row, 1, 'R')
+    assert board.check_winner() == 'R'
+    board.undo(token)
+    assert board.check_winner() is None
+    assert board.place_stone(2, 1, 'B')
+    assert board.check_winner() is None
+
+
+def test_invalid_move_returns_zero_token():
+    board = Board(3)
+    assert board.place_stone(1, 1, 'R') == 1
+    assert board.place_stone(1, 1, 'B') == 0
+    assert board.place_stone(3, 0, 'B') == 0
+    assert board.move_count == 1
@@ -0,0 +1,72 @@
+from core.board import Board
+from core.engine_pool import EnginePool, GtpClient
+from core.gtp import GtpEngine
+
+
+class Loopback:
+    """把 GtpClient 的读写直接接到进程内的 GtpEngine，并记录发出的命令"""
+
+    def __init__(self, engine: GtpEngine):
+        self.engine = engine
+        self.sent = []
+        self.replies = []
+
+    def write(self, text: str):
+        line = text.rstrip('\n')
+        self.sent.append(line)
+        self.replies.extend(self.engine.handle(line).splitlines(keepends=True))
+
+    def flush(self):
+        pass
+
+    def readline(self) -> str:
+        return self.replies.pop(0) if self.replies else ''
+
+
+class LoopbackPool(EnginePool):
+    def __init__(self):
+        super().__init__(address='loopback', size=1)
+        self.engine = GtpEngine(size=5)
+        self.stream = Loopback(self.engine)
+
+    def _connect(self) -> GtpClient:
+        return GtpClient(self.stream, self.stream, lambda: None)
+
+
+def _search(pool, board, color, progress=None):
+    move, _, _, _ = pool.search('mcts', None, board, color, 'R', 0.05, progress)
+    board.place_stone(move[0], move[1], color)
+    return move
+
+
+def test_only_new_moves_are_sent():
+    pool = LoopbackPool()
+    board = Board(5)
+    board.place_stone(0, 0, 'R')
+    updates = []
+    _search(pool, board, 'B', updates.append)
+    first = list(pool.stream.sent)
+    assert first[0] == 'boardsize 5' and 'play black a1' in first
+    assert len(updates) == 1 and updates[0]['simulations'] > 0
+
+    pool.stream.sent.clear()
+    row, col = next(iter(board.available))
+    board.place_stone(row, col, 'R')
+    _search(pool, board, 'B')
+    commands = [line.split()[0] for line in pool.stream.sent]
+    assert commands == ['play', 'genmove', 'hex-search-info']
+    assert pool.engine.game.board.move_count == board.move_count
+
+
+def test_diverged_position_is_replayed():
+    pool = LoopbackPool()
+    board = Board(5)
+    board.place_stone(2, 2, 'R')
+    _search(pool, board, 'B')
+
+    pool.stream.sent.clear()
+    other = Board(5)
+    other.place_stone(1, 1, 'R')
+    _search(pool, other, 'B')
+    assert pool.stream.sent[:2] == ['boardsize 5', 'play black b2']
+    assert pool.engine.game.board.move_count == other.move_count
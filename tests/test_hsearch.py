@@ -0,0 +1,80 @@
+import random
+
+from ai.hsearch import HSearch, VCSolver, carrier_cells
+from core.board import Board
+from tests.brute_force import solve, winning_moves
+
+# 4x4 棋盘上至少落下这么多子后才做穷举（空位更多时穷举太慢）
+OPENING = 6
+# 穷举结果在各测试间共用
+MEMO = {}
+
+
+def _games(size, count, seed):
+    """随机对局的每个未分胜负的局面（同一盘棋依次给出，VCSolver 可以在父局面上增量计算）"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        board = Board(size)
+        color = 'R'
+        while board.check_winner() is None:
+            yield board, color
+            row, col = rng.choice(board.available)
+            board.place_stone(row, col, color)
+            color = 'B' if color == 'R' else 'R'
+
+
+def test_solver_agrees_with_brute_force():
+    memo = MEMO
+    proven = 0
+    for size, count, seed in ((3, 40, 11), (4, 30, 12)):
+        solver = VCSolver()
+        for board, color in _games(size, count, seed):
+            if size == 4 and board.move_count < OPENING:
+                continue
+            value = solve(board, color, memo)
+            winner = solver.winner(board, color)
+            if winner is not None:
+                proven += 1
+                assert winner == value
+            if winner == color:
+                assert solver.winning_move(board, color) in winning_moves(board, color, memo)
+            region = solver.must_play(board, color)
+            if region is not None:
+                moves = {row * size + col for row, col in winning_moves(board, color, memo)}
+                assert moves <= region
+    assert proven > 0
+
+
+def test_edge_connections_are_sound():
+    memo = MEMO
+    for board, color in _games(4, 30, 13):
+        if board.move_count < OPENING:
+            continue
+        for side in 'RB':
+            other = 'B' if side == 'R' else 'R'
+            result = HSearch(board, side)
+            if result.edge_vc() is not None:
+                # VC：对方先走也无法阻止连通
+                assert solve(board, other, memo) == side
+            for carrier in result.edge_scs():
+                # SC：己方先走即可连通，关键点在载体中
+                assert solve(board, side, memo) == side
+                assert carrier_cells(carrier)
+
+
+def test_incremental_matches_soundness_and_reuses_parent():
+    memo = MEMO
+    incremental = 0
+    solver = VCSolver()
+    for board, color in _games(4, 30, 14):
+        for side in 'RB':
+            result = solver.hsearch(board, side)
+            other = 'B' if side == 'R' else 'R'
+            if result.edge_vc() is not None and board.move_count >= OPENING:
+                assert solve(board, other, memo) == side
+            if result.edge_scs() and board.move_count >= OPENING:
+                assert solve(board, side, memo) == side
+        if board.moves:
+            incremental += 1
+    # 每个局面的父局面都已在缓存中，只有空棋盘需要从头计算
+    assert solver.cache.hits >= incremental
@@ -0,0 +1,69 @@
+import random
+
+from ai.inferior import analyze, update, candidate_actions, fill_captured
+from core.board import Board, RED
+from tests.brute_force import solve, winning_moves
+
+
+def _positions(size, stones, count, seed):
+    """随机生成尚未分出胜负的局面"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board(size)
+        color = 'R'
+        for _ in range(stones):
+            row, col = rng.choice(board.available)
+            board.place_stone(row, col, color)
+            color = 'B' if color == 'R' else 'R'
+        if board.check_winner() is None:
+            positions.append((board, color))
+    return positions
+
+
+def test_dead_and_captured_cells_do_not_change_the_result():
+    checked = 0
+    memo = {}
+    for board, color in _positions(4, 7, 60, seed=8):
+        dead, captured = analyze(board)
+        value = solve(board, color, memo)
+        for idx in dead:
+            for filler in 'RB':
+                token = board.place_stone(idx // 4, idx % 4, filler)
+                assert solve(board, color, memo) == value
+                board.undo(token)
+                checked += 1
+        for idx, code in captured.items():
+            token = board.place_stone(idx // 4, idx % 4, 'R' if code == RED else 'B')
+            assert solve(board, color, memo) == value
+            board.undo(token)
+            checked += 1
+        if captured:
+            token = fill_captured(board, captured)
+            assert solve(board, color, memo) == value
+            board.undo(token)
+    assert checked > 0
+
+
+def test_candidate_actions_keep_a_winning_move():
+    memo = {}
+    for board, color in _positions(4, 6, 60, seed=9):
+        winners = winning_moves(board, color, memo)
+        if not winners:
+            continue
+        dead, captured = analyze(board)
+        assert set(candidate_actions(board, dead, captured)) & set(winners)
+
+
+def test_update_matches_full_analysis():
+    rng = random.Random(10)
+    for _ in range(30):
+        board = Board(7)
+        dead, captured = analyze(board)
+        color = 'R'
+        for _ in range(25):
+            row, col = rng.choice(board.available)
+            board.place_stone(row, col, color)
+            dead, captured = update(board, dead, captured, row * 7 + col)
+            assert (dead, captured) == analyze(board)
+            color = 'B' if color == 'R' else 'R'
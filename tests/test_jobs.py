@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from core.jobs import JobManager, JobQueueFull
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(workers=1, queue_limit=2, retention=60.0)
+    yield manager
+    manager.shutdown()
+
+
+def _blocking(release: threading.Event):
+    def run(job):
+        release.wait(5.0)
+        return {'ok': True}, 200
+    return run
+
+
+def _wait_finished(job):
+    for _ in job.stream(heartbeat=0.1):
+        pass
+
+
+def test_submit_rejects_when_queue_is_full(manager):
+    release = threading.Event()
+    running = manager.submit(_blocking(release))
+    queued = manager.submit(_blocking(release))
+    with pytest.raises(JobQueueFull):
+        manager.submit(_blocking(release))
+
+    release.set()
+    _wait_finished(running)
+    _wait_finished(queued)
+    # 已结束的任务不占用名额
+    assert manager.submit(lambda job: ({}, 200)) is not None
+    assert running.status == 'done' and queued.status == 'done'
+
+
+def test_stream_resumes_after_last_event_id(manager):
+    release = threading.Event()
+
+    def run(job):
+        job.progress({'simulations': 500})
+        release.wait(5.0)
+        job.progress({'simulations': 1000})
+        return {'move': 'a1'}, 200
+
+    job = manager.submit(run)
+    seen = []
+    for index, event, data in job.stream(heartbeat=0.1):
+        if event is not None:
+            seen.append((index, event))
+        if event == 'progress':
+            break
+    assert [event for _, event in seen] == ['queued', 'started', 'progress']
+
+    # 断线重连：按最后收到的事件编号（Last-Event-ID）加一继续，不重复也不遗漏
+    last_id = seen[-1][0]
+    release.set()
+    resumed = [(index, event, data) for index, event, data in job.stream(last_id + 1, heartbeat=0.1)
+               if event is not None]
+    assert [index for index, _, _ in resumed] == list(range(last_id + 1, last_id + 3))
+    assert [event for _, event, _ in resumed] == ['progress', 'done']
+    assert resumed[0][2] == {'simulations': 1000}
+    assert resumed[1][2] == {'move': 'a1', 'status_code': 200}
+
+    # 任务结束后仍可从头重放
+    replay = [event for _, event, _ in job.stream(0)]
+    assert replay == ['queued', 'started', 'progress', 'progress', 'done']
+
+
+def test_error_status_ends_the_stream(manager):
+    job = manager.submit(lambda job: ({'error': 'busy'}, 503))
+    events = [(event, data) for _, event, data in job.stream(heartbeat=0.1) if event is not None]
+    assert events[-1] == ('error', {'error': 'busy', 'status_code': 503})
+    assert job.snapshot()['status'] == 'error'
@@ -0,0 +1,48 @@
+import numpy as np
+
+from ai.playout import fill_boards, fill_playouts, red_connected
+from core.board import Board, RED, BLUE, CODE_COLORS
+
+
+def _winner(stones: np.ndarray) -> str:
+    """逐步落子后用并查集判定终局的获胜方"""
+    size = stones.shape[0]
+    board = Board(size)
+    for r in range(size):
+        for c in range(size):
+            board.place_stone(r, c, CODE_COLORS[stones[r, c]])
+    return board.check_winner()
+
+
+def test_red_connected_matches_union_find():
+    rng = np.random.default_rng(5)
+    for size in (2, 3, 5, 8):
+        board = Board(size)
+        boards = fill_boards(board, 'R', 200, rng)
+        expected = [_winner(stones) == 'R' for stones in boards]
+        assert red_connected(boards == RED).tolist() == expected
+
+
+def test_fill_boards_keeps_stones_and_alternates():
+    rng = np.random.default_rng(6)
+    board = Board(5)
+    board.place_stone(2, 2, 'R')
+    board.place_stone(1, 3, 'B')
+    board.place_stone(0, 0, 'R')
+    boards = fill_boards(board, 'B', 50, rng)
+    assert (boards[:, 2, 2] == RED).all() and (boards[:, 1, 3] == BLUE).all() and (boards[:, 0, 0] == RED).all()
+    # 22 个空位：下一步的行棋方（蓝）与对方各 11 个
+    assert ((boards == BLUE).sum(axis=(1, 2)) == 12).all()
+    assert ((boards == RED).sum(axis=(1, 2)) == 13).all()
+
+
+def test_fill_playouts_win_rate():
+    # 红方必须占到中间一格才能连通：5 个空位中红方（先走）随机得到 3 个，胜率为 3/5
+    board = Board(3)
+    board.place_stone(0, 1, 'R')
+    board.place_stone(2, 1, 'R')
+    board.place_stone(1, 0, 'B')
+    board.place_stone(1, 2, 'B')
+    wins = fill_playouts(board, 'R', 4000, np.random.default_rng(7))
+    assert wins.shape == (4000,)
+    assert abs(wins.mean() - 0.6) < 0.03
@@ -0,0 +1,66 @@
+import random
+import time
+
+from core.game import Game
+from tests.brute_force import winning_moves
+
+
+def test_ponder_credit_counts_only_new_visits():
+    game = Game(7)
+    game.my_color = 'B'
+    game.early_stop = False
+    game.set_ponder(True)
+    game.make_move((3, 3))
+    assert game.get_ai_move(time_limit=0.5)
+    try:
+        assert game.start_pondering()
+        start = dict(game.ponder_start)
+        time.sleep(0.3)
+        game.stop_pondering()
+        stats = game.mcts.root_stats()
+        gain = game.ponder_gain
+        assert gain
+        # 收益只包含后台思考期间新增的访问，不含前台搜索留下的统计
+        for action, added in gain.items():
+            assert added == stats[action][0] - start.get(action, 0)
+        assert sum(gain.values()) < sum(n for n, _ in stats.values())
+
+        reply = max(gain, key=gain.get)
+        rate = game.last_search_rate
+        game.make_move(reply)
+        assert game.get_ai_move(time_limit=1.0)
+        credit = min(0.5, gain[reply] / rate)
+        assert abs(game.last_search['seconds'] - (1.0 - credit)) < 0.15
+        assert game.ponder_gain == {}
+    finally:
+        game.close()
+
+
+def test_ponder_favours_the_opponents_winning_replies():
+    """对手行棋的根节点上，后台思考应主要搜索对手的获胜应对（与穷举结果比较）"""
+    memo = {}
+    checked = hits = 0
+    rng = random.Random(5)
+    for _ in range(100):
+        if checked == 8:
+            break
+        game = Game(4)
+        game.my_color = 'B'
+        game.early_stop = False
+        game.set_ponder(True)
+        game.ponder_limit = 0.4
+        try:
+            for _ in range(5):
+                game.make_move(rng.choice(list(game.board.available)))
+            if game.get_winner() or not game.get_ai_move(time_limit=0.2) or game.get_winner():
+                continue
+            wins = winning_moves(game.board, game.current_color, memo)
+            if not wins or len(wins) == len(game.board.available) or not game.start_pondering():
+                continue
+            game.ponder_thread.join()
+            game.stop_pondering()
+            checked += 1
+            hits += max(game.ponder_gain, key=game.ponder_gain.get) in wins
+        finally:
+            game.close()
+    assert checked == 8 and hits >= 6
@@ -0,0 +1,51 @@
+import numpy as np
+
+from ai.mcts import MCTS
+from core.board import Board
+
+
+class UniformNetwork:
+    """均匀先验、价值为0的网络，记录每批评估的局面"""
+
+    def __init__(self):
+        self.batches = []
+
+    def evaluate(self, planes, legal):
+        self.batches.append(planes)
+        probs = legal / legal.sum(axis=1, keepdims=True)
+        return probs.astype(np.float32), np.zeros(len(planes), dtype=np.float32)
+
+
+class RecordingMCTS(MCTS):
+    """记录每批评估的叶节点"""
+    leaves = []
+
+    def _evaluate_puct(self, batch):
+        RecordingMCTS.leaves.append([path[-1] for path, _, _ in batch])
+        super()._evaluate_puct(batch)
+
+
+def _search(size, batch, simulations):
+    board = Board(size)
+    board.place_stone(size // 2, size // 2, 'R')
+    network = UniformNetwork()
+    RecordingMCTS.leaves = []
+    root = RecordingMCTS(board, 'B', 'B', network=network, puct_batch=batch)
+    root.search(time_limit=30, max_simulations=simulations)
+    return root, network
+
+
+def test_root_is_evaluated_once():
+    root, network = _search(5, 16, 64)
+    assert len(network.batches[0]) == 1
+    assert root.prior is not None
+    # 根节点单独评估后，第一批就分散到不同的子节点
+    assert len(network.batches[1]) > 1
+
+
+def test_batches_have_no_duplicate_leaves():
+    root, network = _search(3, 16, 200)
+    for leaves in RecordingMCTS.leaves:
+        assert len({id(leaf) for leaf in leaves}) == len(leaves)
+    # 虚拟损失全部撤销：根节点访问次数等于回传次数，子节点访问次数之和比根节点少一（根节点自身的评估）
+    assert root.N == sum(child.N for child in root.children.values()) + 1
@@ -0,0 +1,122 @@
+import pytest
+
+import ai.parallel
+from ai.mcts import MCTS, most_visited
+from core.board import Board
+from core.game import Game
+from core.scheduler import SearchScheduler
+
+
+class FixedEngine:
+    """自己的 search 选择的动作与根节点访问次数最多的动作不同"""
+
+    def __init__(self, hex, color, ai_color):
+        self.hex = hex
+
+    def search(self, time_limit=5.0, stop_event=None, progress=None, early_stop=False):
+        return (1, 2), 0.75, 42, 0.01
+
+    def root_stats(self):
+        return {(0, 0): (1000, 0.0)}
+
+
+class CountingTree:
+    """每次 search 计一次模拟，根节点统计记录这棵树被搜索过的次数"""
+
+    def __init__(self, hex, color, ai_color):
+        self.calls = 0
+
+    def search(self, time_limit=5.0, stop_event=None, progress=None, early_stop=False):
+        self.calls += 1
+        return (0, 0), 0.5, 1, 0.0
+
+    def root_stats(self):
+        return {(0, self.calls): (self.calls, 0.0)}
+
+
+def _live_trees() -> int:
+    return len(ai.parallel._TREES)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = SearchScheduler(workers=2, slice_time=0.2)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def _game(scheduler) -> Game:
+    game = Game(5, scheduler=scheduler)
+    game.my_color = 'B'
+    game.early_stop = False
+    game.make_move((2, 2))
+    return game
+
+
+def test_idle_scheduler_searches_locally_and_ponders(scheduler):
+    game = _game(scheduler)
+    try:
+        assert game.get_ai_move(time_limit=0.2)
+        assert game.mcts is not None
+        assert scheduler.counters['local'] == 1 and scheduler.counters['submitted'] == 0
+
+        game.set_ponder(True)
+        assert game.start_pondering()
+        assert not scheduler.reserve_local()  # 后台思考占用名额
+        game.stop_pondering()
+        assert scheduler.metrics()['local_searches'] == 0
+    finally:
+        game.close()
+
+
+def test_busy_scheduler_uses_the_pool(scheduler):
+    assert scheduler.reserve_local()
+    game = _game(scheduler)
+    try:
+        assert game.get_ai_move(time_limit=0.2)
+        assert game.mcts is None
+        assert scheduler.counters['submitted'] == 1
+    finally:
+        scheduler.release_local()
+        game.close()
+
+
+def test_unsliced_engine_returns_its_own_move(scheduler):
+    board = Board(5)
+    board.place_stone(2, 2, 'R')
+    move, ratio, count, _ = scheduler.search('alphabeta', FixedEngine, board, 'B', 'B', 0.1)
+    assert (move, ratio, count) == ((1, 2), 0.75, 42)
+
+
+def test_process_engine_substitution_is_counted(scheduler):
+    board = Board(5)
+    board.place_stone(2, 2, 'R')
+    move, _, count, _ = scheduler.search('tree', None, board, 'B', 'B', 0.2)
+    assert move in board.available and count > 0
+    assert scheduler.counters['substituted'] == 1
+
+
+def test_slices_resume_the_same_tree():
+    scheduler = SearchScheduler(workers=1, slice_time=0.2)
+    try:
+        board = Board(7)
+        board.place_stone(3, 3, 'R')
+        for _ in range(2):
+            # 5 个时间片都在同一棵树上继续搜索，新的请求使用新的树
+            move, _, count, _ = scheduler.search('mcts', CountingTree, board, 'B', 'B', 1.0)
+            assert count == 5 and move == (0, 5)
+            assert scheduler.lanes[0].submit(_live_trees).result() == 0
+    finally:
+        scheduler.shutdown()
+
+
+def test_local_and_pooled_searches_choose_the_most_visited_move():
+    assert most_visited({(0, 0): (10, 9.0), (0, 1): (20, 2.0)}) == ((0, 1), 0.1)
+    assert most_visited({(0, 0): (10, 1.0), (0, 1): (10, 2.0)}) == ((0, 1), 0.2)
+    assert most_visited({}) == (None, 0.5)
+
+    board = Board(5)
+    board.place_stone(2, 2, 'R')
+    mcts = MCTS(board, 'B', 'B')
+    move, ratio, _, _ = mcts.search(time_limit=0.3)
+    assert (move, ratio) == most_visited(mcts.root_stats())
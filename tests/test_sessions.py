@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from core.sessions import SessionRegistry, SessionLimitReached
+
+
+class FakeGame:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class LockCheckingGame(FakeGame):
+    """关闭时记录注册表的锁是否被持有"""
+    registry = None
+
+    def close(self):
+        super().close()
+        self.locked = self.registry.lock.locked()
+
+
+def test_acquired_session_survives_idle_eviction():
+    registry = SessionRegistry(capacity=4, factory=FakeGame)
+    session, _ = registry.create('a')
+    registry.release(session)
+
+    held = registry.get('a')
+    assert held is session
+    # 取得会话后、拿到会话锁之前，其他请求触发的淘汰不能关闭它
+    registry.idle_timeout = -1.0
+    registry.create('b')
+    assert 'a' in registry.sessions
+    assert not session.game.closed
+
+    registry.release(held)
+    registry.get('b')
+    assert 'a' not in registry.sessions
+    assert session.game.closed
+
+
+def test_lru_eviction_skips_acquired_sessions():
+    registry = SessionRegistry(capacity=2, factory=FakeGame)
+    first, _ = registry.create('a')
+    second, _ = registry.create('b')
+    registry.release(second)
+
+    # a 仍被取得（例如已提交尚未执行的后台任务），淘汰最久未使用的 b
+    registry.create('c')
+    assert set(registry.sessions) == {'a', 'c'}
+    assert second.game.closed and not first.game.closed
+
+    registry.release(first)
+    registry.create('d')
+    assert 'a' not in registry.sessions
+    assert first.game.closed
+
+
+def test_create_rejects_when_every_session_is_busy():
+    registry = SessionRegistry(capacity=2, factory=FakeGame)
+    registry.create('a')
+    registry.create('b')
+    with pytest.raises(SessionLimitReached):
+        registry.create('c')
+    assert set(registry.sessions) == {'a', 'b'}
+
+
+def test_concurrent_creates_respect_the_cap_and_close_replaced_games():
+    registry = SessionRegistry(capacity=4, factory=FakeGame)
+    first, _ = registry.create('same')
+    rejected, games = [], [first.game]
+    lock = threading.Lock()
+    start = threading.Barrier(12)
+
+    def worker(index):
+        start.wait()
+        try:
+            session, _ = registry.create('same' if index % 2 else None)
+        except SessionLimitReached:
+            with lock:
+                rejected.append(index)
+            return
+        with lock:
+            games.append(session.game)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(registry.sessions) == 4 and len(rejected) == 3
+    # 同一编号的会话被多次替换时，只有最后一个 Game 仍然打开
+    same = registry.sessions['same']
+    open_games = [game for game in games if not game.closed]
+    assert same.game in open_games
+    assert len(open_games) == len(registry.sessions)
+
+
+def test_evicted_game_is_closed_outside_the_registry_lock():
+    registry = SessionRegistry(capacity=1, factory=LockCheckingGame)
+    session, _ = registry.create('a')
+    LockCheckingGame.registry = registry
+    registry.release(session)
+    registry.create('b')
+    assert session.game.closed and not session.game.locked
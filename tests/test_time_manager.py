@@ -0,0 +1,81 @@
+import pytest
+
+from ai.time_manager import (GameClock, EarlyStop, phase_weight, MAX_FRACTION, MIN_MOVE_TIME, MIN_MOVES_LEFT,
+                             MOVES_PER_EMPTY, STABLE_CHECKS, EARLY_STOP_MIN_SIMULATIONS)
+from core.board import Board
+
+
+def _board(size: int, stones: int) -> Board:
+    board = Board(size)
+    color = 'R'
+    for row, col in sorted(board.available)[:stones]:
+        board.place_stone(row, col, color)
+        color = 'B' if color == 'R' else 'R'
+    return board
+
+
+def test_phase_weight_interpolates_between_points():
+    assert phase_weight(0.0) == pytest.approx(1.0)
+    assert phase_weight(0.05) == pytest.approx(1.15)
+    assert phase_weight(0.2) == pytest.approx(1.3)
+    assert phase_weight(0.8) == pytest.approx(0.5)
+    assert phase_weight(1.0) == pytest.approx(0.4)
+
+
+def test_allocate_weights_by_phase():
+    clock = GameClock(100.0)
+    opening, middle, late = _board(11, 0), _board(11, 30), _board(11, 90)
+    for board in (opening, middle, late):
+        empty = len(board.available)
+        moves_left = max(MIN_MOVES_LEFT, empty * MOVES_PER_EMPTY)
+        weight = phase_weight(1 - empty / 121)
+        assert clock.allocate(board) == pytest.approx(100.0 / moves_left * weight)
+    # 中盘的权重高于开局；残局剩余步数少，但权重降低
+    assert phase_weight(30 / 121) > phase_weight(0.0) > phase_weight(90 / 121)
+
+
+def test_allocate_never_exceeds_max_fraction():
+    for size in (5, 11):
+        for stones in range(0, size * size - 1, 3):
+            board = _board(size, stones)
+            for remaining, increment in ((100.0, 0.0), (10.0, 1.0), (1.0, 5.0), (0.2, 0.0)):
+                seconds = GameClock(remaining, increment).allocate(board)
+                assert seconds <= max(MIN_MOVE_TIME, remaining * MAX_FRACTION + increment) + 1e-9
+
+
+def test_allocate_falls_back_to_minimum_time():
+    assert GameClock(-5.0).allocate(_board(11, 10)) == MIN_MOVE_TIME
+    assert GameClock(100.0).allocate(_board(3, 8)) == MIN_MOVE_TIME  # 只剩一个空格
+
+
+def test_unreachable_when_lead_exceeds_remaining_simulations():
+    early = EarlyStop(time_limit=2.0)
+    # 1.5 秒完成 1300 次模拟，剩余 0.5 秒约 433 次：领先 1100 次无法被超过，领先 300 次仍可能被超过
+    stats = {(0, 0): (1200, 0.0), (0, 1): (100, 0.0)}
+    assert early.check(stats, 1300, 1.5) == 'unreachable'
+    stats = {(0, 0): (800, 0.0), (0, 1): (500, 0.0)}
+    assert EarlyStop(time_limit=2.0).check(stats, 1300, 1.5) is None
+
+
+def test_stable_after_consistent_checks():
+    early = EarlyStop(time_limit=100.0)
+    stats = {(0, 0): (600, 0.0), (0, 1): (300, 0.0), (1, 1): (100, 0.0)}
+    results = [early.check(stats, 1000, 40.0 + i) for i in range(STABLE_CHECKS + 1)]
+    assert results[:-1] == [None] * STABLE_CHECKS
+    assert results[-1] == 'stable'
+
+
+def test_no_early_stop_when_choice_differs_from_most_visited():
+    early = EarlyStop(time_limit=2.0)
+    stats = {(0, 0): (1200, 0.0), (0, 1): (100, 0.0)}
+    assert early.check(stats, 1300, 1.5, choice=(0, 1)) is None
+    stable = EarlyStop(time_limit=100.0)
+    stats = {(0, 0): (600, 0.0), (0, 1): (300, 0.0)}
+    for i in range(STABLE_CHECKS + 5):
+        assert stable.check(stats, 1000, 40.0 + i, choice=(0, 1)) is None
+
+
+def test_no_early_stop_before_minimum_simulations():
+    early = EarlyStop(time_limit=2.0)
+    stats = {(0, 0): (EARLY_STOP_MIN_SIMULATIONS - 1, 0.0)}
+    assert early.check(stats, EARLY_STOP_MIN_SIMULATIONS - 1, 1.9) is None
@@ -0,0 +1,79 @@
+import random
+
+from ai.mcts import MCTS
+from ai.transposition import TranspositionTable, position_key
+from core.board import Board
+
+
+def _random_game(board, rng, count):
+    color = 'R'
+    for _ in range(count):
+        if board.check_winner() or not board.available:
+            break
+        row, col = rng.choice(board.available)
+        board.place_stone(row, col, color)
+        color = 'B' if color == 'R' else 'R'
+
+
+def test_zobrist_hash_is_order_independent():
+    rng = random.Random(3)
+    board = Board(6)
+    _random_game(board, rng, 20)
+    stones = [(board.get_color(r, c), r, c) for r in range(6) for c in range(6) if board.get_color(r, c) != '.']
+    rng.shuffle(stones)
+    other = Board(6)
+    for color, r, c in stones:
+        other.place_stone(r, c, color)
+    assert other.hash == board.hash
+    assert board.copy().hash == board.hash
+
+
+def test_zobrist_hash_round_trip():
+    rng = random.Random(4)
+    board = Board(5)
+    assert board.hash == 0
+    _random_game(board, rng, 25)
+    assert board.moves and board.hash != 0
+    board.undo(1)
+    assert board.hash == 0 and len(board.available) == 25
+
+
+def test_position_key_includes_side_to_move():
+    board = Board(5)
+    board.place_stone(2, 2, 'R')
+    assert position_key(board, 'R') != position_key(board, 'B')
+    assert position_key(board, 'R') == board.hash
+
+
+def test_table_evicts_least_recently_used():
+    table = TranspositionTable(capacity=2)
+    table.put(1, 'a')
+    table.put(2, 'b')
+    assert table.get(1) == 'a'
+    table.put(3, 'c')
+    assert table.get(2) is None
+    assert table.get(1) == 'a' and table.get(3) == 'c'
+    assert len(table) == 2
+    assert (table.hits, table.misses) == (3, 1)
+
+
+def test_mcts_shares_transposed_nodes():
+    board = Board(4)
+    board.place_stone(1, 1, 'R')
+    root = MCTS(board, 'B', 'B', tt_size=100000)
+    root.search(time_limit=30, max_simulations=2000)
+    assert root.tt.hits > 0
+    # 经过不同走法顺序到达的同一局面只对应一个节点
+    stack = [(root, board.copy())]
+    seen = 0
+    while stack:
+        node, position = stack.pop()
+        key = position_key(position, node.color)
+        if key in root.tt.entries:
+            assert root.tt.entries[key] is node
+            seen += 1
+        for (row, col), child in node.children.items():
+            following = position.copy()
+            following.place_stone(row, col, node.color)
+            stack.append((child, following))
+    assert seen > 1
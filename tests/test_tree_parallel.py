@@ -0,0 +1,49 @@
+import os
+from functools import partial
+
+from ai.tree_parallel import SharedTreeMCTS
+from core.board import Board
+from core.game import Game
+
+
+def _shared_blocks():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+def test_workers_persist_across_searches_and_close_frees_memory():
+    before = _shared_blocks()
+    board = Board(7)
+    board.place_stone(3, 3, 'R')
+    tree = SharedTreeMCTS(board, 'B', 'B', workers=2, capacity=50000)
+    try:
+        move, _, first, _ = tree.search(time_limit=0.3)
+        pids = [process.pid for process in tree.processes]
+        assert len(pids) == 2 and first > 0
+        assert tree.advance(move) is tree
+        _, _, second, _ = tree.search(time_limit=0.3)
+        # 推进根节点后重新分配了共享内存，工作进程沿用并重新接入
+        assert [process.pid for process in tree.processes] == pids
+        assert second > 0 and tree.visits[0] >= second
+    finally:
+        tree.close()
+    assert tree.processes == []
+    assert _shared_blocks() - before == set()
+
+
+def test_game_closes_replaced_tree():
+    game = Game(7)
+    game.engines['tree'] = partial(SharedTreeMCTS, workers=2, capacity=50000)
+    game.set_engine('tree')
+    game.my_color = 'B'
+    game.make_move((3, 3))
+    try:
+        assert game.get_ai_move(time_limit=0.3)
+        old = game.mcts
+        assert old.processes
+        # 切换引擎后无法复用，旧树必须在创建新树之前关闭
+        game.set_engine('mcts')
+        game.make_move(next(iter(game.board.available)))
+        assert game.get_ai_move(time_limit=0.2)
+        assert old.processes == [] and not old.blocks
+    finally:
+        game.close()
@@ -0,0 +1,28 @@
+import random
+
+from ai.mcts import MCTS
+from tests.brute_force import winning_moves
+from tests.test_inferior import _positions
+
+
+def test_reused_subtree_follows_the_opponents_winning_reply():
+    """AI落子后对手行棋的节点上，访问最多的应对应是对手的获胜应对（复用子树时继承的正是这条变化上的访问）"""
+    memo = {}
+    checked = hits = 0
+    for board, color in _positions(4, 4, 40, seed=11):
+        random.seed(0)
+        root = MCTS(board, color, color)
+        root.search(time_limit=60.0, max_simulations=3000)
+        action, child = max(root.children.items(), key=lambda item: item[1].N)
+        token = board.place_stone(action[0], action[1], color)
+        other = 'B' if color == 'R' else 'R'
+        wins = winning_moves(board, other, memo)
+        board.undo(token)
+        if not wins or len(wins) == len(child.children) + len(child.untried_actions) or not child.children:
+            continue
+        checked += 1
+        reply, _ = max(child.children.items(), key=lambda item: item[1].N)
+        hits += reply in wins
+        if checked == 8:
+            break
+    assert checked == 8 and hits >= 5